@@ -0,0 +1,192 @@
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtGui import QPainter, QColor
+from PyQt5.QtCore import Qt, QRect, QSize
+from utils.change_bus import SYNC
+
+# أقل عدد من الخانات يحجز للأرقام، والهامش حول الأرقام وعرض شريط العلامات (بالبكسل)
+MIN_DIGITS = 3
+GUTTER_PADDING = 6
+MARKER_WIDTH = 3
+
+# ألوان العلامات بترتيب أولويتها: العلامة الأولى الموجودة في السطر هي التي ترسم
+MARKER_COLORS = {
+    'diagnostic': QColor("#e05252"),
+    'search': QColor("#d19a3a"),
+    'modified': QColor("#4c8fd6"),
+}
+
+BACKGROUND_COLOR = QColor("#1e1e1e")
+NUMBER_COLOR = QColor("#6e7681")
+CURRENT_NUMBER_COLOR = QColor("#d4d4d4")
+
+
+class LineNumberGutter(QWidget):
+    """هامش أرقام الأسطر والعلامات بجوار المحرر.
+
+    لا يرسم إلا الكتل الظاهرة بدءاً بأول كتلة ظاهرة ومواقعها من تخطيط المستند،
+    فكلفة الرسم لا تتعلق بطول الملف. عرض الهامش يحسب من عرض الخانة المخزن
+    وعدد خانات أكبر رقم سطر، ولا يتغير إلا بتغير الخط أو عدد الخانات.
+    العلامات (نتائج البحث، التشخيصات، الأسطر المعدلة) تحفظ بأرقام الكتل وتزاح
+    عند إضافة أسطر أو حذفها قبلها.
+    """
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.line_offset = 0
+        self.total_lines = 0
+        self._markers = {}
+        self._block_count = 0
+        self._font_key = None
+        self._digit_width = 0
+        self._width = 0
+
+        editor.verticalScrollBar().valueChanged.connect(lambda value: self.update())
+        editor.cursorPositionChanged.connect(lambda: self.update())
+        self.connect_document()
+
+    def connect_document(self):
+        """متابعة تعديلات مستند المحرر، ويستدعى مجدداً عند تغيير المستند."""
+        document = self.editor.document()
+        self._block_count = document.blockCount()
+        self.editor.change_bus.subscribe(self.editor, 'gutter', self._on_contents_change, SYNC)
+        document.documentLayout().documentSizeChanged.connect(lambda size: self.update())
+        document.modificationChanged.connect(self._on_modification_changed)
+        self.update_width()
+
+    def _on_modification_changed(self, modified):
+        # بعد الحفظ لا يبقى سطر معدل
+        if not modified:
+            self.clear_markers('modified')
+
+    def _on_contents_change(self, delta):
+        document = self.editor.document()
+        first = document.findBlock(delta.position).blockNumber()
+        count = document.blockCount()
+        shift = count - self._block_count
+        self._block_count = count
+        if shift:
+            # الأسطر بعد التعديل تنزاح بعدد الأسطر المضافة أو المحذوفة
+            for kind, blocks in self._markers.items():
+                self._markers[kind] = {
+                    block + shift if block > first else block
+                    for block in blocks if block <= first or block + shift > first
+                }
+            self.update_width()
+        if delta.position == 0 and delta.added >= document.characterCount() - 1:
+            # استبدال النص كاملاً (فتح ملف أو نافذة من ملف كبير) لا يعد تعديلاً للأسطر
+            self._markers.pop('modified', None)
+        elif not getattr(self.editor, 'loader', None):
+            last = document.findBlock(delta.position + delta.added).blockNumber()
+            self._markers.setdefault('modified', set()).update(range(first, last + 1))
+        self.update()
+
+    def set_markers(self, kind, block_numbers):
+        """استبدال علامات نوع معين بأرقام الكتل المعطاة."""
+        self._markers[kind] = set(block_numbers)
+        self.update()
+
+    def clear_markers(self, kind):
+        if self._markers.pop(kind, None):
+            self.update()
+
+    def set_line_offset(self, offset, total_lines=0):
+        """رقم أول سطر في المستند وعدد أسطر الملف كله، لعرض نافذة من ملف كبير."""
+        self.line_offset = offset
+        self.total_lines = total_lines
+        self.update_width()
+        self.update()
+
+    def _measure_digits(self):
+        """عرض أعرض خانة في خط المحرر، ويعاد حسابه عند تغير الخط فقط."""
+        font = self.editor.font()
+        if font.key() != self._font_key:
+            self._font_key = font.key()
+            self.setFont(font)
+            metrics = self.fontMetrics()
+            self._digit_width = max(metrics.horizontalAdvance(digit) for digit in '0123456789')
+        return self._digit_width
+
+    def gutter_width(self):
+        if self.isHidden():
+            return 0
+        max_line = max(self.total_lines, self.line_offset + self._block_count, 1)
+        digits = max(MIN_DIGITS, len(str(max_line)))
+        return GUTTER_PADDING * 2 + MARKER_WIDTH + digits * self._measure_digits()
+
+    def update_width(self):
+        """حجز عرض الهامش في المحرر إن تغير."""
+        width = self.gutter_width()
+        if width != self._width:
+            self._width = width
+            self.editor.setViewportMargins(width, 0, 0, 0)
+            self.update_geometry()
+
+    def update_geometry(self):
+        """وضع الهامش على جانب بداية السطر، يمين المحرر في الاتجاه العربي."""
+        rect = self.editor.contentsRect()
+        if self.editor.isRightToLeft():
+            self.setGeometry(QRect(rect.right() - self._width + 1, rect.top(), self._width, rect.height()))
+        else:
+            self.setGeometry(QRect(rect.left(), rect.top(), self._width, rect.height()))
+
+    def sizeHint(self):
+        return QSize(self._width, 0)
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == event.FontChange:
+            self.update_width()
+
+    def mousePressEvent(self, event):
+        """نقل المؤشر إلى بداية السطر المضغوط."""
+        block = self._block_at(event.pos().y())
+        if block is not None:
+            cursor = self.editor.textCursor()
+            cursor.setPosition(block.position())
+            self.editor.setTextCursor(cursor)
+            self.editor.setFocus()
+
+    def _block_at(self, y):
+        block = self.editor.first_visible_block()
+        while block.isValid():
+            rect = self.editor.block_geometry(block)
+            if rect.top() > y:
+                return None
+            if rect.bottom() >= y:
+                return block
+            block = block.next()
+        return None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(event.rect(), BACKGROUND_COLOR)
+        # الهامش على يمين المحرر في الاتجاه العربي فتلتصق الأرقام بجانب النص
+        right_to_left = self.editor.isRightToLeft()
+        alignment = (Qt.AlignLeft if right_to_left else Qt.AlignRight) | Qt.AlignTop
+        marker_x = self._width - MARKER_WIDTH if right_to_left else 0
+        number_x = GUTTER_PADDING if right_to_left else GUTTER_PADDING + MARKER_WIDTH
+        number_width = self._width - GUTTER_PADDING * 2 - MARKER_WIDTH
+        line_height = self.fontMetrics().height()
+        current = self.editor.textCursor().blockNumber()
+        # العلامات المعروفة أولاً بترتيب أولويتها ثم غيرها بلون الأرقام
+        kinds = [kind for kind in MARKER_COLORS if self._markers.get(kind)]
+        kinds += [kind for kind in self._markers if kind not in MARKER_COLORS and self._markers[kind]]
+        markers = [(self._markers[kind], MARKER_COLORS.get(kind, NUMBER_COLOR)) for kind in kinds]
+
+        block = self.editor.first_visible_block()
+        while block.isValid():
+            rect = self.editor.block_geometry(block)
+            if rect.top() > event.rect().bottom():
+                break
+            if block.isVisible() and rect.bottom() >= event.rect().top():
+                number = block.blockNumber()
+                top = int(rect.top())
+                painter.setPen(CURRENT_NUMBER_COLOR if number == current else NUMBER_COLOR)
+                painter.drawText(number_x, top, number_width, line_height, alignment,
+                                 str(self.line_offset + number + 1))
+                for blocks, color in markers:
+                    if number in blocks:
+                        painter.fillRect(marker_x, top, MARKER_WIDTH, int(rect.height()), color)
+                        break
+            block = block.next()
@@ -0,0 +1,75 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView)
+from utils.memory_accountant import USAGE_LABELS
+
+
+def format_size(size):
+    """عرض الحجم بوحدة مناسبة."""
+    if size >= 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} م.ب"
+    return f"{size // 1024} ك.ب"
+
+
+class MemoryUsageDialog(QDialog):
+    """نافذة تعرض استهلاك الذاكرة لكل تبويب وللتبويبات المغلقة."""
+
+    def __init__(self, accountant, parent=None):
+        super().__init__(parent)
+        self.accountant = accountant
+        self.setWindowTitle("استخدام الذاكرة")
+        self.setMinimumSize(700, 350)
+
+        layout = QVBoxLayout(self)
+        self.summary_label = QLabel(self)
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(len(USAGE_LABELS) + 2)
+        self.table.setHorizontalHeaderLabels(['التبويب', *USAGE_LABELS.values(), 'المجموع'])
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        release_button = QPushButton("تحرير الذاكرة المؤقتة", self)
+        release_button.clicked.connect(self.release_caches)
+        buttons.addWidget(release_button)
+        refresh_button = QPushButton("تحديث", self)
+        refresh_button.clicked.connect(self.refresh)
+        buttons.addWidget(refresh_button)
+        buttons.addStretch()
+        close_button = QPushButton("إغلاق", self)
+        close_button.clicked.connect(self.close)
+        buttons.addWidget(close_button)
+        layout.addLayout(buttons)
+
+        self.refresh()
+
+    def refresh(self):
+        """إعادة حساب الاستهلاك وعرضه."""
+        rows = self.accountant.tab_usage()
+        rows.sort(key=lambda row: row['total'], reverse=True)
+        closed_tabs = self.accountant.closed_tabs_usage()
+
+        self.table.setRowCount(len(rows) + 1)
+        for row_index, row in enumerate(rows):
+            title = row['title'] if row['editor'] else f"{row['title']} (غير محمل)"
+            self.table.setItem(row_index, 0, QTableWidgetItem(title))
+            for column, key in enumerate(USAGE_LABELS, start=1):
+                self.table.setItem(row_index, column, QTableWidgetItem(format_size(row['usage'].get(key, 0))))
+            self.table.setItem(row_index, len(USAGE_LABELS) + 1, QTableWidgetItem(format_size(row['total'])))
+
+        last_row = len(rows)
+        self.table.setItem(last_row, 0, QTableWidgetItem("التبويبات المغلقة"))
+        for column in range(1, len(USAGE_LABELS) + 1):
+            self.table.setItem(last_row, column, QTableWidgetItem(''))
+        self.table.setItem(last_row, len(USAGE_LABELS) + 1, QTableWidgetItem(format_size(closed_tabs)))
+
+        total = sum(row['total'] for row in rows) + closed_tabs
+        budget = self.accountant.budget()
+        budget_text = format_size(budget) if budget else "بلا حد"
+        self.summary_label.setText(f"الاستهلاك التقديري: {format_size(total)} من {budget_text}")
+
+    def release_caches(self):
+        self.accountant.release_caches()
+        self.refresh()
@@ -77,6 +77,7 @@ class ArabicMenuBar(QMenuBar):
             ('فتح', 'Ctrl+O', 'open_file'),
             ('حفظ', 'Ctrl+S', 'save_file'),
             ('حفظ باسم', 'Ctrl+Shift+S', 'save_file_as'),
+            ('حفظ الكل', 'Ctrl+Alt+S', 'save_all'),
             ('نافذة جديدة', 'Ctrl+N', 'new_file'),
             ('فتح مجلد...', 'Ctrl+K', 'open_folder'),
         ],
@@ -354,7 +355,7 @@ class ArabicMenuBar(QMenuBar):
         if ok:
             self.parent.default_font = font
             self.parent.settings_manager.save_font(font)
-            current_editor.apply_font(font)
+            self.parent.apply_font_to_all_tabs(font)
 
     def load_font_settings(self):
         """
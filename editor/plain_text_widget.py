@@ -0,0 +1,31 @@
+from PyQt5.QtWidgets import QPlainTextEdit
+from PyQt5.QtCore import pyqtSignal
+from .text_widget import ArabicEditorMixin
+import logging
+try:
+    from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+except Exception as e:
+        print(f"خطأ في تحميل المكتبات: {e}")
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+
+class ArabicPlainTextEdit(ArabicEditorMixin, QPlainTextEdit):
+    """محرر نص عادي مبني على تخطيط الكتل في QPlainTextEdit.
+
+    يتشارك مع ArabicTextEdit الاتجاه من اليمين إلى اليسار وقائمة التشكيل
+    والتمييز اللغوي وعناصر الإضافات، لكنه لا يحمل كلفة محرك النص المنسق.
+    """
+
+    file_type_changed = pyqtSignal(str)  # إشارة عند تغيير نوع الملف
+
+    def __init__(self, main_window):
+        super().__init__()
+        self._init_editor(main_window)
+        log_in_arabic(logger, logging.DEBUG, "تم إنشاء محرر نص عادي")
+
+    def first_visible_block(self):
+        return self.firstVisibleBlock()
+
+    def block_geometry(self, block):
+        return self.blockBoundingGeometry(block).translated(self.contentOffset())
@@ -10,9 +10,9 @@ try:
 
     from PyQt5.QtWidgets import (
         QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-        QLineEdit, QPushButton, QCheckBox, QInputDialog, QMessageBox
+        QLineEdit, QPushButton, QCheckBox, QInputDialog, QMessageBox, QTextEdit
     )
-    from PyQt5.QtGui import QTextDocument
+    from PyQt5.QtGui import QTextDocument, QTextCursor, QColor
     from PyQt5.QtCore import pyqtSignal
 
     from utils.arabic_logger import setup_arabic_logging, log_in_arabic
@@ -23,6 +23,9 @@ except Exception as e:
 formatter = setup_arabic_logging()
 logger = logging.getLogger(__name__)
 
+# أقصى عدد من النتائج يميز في المحرر
+MAX_HIGHLIGHTED_MATCHES = 10000
+
 # إضافة ترجمات خاصة بوحدة البحث
 if formatter:
     formatter.register_translations({
@@ -80,6 +83,9 @@ class SearchDialog(QDialog):
                 super().__init__(parent)
                 self.parent = parent
                 self.is_replace = is_replace
+                # المحرر المميزة فيه نتائج البحث ومفتاح آخر بحث ميز
+                self._highlighted_editor = None
+                self._highlight_key = None
                 
                 # إعداد النافذة
                 self._setup_ui()
@@ -290,6 +296,7 @@ class SearchDialog(QDialog):
                 flags |= QTextDocument.FindCaseSensitively
             if self.whole_words.isChecked():
                 flags |= QTextDocument.FindWholeWords
+            self._highlight_matches(text_edit, text, flags)
             if not forward:
                 flags |= QTextDocument.FindBackward
                 
@@ -312,6 +319,47 @@ class SearchDialog(QDialog):
             self._show_error("حدث خطأ أثناء البحث")
             return False
 
+    def _highlight_matches(self, text_edit, text, flags):
+        """تمييز جميع نتائج البحث في طبقة البحث، ولا يعاد البحث إلا إذا تغير النص أو الخيارات."""
+        key = (text, int(flags), text_edit.buffer.revision)
+        if text_edit is self._highlighted_editor and key == self._highlight_key:
+            return
+        self._clear_highlights()
+
+        match_format = QTextEdit.ExtraSelection().format
+        match_format.setBackground(QColor("#614a1e"))
+        selections = []
+        document = text_edit.document()
+        cursor = document.find(text, 0, flags)
+        while not cursor.isNull() and len(selections) < MAX_HIGHLIGHTED_MATCHES:
+            selection = QTextEdit.ExtraSelection()
+            selection.format = match_format
+            selection.cursor = QTextCursor(cursor)
+            selections.append(selection)
+            cursor = document.find(text, cursor, flags)
+
+        text_edit.selection_layers.set_layer('search', selections)
+        text_edit.gutter.set_markers('search', {selection.cursor.blockNumber() for selection in selections})
+        self._highlighted_editor = text_edit
+        self._highlight_key = key
+
+    def _clear_highlights(self):
+        """إزالة تمييز نتائج البحث من المحرر."""
+        if self._highlighted_editor is not None:
+            try:
+                self._highlighted_editor.selection_layers.clear_layer('search')
+                self._highlighted_editor.gutter.clear_markers('search')
+            except RuntimeError:
+                # أغلق المحرر بعد البحث
+                pass
+        self._highlighted_editor = None
+        self._highlight_key = None
+
+    def hideEvent(self, event):
+        """إزالة تمييز النتائج عند إغلاق النافذة."""
+        self._clear_highlights()
+        super().hideEvent(event)
+
     def _do_replace(self):
         """تنفيذ الاستبدال."""
         try:
@@ -482,8 +530,14 @@ class SearchManager:
                 return
             
             # الحصول على معلومات السطر
-            current_line = editor.textCursor().blockNumber() + 1
-            max_lines = editor.document().lineCount()
+            large_file = getattr(editor, 'large_file', None)
+            if large_file:
+                # أرقام الأسطر في وضع الملفات الكبيرة تشير إلى الملف كاملاً
+                current_line = large_file.window[0] + editor.textCursor().blockNumber() + 1
+                max_lines = large_file.total_lines()
+            else:
+                current_line = editor.textCursor().blockNumber() + 1
+                max_lines = editor.snapshot().line_count()
 
             # عرض مربع حوار لإدخال رقم السطر
             line_number, ok = QInputDialog.getInt(
@@ -497,6 +551,9 @@ class SearchManager:
         
             # الانتقال إلى السطر المحدد
             if ok:
+                    if large_file:
+                        large_file.goto_line(line_number)
+                        return
                     cursor = editor.textCursor()
                     cursor.movePosition(cursor.Start)
                     cursor.movePosition(cursor.NextBlock, n=line_number-1)
@@ -0,0 +1,57 @@
+from PyQt5.QtCore import QTimer
+
+# ترتيب رسم الطبقات: الطبقة اللاحقة ترسم فوق السابقة
+DEFAULT_LAYER_ORDER = ('current_line', 'search', 'brackets')
+
+
+class SelectionLayers:
+    """طبقات مسماة من التحديدات الإضافية فوق المحرر.
+
+    كل طبقة تحفظ تحديداتها وحدها ولا يعاد بناؤها إلا عند تغيرها، وتدمج الطبقات
+    في قائمة المحرر مرة واحدة في الإطار التالي مهما تعددت التغييرات. Qt يقارن
+    القائمة الجديدة بالسابقة فلا يعيد رسم إلا التحديدات التي تغيرت، فتحريك
+    المؤشر لا يمس نتائج البحث المعروضة.
+    """
+
+    def __init__(self, editor, order=DEFAULT_LAYER_ORDER):
+        self.editor = editor
+        self._order = list(order)
+        self._layers = {}
+        self._merge_timer = QTimer(editor)
+        self._merge_timer.setSingleShot(True)
+        self._merge_timer.setInterval(0)
+        self._merge_timer.timeout.connect(self._merge)
+
+    def set_layer(self, name, selections):
+        """استبدال تحديدات الطبقة، والطبقة الجديدة ترسم فوق الطبقات المعروفة."""
+        if name not in self._order:
+            self._order.append(name)
+        selections = list(selections)
+        if not selections and not self._layers.get(name):
+            return
+        self._layers[name] = selections
+        self._schedule_merge()
+
+    def clear_layer(self, name):
+        """إزالة جميع تحديدات الطبقة."""
+        if self._layers.pop(name, None):
+            self._schedule_merge()
+
+    def layer(self, name):
+        """تحديدات الطبقة الحالية."""
+        return self._layers.get(name, [])
+
+    def _schedule_merge(self):
+        if not self._merge_timer.isActive():
+            self._merge_timer.start()
+
+    def flush(self):
+        """دمج الطبقات فوراً دون انتظار الإطار التالي."""
+        self._merge_timer.stop()
+        self._merge()
+
+    def _merge(self):
+        merged = []
+        for name in self._order:
+            merged.extend(self._layers.get(name, ()))
+        self.editor.setExtraSelections(merged)
@@ -16,7 +16,13 @@ except Exception as e:
     except Exception as e:
         print(f"خطأ في تحميل المكتبات: {e}")
 formatter = setup_arabic_logging()
-        
+
+# امتدادات الملفات التي تفتح في محرر النص العادي افتراضياً
+PLAIN_TEXT_EXTENSIONS = [
+    '.txt', '.json', '.po', '.pot', '.csv', '.tsv', '.log', '.md', '.ini', '.cfg',
+    '.conf', '.yaml', '.yml', '.xml', '.srt', '.py', '.js', '.css', '.html', '.sql'
+]
+
 class SettingsManager:
     STYLE_FILES = ['style.qss', 'sidebar.qss', 'extension_manager.qss']
     DEFAULT_FONT = {
@@ -247,7 +253,18 @@ class SettingsManager:
                 "editor": {
                     "auto_save": {"enabled": True, "interval": 30},
                     "theme": "light",
-                    "word_wrap": True
+                    "word_wrap": True,
+                    "lrm_marker": "document",
+                    "large_file_threshold_mb": 64,
+                    "background_load_threshold_mb": 2,
+                    "long_line_limit": 20000,
+                    "restore_session": True,
+                    "undo_budget_mb": 16,
+                    "memory_budget_mb": 1024,
+                    "refresh_interval_ms": 16,
+                    "line_numbers": True,
+                    "word_completion": True,
+                    "plain_text_extensions": list(PLAIN_TEXT_EXTENSIONS)
                 },
                 "font": self.DEFAULT_FONT.copy(),
                 "extensions": {
@@ -262,7 +279,9 @@ class SettingsManager:
                     "movable": True,
                     "scroll_buttons": True,
                     "elide_mode": "none",
-                    "max_closed_tabs": 10
+                    "max_closed_tabs": 10,
+                    "closed_tabs_memory_mb": 16,
+                    "dehydrate_after_minutes": 0
                 }
             }
             self.logger.info("تم إنشاء الإعدادات الافتراضية بنجاح")
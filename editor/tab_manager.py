@@ -1,8 +1,19 @@
 try:        
-    from PyQt5.QtWidgets import QTabWidget, QMessageBox, QMenu, QAction, QTabBar
+    from PyQt5.QtWidgets import QTabWidget, QMessageBox, QMenu, QAction, QTabBar, QProgressDialog
     from PyQt5.QtCore import Qt, pyqtSignal, QMimeData
     from PyQt5.QtGui import QDrag
-    from .text_widget import ArabicTextEdit
+    from .text_widget import ArabicTextEdit, FILE_TYPE_UPDATE_DELAY
+    from .plain_text_widget import ArabicPlainTextEdit
+    from .settings_manager import PLAIN_TEXT_EXTENSIONS
+    from .tab_placeholder import TabPlaceholder
+    from .tab_registry import TabRegistry, canonical_path
+    from utils.large_file import LargeFileBuffer, LargeFileView
+    from utils.file_loader import detect_file_format, read_text_file
+    from utils.background_loader import BackgroundFileLoader, BatchFileReader, TabLoadIndicator
+    from utils.closed_tab_store import ClosedTabStore
+    from utils.session_manager import file_fingerprint, fingerprint_matches
+    from utils.timer_wheel import shared_timer_wheel
+    from utils.change_bus import DEBOUNCED
     import os
     import subprocess
     from utils.arabic_logger import setup_arabic_logging, log_in_arabic
@@ -11,6 +22,7 @@ try:
     import difflib
     from PyQt5.QtCore import QTimer
     import re
+    import time
 
     # إعداد اللوج
     formatter = setup_arabic_logging()
@@ -35,9 +47,14 @@ class TabManager(QTabWidget):
             super().__init__()
             self.main_window = main_window
             self.file_paths = {}  # قاموس لتخزين مسارات الملفات
+            # فهرس التبويبات حسب المسار والمحرر
+            self.tab_registry = TabRegistry()
             self.untitled_count = 0  # عداد للملفات الجديدة
-            self.closed_tabs = []  # قائمة للتبويبات المغلقة
-            self.max_closed_tabs = 10  # العدد الأقصى للتبويبات المغلقة المحفوظة
+            # التبويبات المغلقة مضغوطة بحجم محدود في الذاكرة
+            self.closed_tabs = ClosedTabStore(
+                max_entries=10,
+                memory_budget=self._setting_mb('tabs.closed_tabs_memory_mb', 16)
+            )
             self.setTabsClosable(True)
             
             # تعديل تلميح زر الإغلاق
@@ -61,10 +78,35 @@ class TabManager(QTabWidget):
             # قاموس لتخزين أنواع الملفات
             self.file_types = {}
             
+            # المحررات التي تغلق تبويباتها بعد اكتمال حفظها
+            self._closing_after_save = set()
+            
+            # المحررات التي تنتظر تحديث علامة التعديل في عناوين تبويباتها
+            self._dirty_titles = {}
+            if hasattr(main_window, 'refresh_scheduler'):
+                main_window.refresh_scheduler.register('tab_titles', self._refresh_tab_titles)
+            
+            # تعطيل معالجة تغيير التبويب أثناء استبدال عناصر التبويبات أو إضافتها
+            self._swapping_tab = False
+            
+            # إعادة التبويبات غير المستخدمة إلى عناصر مؤقتة خفيفة كل دقيقة، إن كانت مفعلة
+            if self._dehydrate_after_minutes() > 0:
+                shared_timer_wheel().schedule(self, 'dehydrate_idle_tabs', 60000,
+                                              self.dehydrate_idle_tabs, repeat=True)
+            
             log_in_arabic(logger, logging.INFO, "تم تهيئة مدير التبويبات بنجاح")
         except Exception as e:
             log_in_arabic(logger, logging.ERROR, f"خطأ في تهيئة مدير التبويبات: {e}")
 
+    @property
+    def max_closed_tabs(self):
+        """العدد الأقصى للتبويبات المغلقة المحفوظة"""
+        return self.closed_tabs.max_entries
+
+    @max_closed_tabs.setter
+    def max_closed_tabs(self, value):
+        self.closed_tabs.max_entries = value
+
     def detect_file_type(self, file_path=None, content=None):
         """التعرف على نوع الملف من امتداده ومحتواه"""
         try:
@@ -138,35 +180,108 @@ class TabManager(QTabWidget):
     def update_file_type(self, editor, file_path=None):
         """تحديث نوع الملف في شريط الحالة"""
         try:
-            content = editor.toPlainText()
-            file_type = self.detect_file_type(file_path, content)
+            # نوع الملف لا يتغير ما دام المستند غير معدل منذ تحديده
+            file_type = self.file_types.get(editor)
+            if file_type is None or editor.document().isModified():
+                file_type = self.detect_file_type(file_path, editor.toPlainText())
             
             # تخزين نوع الملف
             self.file_types[editor] = file_type
             
-            # تحديث شريط الحالة
-            if hasattr(self.main_window, 'statistics_manager'):
-                self.main_window.statistics_manager.update_statistics(
-                    text=content,
-                    file_type=file_type
-                )
+            # شريط الحالة يعرض نوع ملف المحرر الحالي في الإطار التالي
+            if hasattr(self.main_window, 'refresh_scheduler'):
+                self.main_window.refresh_scheduler.mark_dirty('file_type')
             
             log_in_arabic(logger, logging.INFO, f"تم تحديث نوع الملف: {file_type}")
             
         except Exception as e:
             log_in_arabic(logger, logging.ERROR, f"خطأ في تحديث نوع الملف: {str(e)}")
 
-    def new_tab(self, file_path=None):
+    @staticmethod
+    def editor_in(widget):
+        """الحصول على المحرر الموجود داخل حاوية التبويب أياً كان نوعه"""
+        if widget is None:
+            return None
+        return widget.findChild(ArabicTextEdit) or widget.findChild(ArabicPlainTextEdit)
+
+    def editor_at(self, index):
+        """الحصول على محرر التبويب المحدد"""
+        widget = self.widget(index)
+        if widget is None or isinstance(widget, TabPlaceholder):
+            return None
+        editor = self.tab_registry.editor_of(widget)
+        return editor if editor is not None else self.editor_in(widget)
+
+    def tab_index_of(self, editor):
+        """رقم تبويب المحرر، أو -1 إن لم يكن في تبويب"""
+        widget = self.tab_registry.widget_of(editor)
+        if widget is None:
+            widget = editor.get_container()
+        return self.indexOf(widget)
+
+    def editor_for_path(self, file_path):
+        """محرر الملف المفتوح، أو None إن لم يكن مفتوحاً أو كان تبويبه غير محمل"""
+        return self.tab_registry.editor_of(self.tab_registry.find(file_path))
+
+    def _is_plain_text_file(self, file_path, long_lines=False):
+        """التحقق مما إذا كان الملف يفتح في محرر النص العادي"""
+        if not file_path:
+            return False
+        extensions = PLAIN_TEXT_EXTENSIONS
+        if hasattr(self.main_window, 'settings_manager'):
+            extensions = self.main_window.settings_manager.get_setting(
+                'editor.plain_text_extensions', PLAIN_TEXT_EXTENSIONS
+            )
+        ext = os.path.splitext(file_path)[1].lower()
+        # الملفات الكبيرة وذات الأسطر الطويلة جداً تعرض دائماً في محرر النص العادي
+        # الذي لا يخطط إلا الكتل الظاهرة. أسطر الملف المحمل في الخلفية لا تعرف
+        # إلا أثناء تحميله بعد إنشاء محرره، فيعرض فيه كذلك
+        return (ext in extensions or long_lines or self._is_large_file(file_path)
+                or self._should_load_in_background(file_path))
+
+    def _long_line_limit(self):
+        """طول السطر (بالبايت) الذي يفعل بعده وضع حماية الأسطر الطويلة، 0 يعطله"""
+        if hasattr(self.main_window, 'settings_manager'):
+            return self.main_window.settings_manager.get_setting('editor.long_line_limit', 20000)
+        return 20000
+
+    def _read_text_file(self, file_path, encoding=None):
+        """قراءة الملف وفحص أسطره الطويلة أثناء القراءة نفسها"""
+        return read_text_file(file_path, encoding, long_line_limit=self._long_line_limit())
+
+    def _read_before_open(self, file_path, encoding=None):
+        """قراءة الملف الذي يحمل مباشرة قبل إنشاء محرره ليختار نوع المحرر من أسطره، وإلا None"""
+        if (not os.path.isfile(file_path) or self._is_large_file(file_path)
+                or self._should_load_in_background(file_path)):
+            return None
+        return self._read_text_file(file_path, encoding)
+
+    def _apply_long_line_guard(self, editor, file_path):
+        """تفعيل وضع حماية الأسطر الطويلة في المحرر قبل إدراج أسطره الطويلة"""
+        if editor.long_line_mode:
+            return
+        editor.enable_long_line_mode(self._long_line_limit())
+        log_in_arabic(logger, logging.INFO, f"تم فتح الملف في وضع حماية الأسطر الطويلة: {file_path}")
+
+    def _create_editor(self, plain_text):
+        """إنشاء محرر من النوع المناسب وتطبيق الخط عليه"""
+        editor_class = ArabicPlainTextEdit if plain_text else ArabicTextEdit
+        editor = editor_class(self.main_window)
+        
+        # تطبيق الخط مباشرة
+        try:
+            if hasattr(self.main_window, 'default_font'):
+                editor.apply_font_direct(self.main_window.default_font)
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في تطبيق الخط: {e}")
+        return editor
+
+    def new_tab(self, file_path=None, plain_text=None):
         """إنشاء تبويب جديد."""
         try:
-            editor = ArabicTextEdit(self.main_window)
-            
-            # تطبيق الخط مباشرة
-            try:
-                if hasattr(self.main_window, 'default_font'):
-                    editor.apply_font_direct(self.main_window.default_font)
-            except Exception as e:
-                log_in_arabic(logger, logging.ERROR, f"خطأ في تطبيق الخط: {e}")
+            if plain_text is None:
+                plain_text = self._is_plain_text_file(file_path)
+            editor = self._create_editor(plain_text)
             
             container = editor.get_container()
             
@@ -176,9 +291,7 @@ class TabManager(QTabWidget):
                         raise FileNotFoundError(f"الملف غير موجود: {file_path}")
                         
                     # قراءة الملف بشكل أكثر كفاءة
-                    with open(file_path, 'r', encoding='utf-8', buffering=16384) as f:
-                        content = f.read()
-                        editor.setPlainText(content)
+                    self._load_file_into_editor(editor, file_path)
                     
                     editor.file_path = file_path
                     self.file_paths[editor] = file_path
@@ -202,6 +315,7 @@ class TabManager(QTabWidget):
             # تجميع عمليات التبويب معاً
             try:
                 index = self.addTab(container, tab_name)
+                self.tab_registry.set_path(container, file_path, editor)
                 self.update_close_button_tooltip(index)
                 self.setCurrentIndex(index)
             except Exception as e:
@@ -210,7 +324,7 @@ class TabManager(QTabWidget):
 
             # تأجيل إعداد الإشارات حتى اكتمال التهيئة
             try:
-                editor.textChanged.connect(lambda: self.on_text_changed(editor))
+                self._watch_changes(editor)
                 editor.setFocus()
             except Exception as e:
                 log_in_arabic(logger, logging.ERROR, f"خطأ في إعداد الإشارات: {str(e)}")
@@ -222,24 +336,371 @@ class TabManager(QTabWidget):
             QMessageBox.critical(self, "خطأ", f"خطأ غير متوقع: {str(e)}")
             return None
 
+    def add_placeholder_tab(self, file_path, index=-1, **state):
+        """إضافة تبويب لملف دون إنشاء محرره، يبنى المحرر عند أول عرض للتبويب"""
+        placeholder = TabPlaceholder(file_path, **state)
+        index = self.insertTab(index, placeholder, placeholder.title)
+        self.tab_registry.set_path(placeholder, file_path)
+        self.setTabToolTip(index, file_path)
+        self.update_close_button_tooltip(index)
+        return placeholder
+
+    def _swap_tab_widget(self, index, widget, title):
+        """استبدال عنصر التبويب مع الحفاظ على موضعه والتبويب النشط"""
+        current = self.currentIndex()
+        old_widget = self.widget(index)
+        self._swapping_tab = True
+        try:
+            self.insertTab(index, widget, title)
+            self.removeTab(index + 1)
+            self.tab_registry.replace(old_widget, widget)
+            self.setCurrentIndex(current)
+        finally:
+            self._swapping_tab = False
+        self.update_close_button_tooltip(index)
+
+    def materialize_tab(self, index):
+        """إنشاء المحرر الفعلي لتبويب مؤقت وتحميل ملفه"""
+        placeholder = self.widget(index)
+        if not isinstance(placeholder, TabPlaceholder):
+            return self.editor_at(index)
+        try:
+            file_path = placeholder.file_path
+            plain_text = placeholder.plain_text
+            # إن لم يتغير الملف منذ أخذ البصمة فلا حاجة لإعادة فحص الترميز ونوع الملف
+            trusted = fingerprint_matches(file_path, placeholder.fingerprint)
+            encoding = placeholder.encoding
+            if placeholder.fingerprint and not trusted:
+                encoding = None
+            loaded = None
+            if plain_text is None:
+                loaded = self._read_before_open(file_path, encoding)
+                plain_text = self._is_plain_text_file(file_path, bool(loaded and loaded[3]))
+            editor = self._create_editor(plain_text)
+            self._swap_tab_widget(index, editor.get_container(), placeholder.title)
+            self.setTabToolTip(index, '')
+            placeholder.deleteLater()
+
+            self._watch_changes(editor)
+            self.set_file_path(editor, file_path)
+            self.setTabText(index, placeholder.title)
+            if os.path.exists(file_path):
+                self._load_file_into_editor(editor, file_path, encoding, loaded)
+            # النوع المحفوظ في الجلسة يغني عن تحديده من جديد بعد التحميل
+            if trusted and placeholder.file_type:
+                self.file_types[editor] = placeholder.file_type
+            editor.document().setModified(False)
+            self._register_opened_file(editor, file_path)
+            self._restore_view_state(editor, placeholder.cursor_position, placeholder.scroll_value)
+
+            log_in_arabic(logger, logging.INFO, f"تم إنشاء محرر التبويب عند عرضه: {file_path}")
+            return editor
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في إنشاء محرر التبويب: {e}")
+            QMessageBox.warning(self, "خطأ", f"خطأ في فتح الملف: {str(e)}")
+            return None
+
+    def _restore_view_state(self, editor, cursor_position, scroll_value):
+        """استعادة موضع المؤشر والتمرير بعد اكتمال تحميل الملف"""
+        loader = getattr(editor, 'loader', None)
+        if loader:
+            loader.finished.connect(
+                lambda *_: self._restore_view_state(editor, cursor_position, scroll_value)
+            )
+            return
+        cursor = editor.textCursor()
+        cursor.setPosition(min(cursor_position, editor.document().characterCount() - 1))
+        editor.setTextCursor(cursor)
+        editor.verticalScrollBar().setValue(scroll_value)
+
+    def dehydrate_tab(self, index):
+        """إعادة تبويب غير نشط وغير معدل إلى عنصر مؤقت وتحرير محرره"""
+        editor = self.editor_at(index)
+        file_path = self.file_paths.get(editor)
+        if (not editor or not file_path or index == self.currentIndex() or len(editor.document_views) > 1
+                or getattr(editor, 'loader', None) or editor.document().isModified()):
+            return False
+        try:
+            placeholder = TabPlaceholder(file_path, **self._editor_state(index, editor))
+            self._unregister_file(editor, file_path)
+            self.file_paths.pop(editor, None)
+            self.file_types.pop(editor, None)
+            large_file = getattr(editor, 'large_file', None)
+            if large_file:
+                large_file.buffer.close()
+
+            self._swap_tab_widget(index, placeholder, placeholder.title)
+            self.setTabToolTip(index, file_path)
+            editor.get_container().deleteLater()
+            log_in_arabic(logger, logging.INFO, f"تم تحرير محرر التبويب غير المستخدم: {file_path}")
+            return True
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في تحرير محرر التبويب: {e}")
+            return False
+
+    def _editor_state(self, index, editor):
+        """بيانات تبويب محرر تكفي لإعادة إنشائه لاحقاً"""
+        file_path = self.file_paths.get(editor)
+        fingerprint = None
+        if file_path and not editor.document().isModified() and os.path.exists(file_path):
+            fingerprint = file_fingerprint(file_path)
+        return {
+            'title': self.tabText(index).rstrip('*'),
+            'cursor_position': editor.textCursor().position(),
+            'scroll_value': editor.verticalScrollBar().value(),
+            'plain_text': isinstance(editor, ArabicPlainTextEdit),
+            'encoding': editor.encoding,
+            'line_ending': editor.line_ending,
+            'file_type': self.file_types.get(editor),
+            'fingerprint': fingerprint
+        }
+
+    def session_state(self):
+        """حالة التبويبات المفتوحة لحفظها في الجلسة"""
+        tabs = []
+        current = 0
+        for index in range(self.count()):
+            widget = self.widget(index)
+            if isinstance(widget, TabPlaceholder):
+                state = widget.state()
+            else:
+                editor = self.editor_in(widget)
+                file_path = self.file_paths.get(editor)
+                # المستندات غير المحفوظة والتي ما زالت تحمل لا تستعاد
+                if not editor or not file_path or getattr(editor, 'loader', None):
+                    continue
+                state = self._editor_state(index, editor)
+                state['file_path'] = file_path
+            if not os.path.exists(state['file_path']):
+                continue
+            if index == self.currentIndex():
+                current = len(tabs)
+            tabs.append(state)
+        return {'current': current, 'tabs': tabs}
+
+    def restore_tabs(self, tabs, current=0):
+        """إضافة تبويبات الجلسة كعناصر مؤقتة وتحميل التبويب الحالي منها فقط"""
+        first = self.count()
+        self._swapping_tab = True
+        try:
+            for state in tabs:
+                file_path = state.get('file_path')
+                if not file_path or not os.path.exists(file_path) or self._find_file_tab(file_path) >= 0:
+                    continue
+                self.add_placeholder_tab(
+                    file_path, **{key: state[key] for key in TabPlaceholder.STATE_KEYS if key in state}
+                )
+        finally:
+            self._swapping_tab = False
+
+        restored = self.count() - first
+        if restored:
+            index = first + min(max(current, 0), restored - 1)
+            if self.currentIndex() == index:
+                self.tab_changed(index)
+            else:
+                self.setCurrentIndex(index)
+        return restored
+
+    def _dehydrate_after_minutes(self):
+        """مدة عدم الاستخدام قبل تحرير محرر التبويب، و0 تعطل التحرير"""
+        if hasattr(self.main_window, 'settings_manager'):
+            return self.main_window.settings_manager.get_setting('tabs.dehydrate_after_minutes', 0) or 0
+        return 0
+
+    def dehydrate_idle_tabs(self):
+        """تحرير محررات التبويبات التي لم تعرض منذ المدة المحددة في الإعدادات"""
+        minutes = self._dehydrate_after_minutes()
+        if minutes <= 0:
+            shared_timer_wheel().cancel(self, 'dehydrate_idle_tabs')
+            return
+        now = time.monotonic()
+        for index in range(self.count()):
+            widget = self.widget(index)
+            if index == self.currentIndex() or isinstance(widget, TabPlaceholder):
+                continue
+            last_used = getattr(widget, 'last_used', None)
+            if last_used is None:
+                widget.last_used = now
+            elif now - last_used >= minutes * 60:
+                self.dehydrate_tab(index)
+
+    def _is_large_file(self, file_path):
+        """التحقق مما إذا كان الملف يتجاوز حد وضع الملفات الكبيرة"""
+        try:
+            return os.path.getsize(file_path) >= self._setting_mb('editor.large_file_threshold_mb', 64)
+        except OSError:
+            return False
+
+    def _setting_mb(self, key, default):
+        """قراءة حد بالميجابايت من الإعدادات وتحويله إلى بايت"""
+        value = default
+        if hasattr(self.main_window, 'settings_manager'):
+            value = self.main_window.settings_manager.get_setting(key, default)
+        return value * 1024 * 1024
+
+    def _should_load_in_background(self, file_path):
+        """التحقق مما إذا كان حجم الملف يستدعي التحميل في الخلفية"""
+        try:
+            return os.path.getsize(file_path) >= self._setting_mb('editor.background_load_threshold_mb', 2)
+        except OSError:
+            return False
+
+    def _load_file_into_editor(self, editor, file_path, encoding=None, loaded=None):
+        """تحميل محتوى الملف في المحرر مع استخدام وضع الملفات الكبيرة أو التحميل في الخلفية عند الحاجة
+
+        loaded نتيجة read_text_file إن قرئ الملف قبل إنشاء المحرر.
+        """
+        # المحتوى الجديد قد يغير نوع الملف
+        self.file_types.pop(editor, None)
+        large_file_format = None
+        if self._is_large_file(file_path):
+            large_file_format = detect_file_format(file_path)
+            if encoding:
+                large_file_format = (encoding, large_file_format[1])
+
+        if large_file_format and LargeFileBuffer.supports(large_file_format[0]):
+            # عرض نافذة من الأسطر فقط بدلاً من قراءة الملف كاملاً
+            encoding, line_ending = large_file_format
+            LargeFileView(editor, LargeFileBuffer(file_path, encoding, line_ending))
+            log_in_arabic(logger, logging.INFO, f"تم فتح الملف في وضع الملفات الكبيرة: {file_path}")
+            self._finish_loading(editor, encoding, line_ending)
+            return
+
+        if self._should_load_in_background(file_path):
+            self._start_background_load(editor, file_path, encoding)
+            return
+        else:
+            text, encoding, line_ending, long_lines = loaded or self._read_text_file(file_path, encoding)
+            if long_lines:
+                self._apply_long_line_guard(editor, file_path)
+            editor.setPlainText(text)
+
+        self._finish_loading(editor, encoding, line_ending)
+
+    def _finish_loading(self, editor, encoding, line_ending):
+        """حفظ الترميز ونهاية الأسطر في المحرر نفسه بعد اكتمال التحميل"""
+        editor.encoding = encoding
+        editor.line_ending = line_ending
+        if hasattr(self.main_window, 'statistics_manager'):
+            self.main_window.statistics_manager.show_file_format(editor)
+        if hasattr(self.main_window, 'refresh_scheduler'):
+            self.main_window.refresh_scheduler.mark_dirty('statistics')
+
+    def _start_background_load(self, editor, file_path, encoding=None):
+        """بدء تحميل الملف في الخلفية مع مؤشر تقدم وزر إلغاء على التبويب"""
+        loader = BackgroundFileLoader(editor, file_path, encoding, self._long_line_limit())
+        # خيط القراءة يبلغ عن الأسطر الطويلة قبل إدراجها
+        loader.long_lines_found.connect(lambda: self._apply_long_line_guard(editor, file_path))
+        loader.indicator = TabLoadIndicator()
+        loader.indicator.cancel_requested.connect(lambda: self.cancel_loading(editor))
+        loader.progress.connect(lambda percent: self._update_load_indicator(editor, percent))
+        loader.finished.connect(
+            lambda enc, ending: self._on_background_load_finished(editor, loader, enc, ending)
+        )
+        loader.failed.connect(lambda message: self._on_background_load_failed(editor, loader, message))
+        loader.start()
+
+    def _update_load_indicator(self, editor, percent):
+        """تحديث مؤشر التقدم ووضعه على التبويب إن لم يكن موجوداً"""
+        loader = getattr(editor, 'loader', None)
+        if not loader:
+            return
+        loader.indicator.set_progress(percent)
+        index = self.indexOf(editor.get_container())
+        if index >= 0 and self.tabBar().tabButton(index, QTabBar.LeftSide) is not loader.indicator:
+            self.tabBar().setTabButton(index, QTabBar.LeftSide, loader.indicator)
+
+    def _remove_load_indicator(self, editor, loader):
+        """إزالة مؤشر التقدم من التبويب"""
+        index = self.indexOf(editor.get_container())
+        if index >= 0 and self.tabBar().tabButton(index, QTabBar.LeftSide) is loader.indicator:
+            self.tabBar().setTabButton(index, QTabBar.LeftSide, None)
+        loader.indicator.deleteLater()
+
+    def _on_background_load_finished(self, editor, loader, encoding, line_ending):
+        """إكمال إعداد المحرر بعد انتهاء التحميل في الخلفية"""
+        self._remove_load_indicator(editor, loader)
+        self._finish_loading(editor, encoding, line_ending)
+        editor.document().setModified(False)
+        self.update_file_type(editor, self.file_paths.get(editor))
+        self.update_tab_title(editor)
+        # تمييز الأقواس كان متوقفاً أثناء التحميل
+        editor.highlight_matching_bracket()
+
+    def _on_background_load_failed(self, editor, loader, message):
+        """عرض خطأ التحميل في الخلفية"""
+        self._remove_load_indicator(editor, loader)
+        QMessageBox.warning(self, "خطأ", f"خطأ في فتح الملف: {message}")
+
+    def cancel_loading(self, editor):
+        """إلغاء تحميل الملف وإغلاق تبويبه دون حفظ المحتوى الجزئي"""
+        loader = getattr(editor, 'loader', None)
+        if not loader:
+            return
+        loader.cancel()
+        self._remove_load_indicator(editor, loader)
+        index = self.indexOf(editor.get_container())
+        if index >= 0:
+            self.file_paths.pop(editor, None)
+            self.tab_registry.remove(editor.get_container())
+            self.removeTab(index)
+            editor.get_container().deleteLater()
+
+    def _watch_changes(self, editor):
+        """الاشتراك في تعديلات مستند المحرر: علامة التعديل فوراً ونوع الملف بعد توقف الكتابة"""
+        editor.change_bus.subscribe(editor, 'tab_title', lambda delta: self.on_text_changed(editor))
+        editor.change_bus.subscribe(editor, 'tab_file_type', lambda deltas: self.on_text_settled(editor),
+                                    DEBOUNCED, FILE_TYPE_UPDATE_DELAY)
+
+    def on_text_settled(self, editor):
+        """تحديث نوع الملف بعد توقف الكتابة"""
+        # أثناء التحميل في الخلفية تحدث البيانات مرة واحدة عند الاكتمال
+        if getattr(editor, 'loader', None):
+            return
+        # الإحصائيات ونوع الملف تحسب مرة واحدة لكل مستند مهما تعددت عروضه
+        if editor.document_owner is editor:
+            self.editor_text_changed.emit()
+            self.update_file_type(editor, self.file_paths.get(editor))
+
     def on_text_changed(self, editor):
         """معالجة تغيير النص في المحرر"""
-        self.editor_text_changed.emit()
-        
-        # تحديث نوع الملف عند تغيير المحتوى
-        self.update_file_type(editor, self.file_paths.get(editor))
-        
-        # إضافة علامة * للملفات غير المحفوظة
-        if editor.document().isModified():
-            current_index = self.indexOf(editor.parent())
-            current_text = self.tabText(current_index)
-            if not current_text.endswith('*'):
-                self.setTabText(current_index, current_text + '*')
+        if getattr(editor, 'loader', None):
+            return
+        # علامة * للملفات غير المحفوظة تحدث مرة واحدة في الإطار التالي
+        self._dirty_titles[editor] = None
+        if hasattr(self.main_window, 'refresh_scheduler'):
+            self.main_window.refresh_scheduler.mark_dirty('tab_titles')
+        else:
+            self._refresh_tab_titles()
+
+    def _refresh_tab_titles(self):
+        """تحديث عناوين تبويبات المحررات التي تغيرت منذ آخر تحديث"""
+        editors, self._dirty_titles = self._dirty_titles, {}
+        for editor in editors:
+            try:
+                self.update_tab_title(editor)
+            except RuntimeError:
+                # أغلق التبويب قبل التحديث
+                pass
 
     def tab_changed(self, index):
         """معالجة تغيير التبويب النشط"""
+        if self._swapping_tab:
+            return
+        # تسجيل وقت آخر استخدام للتبويب السابق والحالي
+        now = time.monotonic()
+        previous = getattr(self, '_current_tab_widget', None)
+        if previous is not None:
+            previous.last_used = now
+        self._current_tab_widget = self.widget(index) if index >= 0 else None
         if index >= 0:
-            editor = self.widget(index).findChild(ArabicTextEdit)
+            if isinstance(self.widget(index), TabPlaceholder):
+                # المحرر يبنى عند أول عرض للتبويب
+                self.materialize_tab(index)
+                self._current_tab_widget = self.widget(index)
+            self._current_tab_widget.last_used = now
+            editor = self.editor_at(index)
             if editor:
                 editor.setFocus()
                 # تحديث نوع الملف للتبويب الجديد
@@ -256,7 +717,7 @@ class TabManager(QTabWidget):
         """تعيين مسار الملف بشكل أسرع"""
         try:
             if isinstance(editor_or_index, int):
-                editor = self.widget(editor_or_index).findChild(ArabicTextEdit)
+                editor = self.editor_at(editor_or_index)
             else:
                 editor = editor_or_index
             
@@ -265,14 +726,14 @@ class TabManager(QTabWidget):
             
             self.file_paths[editor] = file_path
             editor.file_path = file_path
+            # المسار الجديد قد يغير نوع الملف
+            self.file_types.pop(editor, None)
+            self.tab_registry.set_path(editor.get_container(), file_path, editor)
             
-            # تحسين البحث عن التبويب
             try:
-                for i in range(self.count()):
-                    widget = self.widget(i)
-                    if widget and widget.findChild(ArabicTextEdit) == editor:
-                        self.setTabText(i, os.path.basename(file_path))
-                        break
+                index = self.tab_index_of(editor)
+                if index >= 0:
+                    self.setTabText(index, os.path.basename(file_path))
             except Exception as e:
                 log_in_arabic(logger, logging.ERROR, f"خطأ في تحديث عنوان التبويب: {str(e)}")
             
@@ -283,32 +744,19 @@ class TabManager(QTabWidget):
         """فتح ملف في تبويب جديد"""
         try:
             # التحقق من وجود الملف في التبويبات المفتوحة
-            for i in range(self.count()):
-                editor = self.widget(i).findChild(ArabicTextEdit)
-                if editor and self.file_paths.get(editor) == file_path:
-                    # الانتقال إلى التبويب الموجود
-                    self.setCurrentIndex(i)
-                    editor.setFocus()
-                    return editor
-
-            editor = self.new_tab()
+            editor = self._focus_open_file(file_path)
             if editor:
-                if os.path.exists(file_path):
-                    with open(file_path, 'r', encoding='utf-8') as file:
-                        content = file.read()
-                        editor.setPlainText(content)
-                
-                # تحديث مسار الملف وإعداد المراقبة
+                return editor
+
+            loaded = self._read_before_open(file_path)
+            editor = self.new_tab(plain_text=self._is_plain_text_file(file_path, bool(loaded and loaded[3])))
+            if editor:
+                # تعيين المسار أولاً ليظهر اسم الملف على التبويب أثناء التحميل
                 self.set_file_path(editor, file_path)
+                if os.path.exists(file_path):
+                    self._load_file_into_editor(editor, file_path, loaded=loaded)
                 editor.document().setModified(False)
-                
-                # إضافة الملف للمراقبة
-                if hasattr(self.main_window, 'file_watcher'):
-                    self.main_window.file_watcher.add_file(file_path, editor)
-                
-                # تفعيل الحفظ التلقائي
-                if hasattr(self.main_window, 'auto_saver'):
-                    self.main_window.auto_saver.add_file_to_autosave(file_path, editor)
+                self._register_opened_file(editor, file_path)
                 
                 log_in_arabic(logger, logging.INFO, f"تم فتح الملف بنجاح: {file_path}")
                 return editor
@@ -323,6 +771,134 @@ class TabManager(QTabWidget):
             )
             return None
         
+    def _find_file_tab(self, file_path):
+        """رقم تبويب الملف إن كان مفتوحاً، محرراً كان أو عنصراً مؤقتاً، وإلا -1"""
+        widget = self.tab_registry.find(file_path)
+        return self.indexOf(widget) if widget is not None else -1
+
+    def _focus_open_file(self, file_path):
+        """الانتقال إلى تبويب الملف إن كان مفتوحاً مسبقاً"""
+        index = self._find_file_tab(file_path)
+        if index < 0:
+            return None
+        # الانتقال إلى التبويب المؤقت ينشئ محرره
+        self.setCurrentIndex(index)
+        editor = self.editor_at(index)
+        if editor:
+            editor.setFocus()
+        return editor
+
+    def _register_opened_file(self, editor, file_path, content=None):
+        """إضافة الملف المفتوح للمراقبة والحفظ التلقائي"""
+        # المراقب يقرأ الملف كاملاً فلا يناسب الملفات الكبيرة
+        if hasattr(self.main_window, 'file_watcher') and not getattr(editor, 'large_file', None):
+            if getattr(editor, 'loader', None):
+                # النص المحمل في نسخة المحرر، فلا يعاد قراءة الملف وفك ترميزه
+                editor.loader.finished.connect(
+                    lambda *_: self.main_window.file_watcher.add_file(file_path, editor, str(editor.snapshot()))
+                )
+            else:
+                self.main_window.file_watcher.add_file(file_path, editor, content)
+
+        # تفعيل الحفظ التلقائي
+        if hasattr(self.main_window, 'auto_saver'):
+            self.main_window.auto_saver.add_file_to_autosave(file_path, editor)
+
+    def move_to_saved_path(self, editor, file_path):
+        """نقل التبويب ومراقبته وحفظه التلقائي إلى المسار الذي حفظ فيه باسم جديد"""
+        old_path = self.file_paths.get(editor)
+        if old_path == file_path:
+            return
+        self._unregister_file(editor, old_path)
+        self.set_file_path(editor, file_path)
+        # نص الملف بعد الحفظ هو نص المحرر فلا يعاد قراءته
+        self._register_opened_file(editor, file_path, str(editor.snapshot()))
+        log_in_arabic(logger, logging.INFO, f"تم نقل التبويب إلى الملف المحفوظ: {file_path}")
+
+    def _unregister_file(self, editor, file_path):
+        """إيقاف مراقبة الملف وحفظه التلقائي"""
+        try:
+            # إزالة المراقبة بشكل آمن
+            if file_path and hasattr(self.main_window, 'file_watcher'):
+                self.main_window.file_watcher.remove_file(file_path)
+            if hasattr(self.main_window, 'auto_saver'):
+                self.main_window.auto_saver.remove_file_from_autosave(editor)
+        except Exception:
+            pass
+
+    def _expand_paths(self, paths):
+        """توسيع المجلدات إلى ملفاتها المباشرة مع الحفاظ على الترتيب"""
+        expanded = []
+        for path in paths:
+            if os.path.isdir(path):
+                expanded.extend(sorted(
+                    entry.path for entry in os.scandir(path)
+                    if entry.is_file() and not entry.name.startswith('.')
+                ))
+            elif os.path.isfile(path):
+                expanded.append(path)
+        return expanded
+
+    def open_files(self, file_paths):
+        """فتح مجموعة ملفات أو مجلدات دفعة واحدة بقراءتها بالتوازي"""
+        batch = []
+        seen = set()
+        for file_path in self._expand_paths(file_paths):
+            # الملف نفسه قد يصل بأكثر من مسار (رابط رمزي أو حالة أحرف مختلفة)
+            key = canonical_path(file_path)
+            if key in seen or self._focus_open_file(file_path):
+                continue
+            seen.add(key)
+            if self._is_large_file(file_path) or self._should_load_in_background(file_path):
+                # الملفات الكبيرة لها مسار تحميل خاص بها
+                self.open_file(file_path)
+            else:
+                batch.append(file_path)
+        if not batch:
+            return
+
+        reader = BatchFileReader(batch, self, long_line_limit=self._long_line_limit())
+        progress = QProgressDialog("جاري فتح الملفات...", "إلغاء", 0, len(batch), self)
+        progress.setWindowTitle("فتح الملفات")
+        progress.setWindowModality(Qt.NonModal)
+        progress.setMinimumDuration(300)
+        failures = []
+
+        reader.file_ready.connect(self._open_loaded_file)
+        reader.file_failed.connect(lambda file_path, message: failures.append((file_path, message)))
+        reader.progress.connect(lambda done, total: progress.setValue(done))
+        progress.canceled.connect(reader.cancel)
+        reader.finished.connect(lambda: self._on_batch_finished(reader, progress, failures))
+        reader.start()
+
+    def _open_loaded_file(self, file_path, text, encoding, line_ending, long_lines):
+        """إنشاء تبويب لملف قرئ في الخلفية"""
+        try:
+            editor = self.new_tab(plain_text=self._is_plain_text_file(file_path, long_lines))
+            if not editor:
+                return
+            self.set_file_path(editor, file_path)
+            if long_lines:
+                self._apply_long_line_guard(editor, file_path)
+            editor.setPlainText(text)
+            self._finish_loading(editor, encoding, line_ending)
+            editor.document().setModified(False)
+            self._register_opened_file(editor, file_path, text)
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في فتح الملف: {e}")
+
+    def _on_batch_finished(self, reader, progress, failures):
+        """إغلاق مؤشر التقدم وعرض الملفات التي تعذر فتحها مرة واحدة"""
+        progress.close()
+        progress.deleteLater()
+        reader.deleteLater()
+        if failures:
+            details = "\n".join(f"{os.path.basename(path)}: {message}" for path, message in failures[:10])
+            if len(failures) > 10:
+                details += f"\n... و{len(failures) - 10} ملفات أخرى"
+            QMessageBox.warning(self, "خطأ", f"تعذر فتح بعض الملفات:\n{details}")
+        log_in_arabic(logger, logging.INFO, f"اكتمل فتح الملفات، تعذر فتح {len(failures)} منها")
+
     def close_tab(self, index):
         """إغلاق التبويب بشكل أسرع"""
         try:
@@ -331,11 +907,40 @@ class TabManager(QTabWidget):
                 log_in_arabic(logger, logging.WARNING, f"محاولة إغلاق تبويب غير موجود: {index}")
                 return
             
-            editor = widget.findChild(ArabicTextEdit)
+            # التبويب المؤقت لا يحمل محرراً ولا تغييرات
+            if isinstance(widget, TabPlaceholder):
+                self.closed_tabs.push({
+                    'text': None,
+                    'file_path': widget.file_path,
+                    'tab_name': widget.title,
+                    'plain_text': widget.plain_text,
+                    'cursor_position': widget.cursor_position
+                }, modified=False)
+                self.tab_registry.remove(widget)
+                self.removeTab(index)
+                widget.deleteLater()
+                log_in_arabic(logger, logging.INFO, f"تم إغلاق التبويب بنجاح: {widget.title}")
+                return
+            
+            editor = self.editor_at(index)
             if not editor:
                 log_in_arabic(logger, logging.WARNING, "لم يتم العثور على المحرر في التبويب")
                 return
 
+            # إيقاف التحميل الجاري؛ المحتوى الجزئي لا يحفظ ولا يحتفظ به
+            loading = bool(getattr(editor, 'loader', None))
+            if loading:
+                loader = editor.loader
+                loader.cancel()
+                self._remove_load_indicator(editor, loader)
+                editor.document().setModified(False)
+
+            # المستند المعروض في تبويب آخر يبقى مفتوحاً فيه
+            others = self._views_outside_tab(widget, editor)
+            if others:
+                self._close_view_tab(index, widget, editor, others)
+                return
+
             try:
                 # التحقق من التغييرات غير المحفوظة
                 if editor.document().isModified():
@@ -352,7 +957,11 @@ class TabManager(QTabWidget):
                     
                     clicked_button = msg_box.clickedButton()
                     
-                    if clicked_button == save_button and not self.main_window.save_file():
+                    if clicked_button == save_button:
+                        # الحفظ يكتمل في الخلفية فيغلق التبويب عند نجاحه ويبقى مفتوحاً إن فشل
+                        self._closing_after_save.add(editor)
+                        if not self.main_window.save_tab(editor):
+                            self._closing_after_save.discard(editor)
                         return
                     elif clicked_button == cancel_button:
                         return
@@ -362,36 +971,31 @@ class TabManager(QTabWidget):
             try:
                 # تجميع معلومات التبويب مرة واحدة
                 file_path = self.file_paths.get(editor)
+                large_file = getattr(editor, 'large_file', None)
                 tab_info = {
-                    'text': editor.toPlainText(),
+                    # الملفات الكبيرة يعاد فتحها من القرص بدلاً من الاحتفاظ بنصها
+                    'text': None if large_file or loading else editor.snapshot(),
                     'file_path': file_path,
                     'tab_name': self.tabText(index),
+                    'plain_text': isinstance(editor, ArabicPlainTextEdit),
                     'cursor_position': editor.textCursor().position()
                 }
                 
-                # إدارة التبويبات المغلقة
-                self.closed_tabs.append(tab_info)
-                if len(self.closed_tabs) > self.max_closed_tabs:
-                    self.closed_tabs.pop(0)
+                # إدارة التبويبات المغلقة (الملف غير المعدل يعاد فتحه من القرص)
+                self.closed_tabs.push(tab_info, modified=editor.document().isModified())
             except Exception as e:
                 log_in_arabic(logger, logging.ERROR, f"خطأ في حفظ معلومات التبويب: {str(e)}")
             
-            try:
-                # إزالة المراقبة بشكل آمن
-                if file_path and hasattr(self.main_window, 'file_watcher'):
-                    watcher = self.main_window.file_watcher
-                    if hasattr(watcher, 'remove_file'):
-                        watcher.remove_file(file_path)
-                    elif hasattr(watcher, 'removePath'):
-                        watcher.removePath(file_path)
-            except Exception:
-                pass
+            self._unregister_file(editor, file_path)
 
             try:
                 # تنظيف الموارد
                 if editor in self.file_paths:
                     del self.file_paths[editor]
+                if large_file:
+                    large_file.buffer.close()
                 
+                self.tab_registry.remove(widget)
                 self.removeTab(index)
             except Exception as e:
                 log_in_arabic(logger, logging.ERROR, f"خطأ في إزالة التبويب: {str(e)}")
@@ -400,16 +1004,30 @@ class TabManager(QTabWidget):
         except Exception as e:
             log_in_arabic(logger, logging.ERROR, f"خطأ غير متوقع في إغلاق التبويب: {e}")
         
+    def on_save_finished(self, editor, success):
+        """إكمال إغلاق التبويب الذي انتظر حفظه، أو إلغاؤه إن فشل الحفظ"""
+        if editor not in self._closing_after_save:
+            return
+        self._closing_after_save.discard(editor)
+        if success:
+            index = self.tab_index_of(editor)
+            if index >= 0:
+                self.close_tab(index)
+        
     def restore_last_closed_tab(self):
         """استعادة آخر تبويب مغلق"""
         if not self.closed_tabs:
             return
             
         tab_info = self.closed_tabs.pop()
-        editor = self.new_tab(tab_info['file_path'])
+        editor = self.new_tab(tab_info['file_path'], plain_text=tab_info.get('plain_text'))
         
         if editor:
-            editor.setPlainText(tab_info['text'])
+            if tab_info['text'] is not None:
+                editor.setPlainText(tab_info['text'])
+            
+            # النص المستعاد يبقى معدلاً إن لم يكن محفوظاً عند الإغلاق
+            editor.document().setModified(tab_info.get('modified', False))
             
             # استعادة موضع المؤشر
             cursor = editor.textCursor()
@@ -458,25 +1076,11 @@ class TabManager(QTabWidget):
                 # نقل التبويب إلى الموقع الجديد
                 self.moveTab(source_index, target_pos)
                 
-        # التعامل مع إفلات الملفات
+        # التعامل مع إفلات الملفات والمجلدات
         elif mime_data.hasUrls():
-            for url in mime_data.urls():
-                file_path = url.toLocalFile()
-                if file_path:
-                    # التحقق من نوع الملف
-                    if self._is_text_file(file_path):
-                        # فتح الملف في تبويب جديد
-                        editor = self.main_window.tab_manager.open_file(file_path)
-                        if editor:
-                            # تعيين مسار الملف مباشرة
-                            editor.file_path = file_path
-                    else:
-                        from PyQt5.QtWidgets import QMessageBox
-                        QMessageBox.warning(
-                            self,
-                            "خطأ",
-                            "يمكن فتح الملفات النصية فقط"
-                        )
+            file_paths = [url.toLocalFile() for url in mime_data.urls() if url.toLocalFile()]
+            # الفحص والقراءة تتم بالتوازي في الخلفية
+            self.open_files(file_paths)
                         
         # التعامل مع إفلات النص
         elif mime_data.hasText():
@@ -505,7 +1109,7 @@ class TabManager(QTabWidget):
             tab_index = tab_bar.tabAt(event.pos())
             
             if tab_index >= 0:
-                editor = self.widget(tab_index).findChild(ArabicTextEdit)
+                editor = self.editor_at(tab_index)
                 file_path = self.file_paths.get(editor)
                 
                 context_menu = QMenu(self)
@@ -518,6 +1122,9 @@ class TabManager(QTabWidget):
                     # إجراءات التبويب
                     rename_action = QAction("إعادة تسمية", self)
                     duplicate_action = QAction("تكرار التبويب", self)
+                    split_action = QAction("عرض جانبي", self)
+                    split_action.setCheckable(True)
+                    split_action.setChecked(getattr(self.widget(tab_index), 'split_view', None) is not None)
                     open_location_action = QAction("فتح موقع الملف", self)
                     copy_path_action = QAction("نسخ مسار الملف", self)
                 
@@ -543,6 +1150,7 @@ class TabManager(QTabWidget):
                     reload_action.triggered.connect(lambda: self.reload_tab(tab_index))
                     rename_action.triggered.connect(lambda: self.rename_tab(tab_index))
                     duplicate_action.triggered.connect(lambda: self.duplicate_tab(tab_index))
+                    split_action.triggered.connect(lambda: self.toggle_split_view(tab_index))
                     open_location_action.triggered.connect(lambda: self.open_file_location(file_path))
                     copy_path_action.triggered.connect(lambda: self.copy_file_path(file_path))
                     close_action.triggered.connect(lambda: self.close_tab(tab_index))
@@ -562,6 +1170,7 @@ class TabManager(QTabWidget):
                     context_menu.addSeparator()
                     context_menu.addAction(rename_action)
                     context_menu.addAction(duplicate_action)
+                    context_menu.addAction(split_action)
                     
                     if file_path:
                         context_menu.addAction(open_location_action)
@@ -594,7 +1203,7 @@ class TabManager(QTabWidget):
         )
         
         if ok and new_name:
-            editor = self.widget(index).findChild(ArabicTextEdit)
+            editor = self.editor_at(index)
             if editor and editor in self.file_paths and self.file_paths[editor]:
                 old_path = self.file_paths[editor]
                 new_path = os.path.join(os.path.dirname(old_path), new_name)
@@ -613,8 +1222,10 @@ class TabManager(QTabWidget):
                     # إعادة تسمية الملف الفعلي
                     os.rename(old_path, new_path)
                     
-                    # تحديث مسار الملف في القاموس
-                    self.file_paths[editor] = new_path
+                    # تحديث المسار في القاموس والفهرس ونقل المراقبة للمسار الجديد
+                    self._unregister_file(editor, old_path)
+                    self.set_file_path(editor, new_path)
+                    self._register_opened_file(editor, new_path)
                     
                     # تحديث اسم التبويب
                     self.setTabText(index, new_name)
@@ -681,40 +1292,93 @@ class TabManager(QTabWidget):
         if close_button:
             close_button.setToolTip("إغلاق التبويب")
     
+    def _create_view(self, editor):
+        """إنشاء محرر يعرض مستند محرر آخر دون نسخ نصه"""
+        if getattr(editor, 'large_file', None) or getattr(editor, 'loader', None):
+            QMessageBox.information(self, "تنبيه", "لا يمكن فتح عرض آخر لملف كبير أو قيد التحميل")
+            return None
+        view = self._create_editor(isinstance(editor, ArabicPlainTextEdit))
+        view.attach_to(editor)
+        return view
+
     def duplicate_tab(self, index):
-        """تكرار التبويب الحالي"""
-        editor = self.widget(index).findChild(ArabicTextEdit)
-        if editor:
-            # إنشاء تبويب جديد
-            new_editor = self.new_tab()
-            if new_editor:
-                # نسخ المحتوى
-                new_editor.setPlainText(editor.toPlainText())
-                
-                # نسخ سار الملف إذا كان موجوداً
-                file_path = self.file_paths.get(editor)
-                if file_path:
-                    new_name = f"نسخة من {os.path.basename(file_path)}"
-                    log_in_arabic(logger, logging.INFO, f"تم إنشاء تبويب جديد: {new_name}")
-                else:
-                    new_name = f"نسخة من {self.tabText(index)}"
-                    log_in_arabic(logger, logging.INFO, f"تم إنشاء تبويب جديد: {new_name}")
-                
-                # تحديث عنوان التبويب الجديد
-                current_index = self.currentIndex()
-                self.setTabText(current_index, new_name)
-                log_in_arabic(logger, logging.INFO, f"تم تحديث عنوان التبويب: {new_name}")
+        """فتح عرض ثانٍ لمستند التبويب في تبويب جديد، يتشاركان النص والتعديلات"""
+        editor = self.editor_at(index)
+        if not editor:
+            return
+        view = self._create_view(editor)
+        if not view:
+            return
+        container = view.get_container()
+        title = self.tabText(index).rstrip('*')
+        new_index = self.insertTab(index + 1, container, title)
+        # العرض لا يسجل بمسار الملف، فالبحث عن الملف يعيد تبويبه الأصلي
+        self.tab_registry.set_path(container, None, view)
+        self.file_paths[view] = None
+        self.setTabToolTip(new_index, editor.file_path or '')
+        self.update_close_button_tooltip(new_index)
+        self._watch_changes(view)
+        self.setCurrentIndex(new_index)
+        self.update_tab_title(view)
+        log_in_arabic(logger, logging.INFO, f"تم فتح عرض ثانٍ للتبويب: {title}")
+
+    def toggle_split_view(self, index):
+        """عرض مستند التبويب في محررين متجاورين، أو إلغاء العرض الجانبي"""
+        widget = self.widget(index)
+        editor = self.editor_at(index)
+        if not editor:
+            return
+        split_view = getattr(widget, 'split_view', None)
+        if split_view is not None:
+            widget.split_view = None
+            split_view.release_document()
+            split_view.get_container().deleteLater()
+            editor.setFocus()
+            return
+        view = self._create_view(editor)
+        if not view:
+            return
+        editor.container_layout.addWidget(view.get_container())
+        widget.split_view = view
+        view.setFocus()
+
+    def _views_outside_tab(self, widget, editor):
+        """محررات مستند التبويب الموجودة في تبويبات أخرى"""
+        split_view = getattr(widget, 'split_view', None)
+        return [view for view in editor.document_views if view is not editor and view is not split_view]
+
+    def _close_view_tab(self, index, widget, editor, others):
+        """إغلاق تبويب مستند ما زال معروضاً في تبويب آخر دون سؤال الحفظ"""
+        file_path = self.file_paths.pop(editor, None)
+        split_view = getattr(widget, 'split_view', None)
+        if split_view is not None:
+            split_view.release_document()
+        editor.release_document()
+        if file_path:
+            # نقل الملف ومراقبته إلى تبويب آخر يعرض المستند نفسه
+            target = next((view for view in others if self.tab_registry.widget_of(view) is not None), None)
+            self._unregister_file(editor, file_path)
+            if target is not None:
+                self.file_paths[target] = file_path
+                self.tab_registry.set_path(self.tab_registry.widget_of(target), file_path, target)
+                self._register_opened_file(target, file_path)
+        self.tab_registry.remove(widget)
+        self.removeTab(index)
+        widget.deleteLater()
 
     def reload_tab(self, index):
         """إعادة تحميل محتوى الملف من القرص"""
-        editor = self.widget(index).findChild(ArabicTextEdit)
+        editor = self.editor_at(index)
         file_path = self.file_paths.get(editor)
         
         if editor and file_path and os.path.exists(file_path):
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    editor.setPlainText(content)
+                large_file = getattr(editor, 'large_file', None)
+                self.file_types.pop(editor, None)
+                if large_file:
+                    large_file.reload()
+                else:
+                    self._load_file_into_editor(editor, file_path, editor.encoding)
                 editor.document().setModified(False)
                 log_in_arabic(logger, logging.INFO, f"تم إعادة تحميل الملف: {file_path}")
 
@@ -730,7 +1394,7 @@ class TabManager(QTabWidget):
         try:
             current_widget = self.currentWidget()
             if current_widget:
-                editor = current_widget.findChild(ArabicTextEdit)
+                editor = self.editor_in(current_widget)
                 return editor
             return None
         except Exception as e:
@@ -739,10 +1403,14 @@ class TabManager(QTabWidget):
 
     def update_tab_title(self, editor):
         """تحديث عنوان التبويب بناءً على حالة الحفظ"""
-        current_index = self.indexOf(editor.parent())
-        if current_index >= 0:
+        # كل التبويبات التي تعرض المستند نفسه تتشارك حالة حفظه
+        modified = editor.document().isModified()
+        for view in editor.document_views:
+            current_index = self.tab_index_of(view)
+            if current_index < 0:
+                continue
             current_text = self.tabText(current_index)
-            if editor.document().isModified():
+            if modified:
                 if not current_text.endswith('*'):
                     self.setTabText(current_index, current_text + '*')
             else:
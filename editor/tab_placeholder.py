@@ -0,0 +1,31 @@
+from PyQt5.QtWidgets import QWidget
+import os
+
+
+class TabPlaceholder(QWidget):
+    """تبويب خفيف يحمل بيانات الملف فقط، ولا ينشأ المحرر إلا عند عرضه أول مرة."""
+
+    # البيانات التي تحفظ في الجلسة وتمرر عند إنشاء العنصر المؤقت
+    STATE_KEYS = ('title', 'cursor_position', 'scroll_value', 'plain_text',
+                  'encoding', 'line_ending', 'file_type', 'fingerprint')
+
+    def __init__(self, file_path, title=None, cursor_position=0, scroll_value=0,
+                 plain_text=None, encoding=None, line_ending=None, file_type=None,
+                 fingerprint=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.title = title or os.path.basename(file_path)
+        self.cursor_position = cursor_position or 0
+        self.scroll_value = scroll_value or 0
+        self.plain_text = plain_text
+        self.encoding = encoding
+        self.line_ending = line_ending
+        self.file_type = file_type
+        # بصمة الملف عند أخذ هذه البيانات، تتيح تخطي إعادة الفحص إن لم يتغير الملف
+        self.fingerprint = fingerprint
+
+    def state(self):
+        """بيانات التبويب كقاموس."""
+        state = {key: getattr(self, key) for key in self.STATE_KEYS}
+        state['file_path'] = self.file_path
+        return state
@@ -0,0 +1,108 @@
+import os
+
+
+def canonical_path(file_path):
+    """المسار الموحد للملف: المسار الحقيقي بعد الروابط الرمزية وبحالة أحرف موحدة."""
+    return os.path.normcase(os.path.realpath(os.path.abspath(file_path)))
+
+
+def file_identity(file_path):
+    """هوية الملف على القرص (الجهاز، رقم العقدة)، أو None إن تعذرت معرفتها."""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    # بعض أنظمة الملفات لا توفر رقم عقدة
+    if not stat.st_ino:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+class TabRegistry:
+    """فهرس التبويبات حسب مسار الملف وحسب المحرر للوصول إليها دون المرور على كل التبويبات.
+
+    المفتاح هو عنصر التبويب نفسه (حاوية المحرر أو العنصر المؤقت)، فلا يتأثر
+    الفهرس بتحريك التبويبات وتغير أرقامها. الملف نفسه يعرف بمساره الموحد أو
+    بهوية عقدته، فيكتشف فتحه عبر رابط رمزي أو بحالة أحرف مختلفة.
+    """
+
+    def __init__(self):
+        self._paths = {}      # العنصر -> (المسار، المسار الموحد، الهوية)
+        self._by_key = {}     # المسار الموحد -> العنصر
+        self._by_identity = {}  # الهوية -> العنصر
+        self._editors = {}    # المحرر -> العنصر
+        self._widget_editors = {}  # العنصر -> المحرر
+
+    def __len__(self):
+        return len(self._paths)
+
+    def set_path(self, widget, file_path, editor=None):
+        """تسجيل عنصر التبويب بمسار ملفه (أو دون مسار) ومحرره إن وجد."""
+        self._drop_path(widget)
+        if editor is not None:
+            self._drop_editor(widget)
+            self._editors[editor] = widget
+            self._widget_editors[widget] = editor
+        if not file_path:
+            return
+        key = canonical_path(file_path)
+        identity = file_identity(file_path)
+        self._paths[widget] = (file_path, key, identity)
+        self._by_key[key] = widget
+        if identity is not None:
+            self._by_identity[identity] = widget
+
+    def replace(self, old_widget, new_widget, editor=None):
+        """نقل تسجيل التبويب إلى عنصر جديد عند استبدال المحرر بعنصر مؤقت أو العكس."""
+        entry = self._paths.get(old_widget)
+        self.remove(old_widget)
+        self.set_path(new_widget, entry[0] if entry else None, editor)
+
+    def remove(self, widget):
+        """إزالة عنصر التبويب من الفهرس."""
+        self._drop_path(widget)
+        self._drop_editor(widget)
+
+    def _drop_path(self, widget):
+        entry = self._paths.pop(widget, None)
+        if entry is None:
+            return
+        _, key, identity = entry
+        if self._by_key.get(key) is widget:
+            del self._by_key[key]
+        if identity is not None and self._by_identity.get(identity) is widget:
+            del self._by_identity[identity]
+
+    def _drop_editor(self, widget):
+        editor = self._widget_editors.pop(widget, None)
+        if editor is not None and self._editors.get(editor) is widget:
+            del self._editors[editor]
+
+    def find(self, file_path):
+        """عنصر التبويب المفتوح فيه الملف، أو None."""
+        if not file_path:
+            return None
+        widget = self._by_key.get(canonical_path(file_path))
+        if widget is not None:
+            return widget
+        identity = file_identity(file_path)
+        widget = self._by_identity.get(identity) if identity is not None else None
+        if widget is None:
+            return None
+        # الهوية المسجلة قد تكون قديمة إذا استبدل الملف بعد فتحه وأعيد استخدام رقم عقدته
+        if file_identity(self._paths[widget][0]) != identity:
+            return None
+        return widget
+
+    def path_of(self, widget):
+        """مسار ملف عنصر التبويب كما سجل."""
+        entry = self._paths.get(widget)
+        return entry[0] if entry else None
+
+    def widget_of(self, editor):
+        """عنصر التبويب الذي يحوي المحرر."""
+        return self._editors.get(editor)
+
+    def editor_of(self, widget):
+        """المحرر الموجود في عنصر التبويب."""
+        return self._widget_editors.get(widget)
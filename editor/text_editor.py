@@ -15,6 +15,7 @@ try:
     from .settings_manager import SettingsManager
     from .tab_manager import TabManager
     from utils.auto_save import AutoSaver
+    from utils.refresh_scheduler import RefreshScheduler, FRAME_INTERVAL
     from .text_widget import ArabicTextEdit
     from utils.statistics_manager import StatisticsManager
     from .search_dialog import SearchManager
@@ -23,6 +24,10 @@ try:
     from utils.sidebar_manager import SidebarManager
     from utils.update_manager import UpdateManager
     from utils.file_watcher import FileWatcher
+    from utils.save_service import SaveService
+    from utils.session_manager import SessionManager
+    from utils.memory_accountant import MemoryAccountant
+    from .memory_usage_dialog import MemoryUsageDialog
     import json
 except Exception as e:
     print(f"خطأ في تحميل المكتبات: {e}")
@@ -38,6 +43,13 @@ class ArabicEditor(QMainWindow):
         self.update_manager = UpdateManager()
         self.settings_manager = SettingsManager()
         
+        # رسم حقول شريط الحالة وعناوين التبويبات مرة واحدة على الأكثر في كل إطار
+        self.refresh_scheduler = RefreshScheduler(
+            self.settings_manager.get_setting('editor.refresh_interval_ms', FRAME_INTERVAL), self)
+        self.refresh_scheduler.register('statistics', self._render_statistics, self._statistics_inputs)
+        self.refresh_scheduler.register('cursor', self.update_cursor_position, self._cursor_inputs)
+        self.refresh_scheduler.register('file_type', self._render_file_type, self._file_type_inputs)
+        
         # ربط إشارة التحديث المتوفر
         self.update_manager.update_available.connect(self.show_update_notification)
         
@@ -72,6 +84,14 @@ class ArabicEditor(QMainWindow):
         if current_editor:
             current_editor.apply_font_direct(self.default_font)
         
+        # حفظ التبويبات المفتوحة واستعادتها بين مرات التشغيل
+        self.session_manager = SessionManager()
+        
+        # خدمة الحفظ في الخلفية
+        self.save_service = SaveService(self)
+        self.save_service.saved.connect(self._on_file_saved)
+        self.save_service.failed.connect(self._on_save_failed)
+        
         # ثم إنشاء auto_saver
         self.auto_saver = AutoSaver(self)
         self.auto_saver.enabled = True  # تفعيل الحفظ التلقائي افتراضياً
@@ -99,6 +119,9 @@ class ArabicEditor(QMainWindow):
         # ربط إشارات المراقبة مع المحرر
         self.file_watcher.content_changed.connect(self._on_external_content_changed)
         
+        # حساب استهلاك الذاكرة وفرض الحد العام عليها
+        self.memory_accountant = MemoryAccountant(self)
+        
         # تحميل القوالب من الملف
         try:
             templates_path = os.path.join('resources', 'arabic_templates.json')
@@ -256,6 +279,11 @@ class ArabicEditor(QMainWindow):
         export_pdf_action.triggered.connect(self.export_pdf)
         tools_menu.addAction(export_pdf_action)
         
+        # استخدام الذاكرة
+        memory_usage_action = QAction('استخدام الذاكرة', self)
+        memory_usage_action.triggered.connect(self.show_memory_usage)
+        tools_menu.addAction(memory_usage_action)
+        
         # editor_menu = self.menuBar().addMenu('المحرر')
         
         # new_text_action = QAction('محرر نصي جديد', self)
@@ -292,23 +320,52 @@ class ArabicEditor(QMainWindow):
         self.file_type_label.setText(f"نوع الملف: {file_type}")
         
     def update_status(self):
-        """تحديث إحصائيات النص في شريط الحالة"""
-        current_editor = self.get_current_editor()
-        if not current_editor:
-            self.statistics_manager.update_statistics("", {
-                'line': 1,
-                'column': 1
-            })
-            return
-        
-        text = current_editor.toPlainText()
-        cursor = current_editor.textCursor()
-        cursor_info = {
-            'line': cursor.blockNumber() + 1,
-            'column': cursor.columnNumber() + 1
-        }
-        
-        self.statistics_manager.update_statistics(text, cursor_info)
+        """طلب تحديث إحصائيات النص وموقع المؤشر ونوع الملف في شريط الحالة"""
+        self.refresh_scheduler.mark_dirty('statistics', 'cursor', 'file_type')
+
+    def _on_cursor_moved(self):
+        self.refresh_scheduler.mark_dirty('cursor')
+
+    def _status_editor(self):
+        """المحرر الذي يعرض شريط الحالة بياناته، أو None قبل إنشاء التبويبات"""
+        if not hasattr(self, 'tab_manager'):
+            return None
+        return self.tab_manager.get_current_editor()
+
+    def _statistics_inputs(self):
+        editor = self._status_editor()
+        if editor is None:
+            return None
+        # أثناء التحميل في الخلفية تحسب الإحصائيات مرة واحدة عند الاكتمال
+        if getattr(editor, 'loader', None):
+            return (editor, 'loading')
+        return (editor, editor.buffer.revision)
+
+    def _render_statistics(self):
+        """حساب إحصائيات النص، ولا يستدعى إلا إذا تغير النص أو المحرر الحالي"""
+        if not hasattr(self, 'statistics_manager'):
+            return False
+        editor = self._status_editor()
+        if editor is None:
+            self.statistics_manager.update_statistics("")
+        else:
+            self.statistics_manager.update_document_statistics(editor)
+
+    def _cursor_inputs(self):
+        editor = self._status_editor()
+        return (editor, editor.textCursor().position()) if editor else None
+
+    def _file_type_inputs(self):
+        editor = self._status_editor()
+        return (editor, self.tab_manager.file_types.get(editor)) if editor else None
+
+    def _render_file_type(self):
+        if not hasattr(self, 'statistics_manager'):
+            return False
+        editor = self._status_editor()
+        file_type = self.tab_manager.file_types.get(editor) if editor else None
+        if file_type:
+            self.statistics_manager.update_statistics(file_type=file_type)
 
     def get_current_editor(self):
         """الحصول لى المحرر النش حالياً"""
@@ -328,57 +385,9 @@ class ArabicEditor(QMainWindow):
             )
         
         if file_path:
-            try:
-                # قراءة الملف وتحديد نوع نهاية الأسطر
-                with open(file_path, 'rb') as file:  # قراءة الملف في الوضع الثنائي
-                    content = file.read()
-                
-                # تحديد الترميز
-                encoding = 'utf-8'
-                try:
-                    content.decode('utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        content.decode('utf-8-sig')
-                        encoding = 'utf-8-sig'
-                    except UnicodeDecodeError:
-                        encoding = 'utf-16'
-                
-                # تحديد نوع نهاية الأسطر
-                text = content.decode(encoding)
-                if '\r\n' in text:
-                    line_ending = '\r\n'
-                elif '\r' in text:
-                    line_ending = '\r'
-                else:
-                    line_ending = '\n'
-                
-                # تحديث المؤشرات في شريط الحالة
-                self.statistics_manager.current_encoding = encoding
-                self.statistics_manager.current_line_ending = line_ending
-                self.statistics_manager.encoding_label.setText(encoding)
-                ending_text = "CRLF" if line_ending == "\r\n" else "LF" if line_ending == "\n" else "CR"
-                self.statistics_manager.line_ending_label.setText(ending_text)
-                
-                # إنشاء محرر جديد وتحميل المحتوى
-                editor = self.create_editor()
-                editor.setPlainText(text)
-                editor.file_path = file_path
-                
-                # إضافة التبويب الديد
-                file_name = os.path.basename(file_path)
-                index = self.tab_manager.addTab(editor, file_name)
-                self.tab_manager.setCurrentIndex(index)
-                
-                return True
-                
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    "طأ",
-                    f"حدث خطأ أثناء فتح الملف: {str(e)}"
-                )
-                return False
+            # مدير التبويبات يحدد الترميز ونهاية الأسطر من عينة ويحفظهما في المحرر
+            return self.tab_manager.open_file(file_path) is not None
+        return False
 
     def _format_size(self, size):
         """تنسيق حجم الملف"""
@@ -401,55 +410,25 @@ class ArabicEditor(QMainWindow):
 
     def save_file(self):
         """حفظ الملف الحالي"""
-        current_editor = self.tab_manager.get_current_editor()
-        if not current_editor:
+        return self.save_tab(self.tab_manager.get_current_editor())
+
+    def save_tab(self, editor):
+        """جدولة حفظ محرر تبويب محدد، ويعيد False إن لم يبدأ الحفظ.
+
+        الكتابة تكتمل لاحقاً في خيط الحفظ وتعلن عنها إشارتا saved و failed.
+        """
+        if not editor:
             return False
         
-        if hasattr(current_editor, 'file_path') and current_editor.file_path:
-            file_path = current_editor.file_path
+        if hasattr(editor, 'file_path') and editor.file_path:
+            file_path = editor.file_path
         else:
-            return self.save_file_as()
+            return self.save_tab_as(editor)
         
         try:
-            # حفظ موضع المؤشر
-            cursor = current_editor.textCursor()
-            position = cursor.position()
-            
-            # الحصول على النص والإعدادات
-            text = current_editor.toPlainText()
-            
-            # الحصول على نوع نهاية الأسطر من StatisticsManager
-            line_ending = getattr(self.statistics_manager, 'current_line_ending', '\n')
-            encoding = getattr(self.statistics_manager, 'current_encoding', 'UTF-8')
-            
-            # تحويل كل نهايات الأسطر إلى النوع المطلوب
-            text = text.replace('\r\n', '\n')  # تحويل كل CRLF إلى LF أولاً
-            text = text.replace('\r', '\n')    # تحويل كل CR إلى LF
-            if line_ending != '\n':
-                text = text.replace('\n', line_ending)  # تحويل إلى نوع نهاية الأسطر المطلوب
-            
-            # حفظ الملف مع الترميز المحدد
-            with open(file_path, 'wb') as file:
-                # تحويل النص إلى بايتات مع الترميز المحدد
-                content = text.encode(encoding)
-                file.write(content)
-            
-            current_editor.document().setModified(False)
-            self.statusBar().showMessage(f"تم الحفظ: {file_path}", 2000)
-            
-            # تحديث مؤشرات شريط الحالة
-            if hasattr(self, 'statistics_manager'):
-                ending_text = "CRLF" if line_ending == "\r\n" else "LF" if line_ending == "\n" else "CR"
-                self.statistics_manager.line_ending_label.setText(ending_text)
-                self.statistics_manager.encoding_label.setText(encoding)
-            
-            # استعادة موضع المؤشر
-            cursor.setPosition(position)
-            current_editor.setTextCursor(cursor)
-            
-            # تحديث عنوان التبويب
-            self.tab_manager.update_tab_title(current_editor)
-            
+            # الكتابة في خيط الحفظ من لقطة النص، وتحدث حالة التبويب عند اكتمالها
+            self.save_service.save(editor, file_path)
+            self.statusBar().showMessage(f"جارٍ الحفظ: {file_path}", 2000)
             return True
             
         except Exception as e:
@@ -462,62 +441,72 @@ class ArabicEditor(QMainWindow):
 
     def save_file_as(self):
         """حفظ الملف باسم جديد"""
+        return self.save_tab_as(self.tab_manager.get_current_editor())
+
+    def save_tab_as(self, editor):
+        """حفظ محرر تبويب محدد باسم جديد، والتبويب لا ينتقل للمسار الجديد إلا بعد نجاح الحفظ"""
+        if not editor:
+            return False
         file_name, _ = QFileDialog.getSaveFileName(self, "حفظ الملف", "", 
                                                  "كل الملفات (*);;ملفات نصية (*.txt)")
         if file_name:
-            current_tab_index = self.tab_manager.currentIndex()
-            self.tab_manager.set_file_path(current_tab_index, file_name)
-            if self._save_to_file(file_name):
-                self.tab_manager.setTabText(current_tab_index, os.path.basename(file_name))
-                return True
+            return self._save_to_file(editor, file_name)
         return False
 
-    def _save_to_file(self, file_name):
+    def _save_to_file(self, editor, file_name):
         """حفظ المحتوى إلى ملف"""
-        current_editor = self.get_current_editor()
-        if not current_editor:
-            return False
-        
         try:
-            # قراءة النص من المحرر
-            text = current_editor.toPlainText()
-            
-            # الحصول على إعدادات الترميز ونهاية الأسطر
-            line_ending = getattr(self.statistics_manager, 'current_line_ending', '\n')
-            encoding = getattr(self.statistics_manager, 'current_encoding', 'UTF-8')
-            
-            # قراءة الملف الحالي إذا كان موجوداً لمعرفة نوع نهاية الأسطر
-            if os.path.exists(file_name):
-                with open(file_name, 'rb') as file:
-                    content = file.read()
-                    if b'\r\n' in content:
-                        line_ending = '\r\n'
-                    elif b'\n' in content:
-                        line_ending = '\n'
-            
-            # تحويل النص إلى بايتات مع نهاية الأسطر المناسبة
-            lines = text.split('\n')
-            binary_content = line_ending.join(lines).encode(encoding)
-            
-            # حفظ الملف كبيانات ثنائية
-            with open(file_name, 'wb') as file:
-                file.write(binary_content)
-                
-            current_editor.document().setModified(False)
-            self.statusBar().showMessage(f"تم الحفظ: {file_name}", 2000)
-            
-            # تحديث مؤشرات شريط الحالة
-            if hasattr(self, 'statistics_manager'):
-                ending_text = "CRLF" if line_ending == "\r\n" else "LF"
-                self.statistics_manager.line_ending_label.setText(ending_text)
-                self.statistics_manager.encoding_label.setText(encoding)
-                
+            # الحفظ بترميز المحرر ونهاية أسطره دون قراءة الملف الموجود
+            self.save_service.save(editor, file_name)
+            self.statusBar().showMessage(f"جارٍ الحفظ: {file_name}", 2000)
             return True
             
         except Exception as e:
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء حفظ الملف: {str(e)}")
             return False
 
+    def save_all(self):
+        """حفظ جميع التبويبات المعدلة التي لها ملفات"""
+        count = 0
+        for index in range(self.tab_manager.count()):
+            editor = self.tab_manager.editor_at(index)
+            if editor and editor.file_path and editor.document().isModified():
+                try:
+                    self.save_service.save(editor, editor.file_path)
+                    count += 1
+                except Exception as e:
+                    QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء حفظ الملف: {str(e)}")
+        self.statusBar().showMessage(f"جارٍ حفظ {count} ملف", 2000)
+
+    def _on_file_saved(self, editor, file_path):
+        """تحديث حالة التبويب بعد اكتمال الحفظ"""
+        self.statusBar().showMessage(f"تم الحفظ: {file_path}", 2000)
+        
+        # الحفظ باسم جديد ينقل التبويب إلى المسار الجديد بعد نجاحه فقط
+        self.tab_manager.move_to_saved_path(editor, file_path)
+        
+        # كتابة المحرر نفسه لا تعاد قراءتها كتغيير خارجي يمسح سجل التراجع
+        self.file_watcher.mark_saved(file_path)
+        
+        # تحديث مؤشرات شريط الحالة
+        if hasattr(self, 'statistics_manager') and editor is self.get_current_editor():
+            self.statistics_manager.show_file_format(editor)
+        
+        # تحديث عنوان التبويب
+        self.tab_manager.update_tab_title(editor)
+
+        # التبويب المنتظر حفظه ليغلق يغلق بعد اكتمال آخر كتابة له
+        if not self.save_service.is_pending(editor):
+            self.tab_manager.on_save_finished(editor, True)
+
+    def _on_save_failed(self, editor, file_path, message, automatic):
+        """إبلاغ المستخدم بفشل الحفظ، والتبويب يبقى معدلاً"""
+        self.tab_manager.on_save_finished(editor, False)
+        if automatic:
+            self.statusBar().showMessage(f"خطأ في الحفظ التلقائي: {message}", 3000)
+        else:
+            QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء حفظ الملف: {message}")
+
     def show_search_dialog(self):
         """عرض نافذة ابحث"""
         self.search_manager.show_search_dialog()
@@ -602,13 +591,15 @@ class ArabicEditor(QMainWindow):
 
     def update_cursor_position(self):
         """تحديث موقع المؤشر في شريط الحالة"""
-        current_editor = self.get_current_editor()
-        if not current_editor:
-            return
-        
-        cursor = current_editor.textCursor()
-        line = cursor.blockNumber() + 1
-        column = cursor.columnNumber() + 1
+        if not hasattr(self, 'statistics_manager'):
+            return False
+        current_editor = self._status_editor()
+        if current_editor:
+            cursor = current_editor.textCursor()
+            line = cursor.blockNumber() + 1
+            column = cursor.columnNumber() + 1
+        else:
+            line = column = 1
         
         cursor_info = {
             'line': line,
@@ -625,7 +616,7 @@ class ArabicEditor(QMainWindow):
         """معالجة إغلاق النافذة"""
         # التحقق من جميع التبويبات المفتوحة
         for index in range(self.tab_manager.count()):
-            text_edit = self.tab_manager.widget(index).findChild(ArabicTextEdit)
+            text_edit = self.tab_manager.editor_at(index)
             if text_edit and text_edit.document().isModified():
                 file_name = self.tab_manager.tabText(index)
                 
@@ -646,7 +637,7 @@ class ArabicEditor(QMainWindow):
                 if clicked_button == save_button:
                     # تفعيل التبويب الحالي
                     self.tab_manager.setCurrentIndex(index)
-                    if not self.save_file():
+                    if not self.save_tab(text_edit):
                         event.ignore()
                         return
                 elif clicked_button == cancel_button:
@@ -654,8 +645,36 @@ class ArabicEditor(QMainWindow):
                     return
                 # في حالة تجاهل، نستمر في الحلقة
         
+        # انتظار اكتمال الحفظ الجاري قبل الخروج
+        if not self.save_service.flush():
+            event.ignore()
+            return
+        self.save_service.shutdown()
+        
+        if self.settings_manager.get_setting('editor.restore_session', True):
+            self.session_manager.save(self.tab_manager)
         event.accept()
 
+    def show_memory_usage(self):
+        """عرض استهلاك الذاكرة لكل تبويب"""
+        MemoryUsageDialog(self.memory_accountant, self).exec_()
+
+    def restore_session(self):
+        """استعادة تبويبات الجلسة السابقة بدلاً من التبويب الفارغ الافتراضي"""
+        if not self.settings_manager.get_setting('editor.restore_session', True):
+            return
+        initial_editor = self.tab_manager.get_current_editor()
+        if not self.session_manager.restore(self.tab_manager):
+            return
+        # إزالة التبويب الفارغ الذي أنشئ عند التشغيل
+        if (initial_editor and not initial_editor.file_path
+                and not initial_editor.document().isModified() and initial_editor.document().isEmpty()):
+            index = self.tab_manager.indexOf(initial_editor.get_container())
+            if index >= 0:
+                self.tab_manager.file_paths.pop(initial_editor, None)
+                self.tab_manager.removeTab(index)
+                initial_editor.get_container().deleteLater()
+
     def maybe_save(self):
         """التحقق من حفظ التغييرات قبل الإغلاق"""
         current_editor = self.tab_manager.get_current_editor()
@@ -691,12 +710,14 @@ class ArabicEditor(QMainWindow):
         if ok:
             self.default_font = font
             self.settings_manager.save_font(font)
-            
-            # تطبيق على جميع المحررات المفتوحة
-            for i in range(self.tab_manager.count()):
-                editor = self.tab_manager.widget(i).findChild(ArabicTextEdit)
-                if editor:
-                    editor.apply_font_direct(font)
+            self.apply_font_to_all_tabs(font)
+
+    def apply_font_to_all_tabs(self, font):
+        """تطبيق الخط على جميع المحررات المفتوحة، والتبويبات غير المحملة تأخذه عند إنشائها"""
+        for i in range(self.tab_manager.count()):
+            editor = self.tab_manager.editor_at(i)
+            if editor:
+                editor.apply_font_direct(font)
             
     def add_terminal(self):
         """إضافة طرفية جديد"""
@@ -777,7 +798,7 @@ class ArabicEditor(QMainWindow):
             if cursor.hasSelection():
                 char_format = QTextCharFormat()
                 char_format.setFont(font)
-                cursor.mergeCharFormat(char_format)
+                current_editor.change_format(cursor, lambda c: c.mergeCharFormat(char_format))
             else:
                 # تطبيق الخط على المحرر بأكمله
                 current_editor.setFont(font)
@@ -793,16 +814,18 @@ class ArabicEditor(QMainWindow):
         # إلغاء ربط الإشارات من المحرر السابق
         if hasattr(self, '_last_editor'):
             try:
-                self._last_editor.textChanged.disconnect(self.update_status)
-                self._last_editor.cursorPositionChanged.disconnect(self.update_status)
+                self._last_editor.change_bus.unsubscribe(self, 'status')
+                self._last_editor.cursorPositionChanged.disconnect(self._on_cursor_moved)
             except:
                 pass
         
         # ربط الإشارات مع المحرر الجديد
         current_editor = self.tab_manager.get_current_editor()
         if current_editor:
-            current_editor.textChanged.connect(self.update_status)
-            current_editor.cursorPositionChanged.connect(self.update_status)
+            # التعديلات وتحريك المؤشر تعلم حقولها فقط، وترسم مرة واحدة في الإطار التالي
+            current_editor.change_bus.subscribe(self, 'status',
+                                                lambda delta: self.refresh_scheduler.mark_dirty('statistics'))
+            current_editor.cursorPositionChanged.connect(self._on_cursor_moved)
             self._last_editor = current_editor
         
         # تحديث الإحصائيات
@@ -910,10 +933,13 @@ class ArabicEditor(QMainWindow):
 
     def _on_external_content_changed(self, file_path, new_content):
         """معالجة التغييرات الخارجية في الملف"""
-        current_editor = self.tab_manager.get_current_editor()
-        if current_editor and not current_editor.document().isModified():
-            current_editor.setPlainText(new_content)
-            current_editor.document().setModified(False)
+        # المراقب حدث نص محرر الملف نفسه، ويبقى تحديث حالة تبويبه
+        editor = self.tab_manager.editor_for_path(file_path)
+        if editor and not editor.document().isModified():
+            self.tab_manager.update_tab_title(editor)
+            # نوع الملف المخزن يخص المحتوى السابق
+            self.tab_manager.file_types.pop(editor, None)
+            self.tab_manager.update_file_type(editor, file_path)
 
     def initialize_settings(self):
         """تهيئة وتطبيق الإعدادات عند بدء التشغيل"""
@@ -951,11 +977,9 @@ class ArabicEditor(QMainWindow):
         # تطبيق التفاف النص
         word_wrap = settings.get('editor', {}).get('word_wrap', False)
         for i in range(self.tab_manager.count()):
-            editor = self.tab_manager.widget(i).findChild(QTextEdit)
+            editor = self.tab_manager.editor_at(i)
             if editor:
-                editor.setLineWrapMode(
-                    QTextEdit.WidgetWidth if word_wrap else QTextEdit.NoWrap
-                )
+                editor.set_word_wrap(word_wrap)
 
     def open_folder(self):
         """فتح مجلد في المحرر"""
@@ -1,8 +1,21 @@
-from PyQt5.QtWidgets import QTextEdit, QWidget, QHBoxLayout, QMenu, QAction, QMessageBox
-from PyQt5.QtGui import QTextOption, QTextCharFormat, QColor, QTextCursor, QKeySequence
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+from PyQt5.QtWidgets import QTextEdit, QWidget, QHBoxLayout, QMenu, QAction, QMessageBox, QApplication
+from PyQt5.QtGui import QTextOption, QTextCharFormat, QTextFormat, QColor, QTextCursor, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QPoint, pyqtSignal, QDataStream, QByteArray, QIODevice
 from utils.syntax_highlighter import CodeHighlighter
+from utils.piece_table import PieceTable
+from utils.undo_store import UndoStore, DEFAULT_UNDO_BUDGET
+from utils.timer_wheel import shared_timer_wheel
+from utils.change_bus import DocumentChangeBus
+from utils.bracket_index import BracketIndex
+from utils.word_index import DocumentWordIndex
+from utils.document_statistics import DocumentStatistics
+from utils.file_loader import DEFAULT_ENCODING
+from utils.background_loader import INSERT_TIME_BUDGET
+from .selection_layers import SelectionLayers
+from .line_number_gutter import LineNumberGutter
+from .word_completer import WordCompleter
 import logging
+import time
 try:
     from utils.arabic_logger import setup_arabic_logging, log_in_arabic
 except Exception as e:
@@ -10,40 +23,124 @@ except Exception as e:
 formatter = setup_arabic_logging()
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
-class ArabicTextEdit(QTextEdit):
-    file_type_changed = pyqtSignal(str)  # إشارة عند تغيير نوع الملف
 
-    def __init__(self, main_window):
-        super().__init__()
+# الحرف الخفي (علامة من اليسار إلى اليمين) الذي يضاف بعد علامات التنصيص
+HIDDEN_CHAR = '\u200E'
+
+# تحويل فواصل الفقرات والمسافة غير القابلة للكسر كما يفعل toPlainText
+PLAIN_TEXT_TRANSLATION = {0x2029: '\n', 0x2028: '\n', 0xA0: ' '}
+
+
+def _pack_format(text_format):
+    """تحويل تنسيق إلى بايتات تحفظ في سجل التراجع."""
+    data = QByteArray()
+    QDataStream(data, QIODevice.WriteOnly) << text_format
+    return bytes(data)
+
+
+def _unpack_format(data):
+    text_format = QTextFormat()
+    QDataStream(QByteArray(data)) >> text_format
+    return text_format
+
+# تأخير تحديث نوع الملف بعد آخر تعديل، والفترة بين مرات ضغط سجل التراجع (بالمللي ثانية)
+FILE_TYPE_UPDATE_DELAY = 1000
+MEMORY_OPTIMIZE_INTERVAL = 300000
+
+# مهلة إعادة محاولة إضافة الحرف الخفي ما دام الملف يحمل في الخلفية (بالمللي ثانية)
+LOADING_RETRY_DELAY = 100
+
+# اللصق الأكبر من هذا (بالأحرف) يدرج كنص عادي حتى لو حمل تنسيقاً
+LARGE_PASTE_SIZE = 256 * 1024
+
+# عدد الأحرف المدرجة في كل مرة أثناء اللصق
+PASTE_CHUNK_SIZE = 64 * 1024
+
+class ArabicEditorMixin:
+    """السلوك المشترك بين محرر النص المنسق ومحرر النص العادي."""
+
+    def _init_editor(self, main_window):
+        """تهيئة خصائص المحرر المشتركة."""
         self.main_window = main_window
         self.file_path = None
 
+        # ترميز الملف ونهاية أسطره الأصلية، تستخدم عند الحفظ
+        self.encoding = DEFAULT_ENCODING
+        self.line_ending = '\n'
+
+        # طريقة إضافة الحرف الخفي: 'document' يخزن في المستند، 'view' للعرض فقط، 'off' معطل
+        self.lrm_mode = 'document'
+        if hasattr(main_window, 'settings_manager'):
+            self.lrm_mode = main_window.settings_manager.get_setting('editor.lrm_marker', 'document')
+        self._pending_marker_range = None
+        self._applying_markers = False
+
+        # نسخة من نص المستند في شجرة قطع تتيح لقطات ثابتة دون نسخ
+        self.buffer = PieceTable()
+
+        # محمل الملف في الخلفية أثناء التحميل فقط
+        self.loader = None
+
+        # وضع حماية الملفات ذات الأسطر الطويلة جداً
+        self.long_line_mode = False
+
+        # سجل تراجع محدود الحجم بدلاً من سجل المستند، يغذى من نسخة النص
+        undo_budget = DEFAULT_UNDO_BUDGET
+        if hasattr(main_window, 'settings_manager'):
+            undo_budget = main_window.settings_manager.get_setting('editor.undo_budget_mb', 16) * 1024 * 1024
+        self.undo_store = UndoStore(undo_budget)
+        self._suspend_undo = False
+        # تعديلات الدورة الواحدة من حلقة الأحداث تشكل خطوة تراجع واحدة
+        self._undo_step_timer = QTimer()
+        self._undo_step_timer.setSingleShot(True)
+        self._undo_step_timer.setInterval(0)
+        self._undo_step_timer.timeout.connect(self._close_undo_step)
+
+        # المحررات التي تعرض هذا المستند؛ أولها مالكه الذي يحدث نسخة النص وسجل التراجع
+        self.document_views = [self]
+
+        # ناقل تعديلات المستند الذي يشترك فيه كل من يتابع تعديلاته
+        self.change_bus = DocumentChangeBus(self.document())
+
+        # فهرس الأقواس لتمييز القوس المقابل للمؤشر
+        self.bracket_index = BracketIndex(self.document(), self.change_bus, ready=self._on_brackets_ready)
+
+        # كلمات المستند في شجرة الإكمال المشتركة بين التبويبات
+        # الكتل لا تعد كلماتها أثناء تحميل الملف في الخلفية
+        self.word_index = DocumentWordIndex(self.document(), self.change_bus,
+                                            busy=lambda: self.loader is not None)
+
+        # عدد الأحرف والكلمات والأسطر لشريط الحالة
+        self.text_statistics = DocumentStatistics(self.document(), self.change_bus)
+
         # إنشاء الحاوية
         self.container = QWidget()
         self.container_layout = QHBoxLayout(self.container)
         self.container_layout.setContentsMargins(0, 0, 0, 0)
         self.container_layout.addWidget(self)
 
+        # طبقات التحديدات الإضافية (السطر الحالي، نتائج البحث...)
+        self.selection_layers = SelectionLayers(self)
+
         # إعدادات المحرر
         self.setup_editor()
         self.setup_signals_and_timers()
 
         # تخصيص التمييز اللغوي
         self.highlighter = CodeHighlighter(self.document())
-        
-        # مؤقت تحديث نوع الملف
-        self._file_type_update_timer = QTimer()
-        self._file_type_update_timer.setSingleShot(True)
-        self._file_type_update_timer.setInterval(1000)  # تأخير ثانية واحدة
-        self._file_type_update_timer.timeout.connect(self._update_file_type)
-        
-    def _update_file_type(self):
-        """تحديث نوع الملف في شريط الحالة"""
-        if hasattr(self.main_window, 'statistics_manager'):
-            content = self.toPlainText()
-            self.main_window.statistics_manager.set_current_editor(self)  # تأكد من تحديث المحرر الحالي
-            self.main_window.statistics_manager.update_file_type(self.file_path, content)
+        # وضع العرض يرسم علامة الاقتباس الأخيرة بتنسيق من الملون دون تعديل النص
+        self.highlighter.quote_marker = self.lrm_mode == 'view'
 
+        # هامش أرقام الأسطر والعلامات
+        self.gutter = LineNumberGutter(self)
+        if hasattr(main_window, 'settings_manager'):
+            self.set_line_numbers_visible(main_window.settings_manager.get_setting('editor.line_numbers', True))
+
+        # إكمال الكلمات أثناء الكتابة
+        self.word_completer = WordCompleter(self)
+        if hasattr(main_window, 'settings_manager'):
+            self.word_completer.enabled = main_window.settings_manager.get_setting('editor.word_completion', True)
+        
     def setup_editor(self):
         """إعدادات المحرر الأساسية."""
         options = QTextOption()
@@ -51,19 +148,104 @@ class ArabicTextEdit(QTextEdit):
         self.document().setDefaultTextOption(options)
 
         self.setCurrentCharFormat(QTextCharFormat())
-        self.setAcceptRichText(True)
+
+        # التراجع يدار من سجل المحرر المحدود
+        self.document().setUndoRedoEnabled(False)
 
     def setup_signals_and_timers(self):
         """إعداد الإشارات والمؤقتات"""
         self.cursorPositionChanged.connect(self.highlight_current_line)
-        self.textChanged.connect(self.on_text_changed)
-        self.textChanged.connect(lambda: self._file_type_update_timer.start())
+        self.cursorPositionChanged.connect(self.highlight_matching_bracket)
+
+        self._connect_document_signals()
+        self._marker_timer = QTimer()
+        self._marker_timer.setSingleShot(True)
+        self._marker_timer.setInterval(0)
+        self._marker_timer.timeout.connect(self._apply_pending_markers)
+
+        # ضغط سجل التراجع دورياً عبر العجلة المشتركة بدلاً من مؤقت لكل محرر
+        shared_timer_wheel().schedule(self, 'optimize_memory', MEMORY_OPTIMIZE_INTERVAL,
+                                      self.optimize_memory, repeat=True)
+        self.destroyed.connect(lambda: shared_timer_wheel().cancel_all(self))
+
+    def _connect_document_signals(self):
+        """الاشتراك في تعديلات المستند التي يعالجها مالكه مرة واحدة مهما تعددت محرراته."""
+        bus = self.change_bus
+        # تحديث نسخة النص بالتعديل نفسه فقط وقبل أي مشترك آخر
+        bus.subscribe(self, 'mirror', lambda delta: self._mirror_contents_change(*delta[:3]), priority=0)
+
+        # معالجة الحرف الخفي للكتل المتأثرة فقط بعد كل تعديل
+        bus.subscribe(self, 'markers', lambda delta: self._on_contents_change(*delta[:3]))
+
+        self.document().modificationChanged.connect(self._on_modification_changed)
+
+    def _disconnect_document_signals(self):
+        for name in ('mirror', 'markers'):
+            self.change_bus.unsubscribe(self, name)
+        try:
+            self.document().modificationChanged.disconnect(self._on_modification_changed)
+        except TypeError:
+            pass
 
-        # مؤقت تحسين الذاكرة
-        self.memory_timer = QTimer()
-        self.memory_timer.setInterval(300000)  # كل 5 دقائق
-        self.memory_timer.timeout.connect(self.optimize_memory)
-        self.memory_timer.start()
+    @property
+    def document_owner(self):
+        """المحرر المالك للمستند المشترك."""
+        return self.document_views[0]
+
+    def attach_to(self, source):
+        """عرض مستند محرر آخر دون نسخه، بمؤشر وتمرير وتحديدات مستقلة."""
+        source = source.document_owner
+        document = source.document()
+        self._disconnect_document_signals()
+        # المستند يبقى ما بقي أحد محرراته، فلا يحذف مع المحرر الذي أنشأه.
+        # أبوه الافتراضي أداة النص الداخلية في المحرر لا المحرر نفسه
+        if document.parent() is not None:
+            document.setParent(None)
+        source.shared_document = document
+        self.shared_document = document
+
+        # نسخة النص وسجل التراجع والتلوين مرة واحدة لكل مستند. تربط قبل تغيير
+        # المستند لأن setDocument يرسل cursorPositionChanged بعد حذف المستند السابق،
+        # فلا يجوز أن تصل إشاراته إلى فهارس ذلك المستند
+        self.highlighter = source.highlighter
+        self.buffer = source.buffer
+        self.undo_store = source.undo_store
+        self.change_bus = source.change_bus
+        self.bracket_index = source.bracket_index
+        self.word_index = source.word_index
+        self.text_statistics = source.text_statistics
+        self.file_path = source.file_path
+        self.encoding = source.encoding
+        self.line_ending = source.line_ending
+        self.lrm_mode = source.lrm_mode
+        self.document_views = source.document_views
+        self.document_views.append(self)
+
+        # المستند السابق وملونه وناقل تعديلاته تحذف مع تغيير المستند لأن المحرر أبوها
+        self.setDocument(document)
+        self.gutter.connect_document()
+
+    def release_document(self):
+        """فصل المحرر عن المستند المشترك قبل إغلاقه، ويعيد المالك الجديد إن انتقلت الملكية."""
+        views = self.document_views
+        if len(views) == 1 or self not in views:
+            return None
+        was_owner = views[0] is self
+        views.remove(self)
+        self.document_views = [self]
+        self.shared_document = None
+        if len(views) == 1:
+            # آخر محرر يعرض المستند يصبح أباً له فيحذف المستند معه
+            views[0].document().setParent(views[0])
+            views[0].shared_document = None
+        # اشتراكات المحرر في ناقل المستند المشترك تنتهي بفصله عنه
+        self.change_bus.unsubscribe_all(self)
+        if not was_owner:
+            return None
+        self._disconnect_document_signals()
+        owner = views[0]
+        owner._connect_document_signals()
+        return owner
 
     def highlight_current_line(self):
         """تمييز السطر الحالي."""
@@ -74,13 +256,289 @@ class ArabicTextEdit(QTextEdit):
         selection.format.setBackground(QColor("#2d2d2d"))
         selection.cursor = self.textCursor()
         selection.cursor.clearSelection()
-        self.setExtraSelections([selection])
+        self.selection_layers.set_layer('current_line', [selection])
+
+    def highlight_matching_bracket(self):
+        """تمييز القوس المجاور للمؤشر والقوس المقابل له."""
+        cursor = self.textCursor()
+        # الأسطر الطويلة جداً لا يمر عليها بحثاً عن الأقواس، ولا المستند أثناء تحميله
+        if self.long_line_mode or self.loader is not None or cursor.hasSelection():
+            self.selection_layers.clear_layer('brackets')
+            return
+
+        position = cursor.position()
+        pair = None
+        # الحرف بعد المؤشر أولاً ثم الحرف قبله
+        for candidate in (position, position - 1):
+            if candidate < 0:
+                continue
+            partner = self.bracket_index.match(candidate)
+            if partner is not None:
+                pair = (candidate, partner)
+                break
+        if pair is None:
+            self.selection_layers.clear_layer('brackets')
+            return
+
+        selections = []
+        for bracket_position in pair:
+            selection = QTextEdit.ExtraSelection()
+            selection.format.setBackground(QColor("#3a3d41"))
+            selection.format.setForeground(QColor("#ffd700"))
+            selection.cursor = QTextCursor(self.document())
+            selection.cursor.setPosition(bracket_position)
+            selection.cursor.setPosition(bracket_position + 1, QTextCursor.KeepAnchor)
+            selections.append(selection)
+        self.selection_layers.set_layer('brackets', selections)
+
+    def _on_brackets_ready(self):
+        """تمييز الأقواس في كل محررات المستند بعد اكتمال بناء فهرسها على دفعات."""
+        for view in self.document_views:
+            view.highlight_matching_bracket()
 
     def optimize_memory(self):
-        """تحسين استخدام الموارد."""
-        self.document().clearUndoRedoStacks()
-        self.document().setUndoRedoEnabled(False)
-        self.document().setUndoRedoEnabled(True)
+        """ضغط خطوات التراجع القديمة دون حذف أي منها."""
+        self.undo_store.compact()
+        log_in_arabic(logger, logging.DEBUG, self.undo_status_text())
+
+    def undo_status_text(self):
+        """وصف حجم سجل التراجع وعدد خطواته."""
+        stats = self.undo_store.stats()
+        return (f"سجل التراجع: {stats['undo_depth']} خطوة، "
+                f"{stats['memory_used'] // 1024} ك.ب من {stats['budget'] // (1024 * 1024)} م.ب")
+
+    def undo(self):
+        """التراجع عن آخر خطوة."""
+        edits = self.undo_store.undo()
+        if edits is not None:
+            # عكس كل تعديل: حذف ما أدرج وإعادة ما حذف، بالترتيب المعاكس
+            self._apply_undo_edits([(position, inserted, removed)
+                                    for position, removed, inserted in reversed(edits)])
+
+    def redo(self):
+        """إعادة آخر خطوة تم التراجع عنها."""
+        edits = self.undo_store.redo()
+        if edits is not None:
+            self._apply_undo_edits(edits)
+
+    def _apply_undo_edits(self, edits):
+        """تطبيق تعديلات من سجل التراجع دون تسجيلها فيه."""
+        document = self.document()
+        cursor = QTextCursor(document)
+        # التسجيل في سجل التراجع يتم في مالك المستند
+        owner = self.document_owner
+        owner._suspend_undo = True
+        try:
+            cursor.beginEditBlock()
+            for position, removed, inserted in edits:
+                if isinstance(inserted, tuple):
+                    # تعديل تنسيق لا يغير النص
+                    self._restore_format(cursor, inserted)
+                    continue
+                cursor.setPosition(position)
+                cursor.setPosition(position + len(removed), QTextCursor.KeepAnchor)
+                cursor.insertText(inserted)
+            cursor.endEditBlock()
+        finally:
+            owner._suspend_undo = False
+        document.setModified(not self.undo_store.is_clean())
+        view_cursor = self.textCursor()
+        view_cursor.setPosition(cursor.position())
+        self.setTextCursor(view_cursor)
+
+    def change_format(self, cursor, apply):
+        """تطبيق تغيير تنسيق بالمؤشر وتسجيله خطوة في سجل التراجع.
+
+        سجل التراجع يحفظ تعديلات النص فقط، فتحفظ تنسيقات الكتل المتأثرة قبل
+        التغيير وبعده كتعديل خاص يعاد تطبيقه عند التراجع والإعادة.
+        """
+        document = self.document()
+        start = document.findBlock(cursor.selectionStart()).position()
+        end = cursor.selectionEnd()
+        before = self._format_snapshot(start, end)
+        apply(cursor)
+        after = self._format_snapshot(start, end)
+        if before == after or self.loader:
+            return
+        undo_store = self.undo_store
+        undo_store.close_step()
+        undo_store.record(start, before, after)
+        undo_store.close_step()
+        document.setModified(True)
+
+    def _format_snapshot(self, start, end):
+        """تنسيق الكتل من start إلى end: تنسيق كل كتلة وتنسيقات أجزائها بمواضعها."""
+        snapshot = []
+        block = self.document().findBlock(start)
+        while block.isValid() and block.position() <= end:
+            runs = []
+            iterator = block.begin()
+            while not iterator.atEnd():
+                fragment = iterator.fragment()
+                runs.append((fragment.position(), fragment.length(), _pack_format(fragment.charFormat())))
+                iterator += 1
+            snapshot.append((block.position(), _pack_format(block.blockFormat()),
+                             _pack_format(block.charFormat()), tuple(runs)))
+            block = block.next()
+        return tuple(snapshot)
+
+    def _restore_format(self, cursor, snapshot):
+        """إعادة تنسيقات الكتل كما حفظها _format_snapshot."""
+        for position, block_format, block_char_format, runs in snapshot:
+            cursor.setPosition(position)
+            cursor.setBlockFormat(_unpack_format(block_format).toBlockFormat())
+            cursor.setBlockCharFormat(_unpack_format(block_char_format).toCharFormat())
+            for run_position, length, char_format in runs:
+                cursor.setPosition(run_position)
+                cursor.setPosition(run_position + length, QTextCursor.KeepAnchor)
+                cursor.setCharFormat(_unpack_format(char_format).toCharFormat())
+
+    def _on_modification_changed(self, modified):
+        """تسجيل حالة الحفظ في سجل التراجع."""
+        if not modified:
+            self.undo_store.mark_clean()
+
+    def setPlainText(self, text):
+        """استبدال النص كاملاً وبدء سجل تراجع جديد."""
+        owner = self.document_owner
+        owner._suspend_undo = True
+        try:
+            super().setPlainText(text)
+        finally:
+            owner._suspend_undo = False
+        self.undo_store.clear()
+
+    def _close_undo_step(self):
+        self.undo_store.close_step()
+
+    def keyPressEvent(self, event):
+        """توجيه اختصارات التراجع والإعادة إلى سجل المحرر."""
+        if self.word_completer.handles_key(event):
+            return
+        if event.matches(QKeySequence.Undo):
+            self.undo()
+        elif event.matches(QKeySequence.Redo):
+            self.redo()
+        elif event.key() == Qt.Key_V and event.modifiers() == (Qt.ControlModifier | Qt.ShiftModifier):
+            self.paste_plain_text()
+        else:
+            super().keyPressEvent(event)
+            self.word_completer.on_key_typed(event)
+
+    def insertFromMimeData(self, source):
+        """اللصق والإفلات: النص العادي والنصوص الكبيرة تدرج مباشرة دون تحليل التنسيق."""
+        if not source.hasText():
+            super().insertFromMimeData(source)
+            return
+        text = source.text()
+        if source.hasHtml() and isinstance(self, QTextEdit) and self.acceptRichText() and len(text) < LARGE_PASTE_SIZE:
+            # اللصق المنسق الصغير يحتفظ بتنسيقه
+            super().insertFromMimeData(source)
+            return
+        self.insert_plain_text(text)
+
+    def paste_plain_text(self):
+        """لصق محتوى الحافظة كنص عادي دون تنسيق."""
+        if self.isReadOnly():
+            return
+        text = QApplication.clipboard().text()
+        if text:
+            self.insert_plain_text(text)
+
+    def insert_plain_text(self, text):
+        """إدراج نص عادي على أجزاء في خطوة تعديل واحدة.
+
+        كتلة التعديل الواحدة تجمع الأجزاء في تعديل واحد على ناقل المستند، فتحسب
+        الإحصائيات ونوع الملف والحفظ التلقائي مرة واحدة بعد انتهائه بدلاً من كل جزء.
+        """
+        if '\r' in text:
+            # QTextCursor يعد كل \r بداية فقرة جديدة
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        cursor = self.textCursor()
+        cursor.beginEditBlock()
+        try:
+            for start in range(0, len(text), PASTE_CHUNK_SIZE):
+                cursor.insertText(text[start:start + PASTE_CHUNK_SIZE])
+        finally:
+            cursor.endEditBlock()
+        self.setTextCursor(cursor)
+        self.ensureCursorVisible()
+
+    def _mirror_contents_change(self, position, removed, added):
+        """تطبيق تعديل المستند على نسخة النص في شجرة القطع."""
+        document = self.document()
+        document_length = document.characterCount() - 1
+        # Qt قد يحسب فاصل الفقرة الأخير ضمن النطاق عند استبدال المستند كاملاً
+        removed = max(0, min(removed, len(self.buffer) - position))
+        end = min(position + added, document_length)
+
+        if len(self.buffer) - removed + (end - position) != document_length:
+            self.buffer.set_text(self.toPlainText())
+            # لا يمكن معرفة التعديل بدقة، فلا يصح التراجع عبره
+            self.undo_store.clear()
+            log_in_arabic(logger, logging.DEBUG, "تمت إعادة مزامنة نسخة النص مع المستند")
+            return
+
+        text = ''
+        if end > position:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(end, QTextCursor.KeepAnchor)
+            text = cursor.selectedText().translate(PLAIN_TEXT_TRANSLATION)
+
+        # لا يسجل التحميل في الخلفية ولا التراجع نفسه، ولا تغيير التنسيق وحده
+        if not self._suspend_undo and not self.loader:
+            removed_text = self.buffer.text(position, position + removed)
+            if removed_text != text:
+                self.undo_store.record(position, removed_text, text, join=self._applying_markers)
+                self._undo_step_timer.start()
+        self.buffer.replace(position, removed, text)
+
+    def snapshot(self):
+        """لقطة ثابتة من نص المحرر يمكن تمريرها للخيوط الخلفية دون نسخ."""
+        return self.buffer.snapshot()
+
+    def set_line_numbers_visible(self, visible):
+        """إظهار هامش أرقام الأسطر أو إخفاؤه."""
+        self.gutter.setVisible(bool(visible))
+        self.gutter.update_width()
+
+    def first_visible_block(self):
+        """أول كتلة ظاهرة في أعلى المحرر."""
+        return self.cursorForPosition(QPoint(0, 0)).block()
+
+    def block_geometry(self, block):
+        """مستطيل الكتلة بإحداثيات منطقة العرض."""
+        rect = self.document().documentLayout().blockBoundingRect(block)
+        return rect.translated(0, -self.verticalScrollBar().value())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.gutter.update_geometry()
+
+    def set_word_wrap(self, enabled):
+        """تفعيل التفاف النص أو تعطيله حسب نوع المحرر."""
+        # الأسطر الطويلة جداً تبقى ملتفة دائماً في وضع الحماية
+        if self.long_line_mode:
+            enabled = True
+        # لكل من QTextEdit و QPlainTextEdit نوع خاص لأوضاع الالتفاف
+        self.setLineWrapMode(self.WidgetWidth if enabled else self.NoWrap)
+
+    def enable_long_line_mode(self, limit):
+        """حماية العرض من الأسطر الطويلة جداً قبل تحميل الملف.
+
+        السطر يقسم بصرياً عند أي حرف دون البحث عن حدود الكلمات، والكتل الأطول من
+        limit لا تلون، ولا يضاف الحرف الخفي حتى يحفظ الملف كما قرئ تماماً.
+        """
+        self.long_line_mode = True
+        self.lrm_mode = 'off'
+        self.highlighter.quote_marker = False
+        self._pending_marker_range = None
+        self.setLineWrapMode(self.WidgetWidth)
+        self.setWordWrapMode(QTextOption.WrapAnywhere)
+        self.highlighter.max_block_length = limit
+        # لا تفهرس كلمات الأسطر الطويلة جداً مع كل تعديل
+        self.word_index.set_enabled(False)
 
     def start_timer(self, timer):
         """تشغيل مؤقت محدد."""
@@ -113,21 +571,27 @@ class ArabicTextEdit(QTextEdit):
         file_type = self.highlighter.get_file_type()
         self.file_type_changed.emit(file_type)
 
+    def _add_format_menu(self, context_menu):
+        """إضافة قائمة التنسيق إلى قائمة السياق (لا تنسيق في النص العادي)."""
+        pass
+
     def contextMenuEvent(self, event):
         """إنشاء قائمة السياق عند النقر بزر الماوس الأيمن"""
         context_menu = QMenu(self)
+        context_menu.setToolTipsVisible(True)
         
         # إضافة الإجراءات الأساسية
         undo_action = QAction('تراجع', self)
         undo_action.setShortcut(QKeySequence.Undo)
         undo_action.triggered.connect(self.undo)
-        undo_action.setEnabled(self.document().isUndoAvailable())
+        undo_action.setEnabled(self.undo_store.can_undo())
+        undo_action.setToolTip(self.undo_status_text())
         context_menu.addAction(undo_action)
 
         redo_action = QAction('إعادة', self)
         redo_action.setShortcut(QKeySequence.Redo)
         redo_action.triggered.connect(self.redo)
-        redo_action.setEnabled(self.document().isRedoAvailable())
+        redo_action.setEnabled(self.undo_store.can_redo())
         context_menu.addAction(redo_action)
 
         context_menu.addSeparator()
@@ -149,6 +613,12 @@ class ArabicTextEdit(QTextEdit):
         paste_action.triggered.connect(self.paste)
         paste_action.setEnabled(self.canPaste())
         context_menu.addAction(paste_action)
+
+        paste_plain_action = QAction('لصق كنص عادي', self)
+        paste_plain_action.setShortcut('Ctrl+Shift+V')
+        paste_plain_action.triggered.connect(self.paste_plain_text)
+        paste_plain_action.setEnabled(self.canPaste())
+        context_menu.addAction(paste_plain_action)
         context_menu.addSeparator()
 
         select_all_action = QAction('تحديد الكل', self)
@@ -157,47 +627,7 @@ class ArabicTextEdit(QTextEdit):
         context_menu.addAction(select_all_action)
 
         # إضافة قائمة فرعية للتنسيق
-        format_menu = context_menu.addMenu('تنسيق')
-        
-        bold_action = QAction('عريض', self)
-        bold_action.setShortcut(QKeySequence.Bold)
-        bold_action.triggered.connect(lambda: self.main_window.format_text('bold'))
-        format_menu.addAction(bold_action)
-
-        italic_action = QAction('مائل', self)
-        italic_action.setShortcut(QKeySequence.Italic)
-        italic_action.triggered.connect(lambda: self.main_window.format_text('italic'))
-        format_menu.addAction(italic_action)
-
-        underline_action = QAction('تسطير', self)
-        underline_action.setShortcut(QKeySequence.Underline)
-        underline_action.triggered.connect(lambda: self.main_window.format_text('underline'))
-        format_menu.addAction(underline_action)
-        
-        alignment_menu = format_menu.addMenu('محاذاة')
-        
-        right_align = QAction('محاذاة لليمين', self)
-        right_align.setShortcut('Ctrl+Shift+R')
-        right_align.triggered.connect(lambda: self.main_window.format_text('align_right'))
-        alignment_menu.addAction(right_align)
-
-        # محاذاة لليسار
-        left_align = QAction('محاذاة لليسار', self)
-        left_align.setShortcut('Ctrl+Shift+L')
-        left_align.triggered.connect(lambda: self.main_window.format_text('align_left'))
-        alignment_menu.addAction(left_align)
-
-        # توسيط
-        center_align = QAction('توسيط', self)
-        center_align.setShortcut('Ctrl+Shift+E')
-        center_align.triggered.connect(lambda: self.main_window.format_text('align_center'))
-        alignment_menu.addAction(center_align)
-
-        # ضبط
-        justify_align = QAction('ضبط', self)
-        justify_align.setShortcut('Ctrl+Shift+J')
-        justify_align.triggered.connect(lambda: self.main_window.format_text('align_justify'))
-        alignment_menu.addAction(justify_align)
+        self._add_format_menu(context_menu)
 
         # إضافة قائمة فرعية للتشكيل
         diacritics_menu = context_menu.addMenu('تشكيل')
@@ -405,7 +835,7 @@ class ArabicTextEdit(QTextEdit):
         context_menu.exec_(event.globalPos())
     def apply_font_direct(self, font):
         """تطبيق الخط مباشرة بدون تكرار"""
-        if not font or font == self.font():
+        if not font or (font == self.font() and font == self.document().defaultFont()):
             return
 
         # تعطيل جميع الإشارات المتعلقة بالخط
@@ -413,17 +843,11 @@ class ArabicTextEdit(QTextEdit):
         self.blockSignals(True)
 
         try:
-            # تطبيق الخط على المحرر
+            # الخط الافتراضي للمستند يرثه كل نص لم يحدد له خط خاص، فلا حاجة
+            # لتحديد المستند كاملاً ودمج التنسيق، وتبقى تنسيقات الأحرف كما هي
             self.setFont(font)
             self.document().setDefaultFont(font)
 
-            # تطبيق على كل النص
-            cursor = self.textCursor()
-            cursor.select(QTextCursor.Document)
-            format = QTextCharFormat()
-            format.setFont(font)
-            cursor.mergeCharFormat(format)
-
         finally:
             # إعادة تفعيل الإشارات
             self.document().blockSignals(False)
@@ -434,19 +858,7 @@ class ArabicTextEdit(QTextEdit):
         return self.container
     def apply_font(self, font):
         """تطبيق الخط على المحرر والنص."""
-        if not font:
-            return
-
-        # تطبيق الخط على المحرر
-        self.setFont(font)
-        self.document().setDefaultFont(font)
-
-        # تطبيق على كل النص
-        cursor = self.textCursor()
-        cursor.select(QTextCursor.Document)
-        format = QTextCharFormat()
-        format.setFont(font)
-        cursor.mergeCharFormat(format)
+        self.apply_font_direct(font)
 
     def load_file_with_hidden_char(self, file_path):
         """تحميل الملف وإضافة حرف خفي بعد علامات التنصيص في نهاية السطر"""
@@ -455,37 +867,140 @@ class ArabicTextEdit(QTextEdit):
                 content = file.read()
             
             # إضافة الحرف الخفي بعد علامات التنصيص في نهاية السطر
-            modified_content = self.add_hidden_char_after_quotes(content)
-            self.setPlainText(modified_content)
+            if self.lrm_mode == 'document':
+                content = self.add_hidden_char_after_quotes(content)
+            self.setPlainText(content)
             self.file_path = file_path
             
             # تحديث نوع الملف
             if hasattr(self.main_window, 'statistics_manager'):
                 self.main_window.statistics_manager.set_current_editor(self)
-                self.main_window.statistics_manager.update_file_type(file_path, modified_content)
+                self.main_window.statistics_manager.update_file_type(file_path, content)
                 
         except Exception as e:
             QMessageBox.critical(self, "خطأ", f"حدث خطأ أثناء تحميل الملف: {str(e)}")
 
+    @staticmethod
+    def _needs_hidden_char(line):
+        """التحقق مما إذا كان السطر ينتهي بعلامة تنصيص تحتاج حرفاً خفياً."""
+        return line.strip().endswith('"')
+
     def add_hidden_char_after_quotes(self, text):
         """إضافة حرف خفي بعد علامات التنصيص في نهاية السطر."""
         lines = text.split('\n')
         modified_lines = []
         for line in lines:
-            if line.strip().endswith('"'):
-                line += '\u200E'  # إضافة الحرف الخفي
+            if self._needs_hidden_char(line):
+                line += HIDDEN_CHAR  # إضافة الحرف الخفي
             modified_lines.append(line)
         return '\n'.join(modified_lines)
 
-    def on_text_changed(self):
-        """معالجة التغييرات في النص."""
-        text = self.toPlainText()
-        modified_text = self.add_hidden_char_after_quotes(text)
-        if text != modified_text:
-            self.blockSignals(True)  # منع الإشارات لتجنب التكرار
-            self.setPlainText(modified_text)
-            self.blockSignals(False)
-        self.start_timer(self._file_type_update_timer)
+    def set_lrm_mode(self, mode):
+        """تغيير طريقة إضافة الحرف الخفي وإعادة تطبيقها على المستند."""
+        if mode == self.lrm_mode:
+            return
+        self.lrm_mode = mode
+        # زخرفة وضع العرض من تنسيقات الملون فيعاد تلوين المستند عند تغييرها
+        quote_marker = mode == 'view'
+        if self.highlighter.quote_marker != quote_marker:
+            self.highlighter.quote_marker = quote_marker
+            self.highlighter.rehighlight()
+        if mode == 'document':
+            self._pending_marker_range = (0, self.document().characterCount())
+            self._marker_timer.start()
+        else:
+            self._pending_marker_range = None
+
+    def _on_contents_change(self, position, removed, added):
+        """تسجيل نطاق التعديل لمعالجة الحرف الخفي في الكتل المتأثرة فقط."""
+        if self._applying_markers or self.lrm_mode != 'document':
+            return
+
+        start, end = position, position + added
+        if self._pending_marker_range:
+            # دمج النطاق المعلق مع إزاحة نهايته بمقدار التعديل الجديد
+            pending_start, pending_end = self._pending_marker_range
+            if pending_end > position:
+                pending_end = max(position, pending_end + added - removed)
+            start = min(start, pending_start)
+            end = max(end, pending_end)
+        self._pending_marker_range = (start, end)
+        self._marker_timer.start()
+
+    def _take_pending_blocks(self):
+        """أخذ ما يتسع له وقت الدورة من كتل النطاق المعلق، مع بداية ما بقي منه أو None."""
+        document = self.document()
+        start, end = self._pending_marker_range
+        self._pending_marker_range = None
+        last_position = document.characterCount() - 1
+        block = document.findBlock(min(start, last_position))
+        end_block = document.findBlock(min(end, last_position))
+        # نفس الوقت المسموح للمحمل في كل دورة، فلا يتأخر إدراج الملف ولا الكتابة
+        deadline = time.perf_counter() + INSERT_TIME_BUDGET
+        blocks = []
+        while block.isValid():
+            blocks.append(block)
+            if block == end_block:
+                break
+            block = block.next()
+            if time.perf_counter() >= deadline:
+                return blocks, (block.position(), end)
+        return blocks, None
+
+    def _apply_pending_markers(self):
+        """تطبيق قاعدة الحرف الخفي على الكتل التي تغيرت فقط."""
+        if not self._pending_marker_range:
+            return
+        if self.loader is not None:
+            # الملف قد يتبين أثناء تحميله أن فيه أسطراً طويلة فيحفظ دون الحرف الخفي
+            QTimer.singleShot(LOADING_RETRY_DELAY, self._marker_timer.start)
+            return
+
+        blocks, rest = self._take_pending_blocks()
+        # مواضع نهايات الكتل التي تحتاج إلى الحرف الخفي
+        positions = [
+            block.position() + block.length() - 1
+            for block in blocks
+            if self._needs_hidden_char(block.text())
+        ]
+        if positions:
+            self._insert_hidden_chars(positions)
+
+        if rest:
+            # الحروف المضافة كلها قبل بقية النطاق فتزاح بعددها
+            self._pending_marker_range = (rest[0] + len(positions), rest[1] + len(positions))
+            self._marker_timer.start()
+
+    def _insert_hidden_chars(self, positions):
+        """إضافة الحرف الخفي في المواضع المعطاة مع إبقاء المؤشر وحالة التعديل."""
+        document = self.document()
+        was_modified = document.isModified()
+        view_cursor = self.textCursor()
+        cursor_position, cursor_anchor = view_cursor.position(), view_cursor.anchor()
+
+        # الإضافة تلحق بآخر خطوة تراجع فيتراجع عنها مع التعديل الذي سببها،
+        # وعند التحميل لا يوجد سجل تراجع فلا تسجل فيه
+        self._applying_markers = True
+        try:
+            cursor = QTextCursor(document)
+            cursor.beginEditBlock()
+            for position in reversed(positions):
+                cursor.setPosition(position)
+                cursor.insertText(HIDDEN_CHAR)
+            cursor.endEditBlock()
+        finally:
+            self._applying_markers = False
+
+        if not was_modified:
+            document.setModified(False)
+
+        # إبقاء مؤشر الكتابة قبل الحرف الخفي بدلاً من تجاوزه
+        def shifted(position):
+            return position + sum(1 for p in positions if p < position)
+
+        view_cursor.setPosition(shifted(cursor_anchor))
+        view_cursor.setPosition(shifted(cursor_position), QTextCursor.KeepAnchor)
+        self.setTextCursor(view_cursor)
 
     def focusInEvent(self, event):
         """معالجة حدث التركيز على المحرر"""
@@ -493,3 +1008,60 @@ class ArabicTextEdit(QTextEdit):
         # تحديث المحرر الحالي في مدير الإحصائيات
         if hasattr(self.main_window, 'statistics_manager'):
             self.main_window.statistics_manager.set_current_editor(self)
+
+
+class ArabicTextEdit(ArabicEditorMixin, QTextEdit):
+    file_type_changed = pyqtSignal(str)  # إشارة عند تغيير نوع الملف
+
+    def __init__(self, main_window):
+        super().__init__()
+        self._init_editor(main_window)
+
+    def setup_editor(self):
+        """إعدادات المحرر الأساسية مع دعم النص المنسق."""
+        super().setup_editor()
+        self.setAcceptRichText(True)
+
+    def _add_format_menu(self, context_menu):
+        """إضافة قائمة التنسيق إلى قائمة السياق."""
+        format_menu = context_menu.addMenu('تنسيق')
+        
+        bold_action = QAction('عريض', self)
+        bold_action.setShortcut(QKeySequence.Bold)
+        bold_action.triggered.connect(lambda: self.main_window.format_text('bold'))
+        format_menu.addAction(bold_action)
+
+        italic_action = QAction('مائل', self)
+        italic_action.setShortcut(QKeySequence.Italic)
+        italic_action.triggered.connect(lambda: self.main_window.format_text('italic'))
+        format_menu.addAction(italic_action)
+
+        underline_action = QAction('تسطير', self)
+        underline_action.setShortcut(QKeySequence.Underline)
+        underline_action.triggered.connect(lambda: self.main_window.format_text('underline'))
+        format_menu.addAction(underline_action)
+        
+        alignment_menu = format_menu.addMenu('محاذاة')
+        
+        right_align = QAction('محاذاة لليمين', self)
+        right_align.setShortcut('Ctrl+Shift+R')
+        right_align.triggered.connect(lambda: self.main_window.format_text('align_right'))
+        alignment_menu.addAction(right_align)
+
+        # محاذاة لليسار
+        left_align = QAction('محاذاة لليسار', self)
+        left_align.setShortcut('Ctrl+Shift+L')
+        left_align.triggered.connect(lambda: self.main_window.format_text('align_left'))
+        alignment_menu.addAction(left_align)
+
+        # توسيط
+        center_align = QAction('توسيط', self)
+        center_align.setShortcut('Ctrl+Shift+E')
+        center_align.triggered.connect(lambda: self.main_window.format_text('align_center'))
+        alignment_menu.addAction(center_align)
+
+        # ضبط
+        justify_align = QAction('ضبط', self)
+        justify_align.setShortcut('Ctrl+Shift+J')
+        justify_align.triggered.connect(lambda: self.main_window.format_text('align_justify'))
+        alignment_menu.addAction(justify_align)
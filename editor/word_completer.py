@@ -0,0 +1,84 @@
+import re
+from PyQt5.QtWidgets import QCompleter
+from PyQt5.QtCore import QObject, QStringListModel, Qt
+from PyQt5.QtGui import QTextCursor
+from utils.word_index import WORD, shared_word_trie
+
+# أقل عدد من الأحرف قبل إظهار الاقتراحات، وأقصى عدد للاقتراحات
+MIN_PREFIX_LENGTH = 2
+MAX_SUGGESTIONS = 10
+
+# الكلمة التي تنتهي عند المؤشر
+PREFIX_PATTERN = re.compile(f'(?:{WORD})$')
+
+# المفاتيح التي تعالجها قائمة الاقتراحات عند ظهورها
+POPUP_KEYS = (Qt.Key_Enter, Qt.Key_Return, Qt.Key_Escape, Qt.Key_Tab, Qt.Key_Backtab)
+
+
+class WordCompleter(QObject):
+    """قائمة إكمال الكلمات من كلمات جميع التبويبات المفتوحة.
+
+    الاقتراحات تؤخذ من شجرة الكلمات المشتركة بالبادئة المكتوبة دون اعتبار
+    للتشكيل، فلا يمر على نص أي مستند أثناء الكتابة.
+    """
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.enabled = True
+        self._prefix = ''
+        self.model = QStringListModel(self)
+        self.completer = QCompleter(self.model, editor)
+        self.completer.setWidget(editor)
+        # الاقتراحات مرشحة مسبقاً دون اعتبار للتشكيل، فلا يعاد ترشيحها
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(MAX_SUGGESTIONS)
+        self.completer.activated[str].connect(self.insert_completion)
+
+    def handles_key(self, event):
+        """مفاتيح الاختيار والإغلاق تترك للقائمة عند ظهورها."""
+        if self.completer.popup().isVisible() and event.key() in POPUP_KEYS:
+            event.ignore()
+            return True
+        return False
+
+    def hide(self):
+        self.completer.popup().hide()
+
+    def word_before_cursor(self):
+        cursor = self.editor.textCursor()
+        text = cursor.block().text()[:cursor.positionInBlock()]
+        match = PREFIX_PATTERN.search(text)
+        return match.group() if match else ''
+
+    def on_key_typed(self, event):
+        """تحديث الاقتراحات بعد كتابة حرف."""
+        typed = event.text()
+        if (not self.enabled or not typed or not typed.isprintable()
+                or event.modifiers() & (Qt.ControlModifier | Qt.AltModifier)
+                or self.editor.textCursor().hasSelection()):
+            self.hide()
+            return
+        prefix = self.word_before_cursor()
+        suggestions = shared_word_trie().complete(prefix, MAX_SUGGESTIONS) if len(prefix) >= MIN_PREFIX_LENGTH else []
+        if not suggestions:
+            self.hide()
+            return
+
+        self._prefix = prefix
+        self.model.setStringList(suggestions)
+        popup = self.completer.popup()
+        rect = self.editor.cursorRect()
+        rect.setWidth(popup.sizeHintForColumn(0) + popup.verticalScrollBar().sizeHint().width())
+        self.completer.complete(rect)
+        popup.setCurrentIndex(self.model.index(0, 0))
+
+    def insert_completion(self, word):
+        """استبدال البادئة المكتوبة بالكلمة المختارة بتشكيلها."""
+        cursor = self.editor.textCursor()
+        # تحديد البادئة بمواضع الأحرف لا باتجاه العرض حتى يصح في النص العربي
+        position = cursor.position()
+        cursor.setPosition(max(0, position - len(self._prefix)))
+        cursor.setPosition(position, QTextCursor.KeepAnchor)
+        cursor.insertText(word)
+        self.editor.setTextCursor(cursor)
@@ -51,6 +51,14 @@ def main():
         
         editor.show()
         log_in_arabic(logger, logging.INFO, "تم عرض المحرر")
+
+        # استعادة تبويبات الجلسة السابقة
+        editor.restore_session()
+
+        # فتح الملفات الممررة من سطر الأوامر دفعة واحدة
+        file_paths = [path for path in sys.argv[1:] if os.path.exists(path)]
+        if file_paths:
+            editor.tab_manager.open_files(file_paths)
         
         return app.exec_()
     except Exception as e:
@@ -0,0 +1,53 @@
+import os
+import sys
+import shutil
+import logging
+import tempfile
+
+import pytest
+
+# تشغيل Qt دون شاشة، واستيراد وحدات المشروع من جذره
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_log_dir = None
+
+
+def pytest_configure(config):
+    """كتابة سجلات الاختبارات في مجلد مؤقت بدلاً من ملف سجلات البرنامج."""
+    global _log_dir
+    from utils import arabic_logger
+    _log_dir = tempfile.mkdtemp(prefix='qirtas-tests-')
+    arabic_logger.get_log_path = lambda: os.path.join(_log_dir, 'سجلات.log')
+
+
+def pytest_unconfigure(config):
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
+    if _log_dir:
+        shutil.rmtree(_log_dir, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def qapp():
+    """تطبيق Qt واحد لكل الاختبارات التي تحتاج مستندات أو مؤقتات."""
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    yield app
+
+
+def process_events_until(app, condition, timeout=2.0):
+    """معالجة أحداث Qt حتى يتحقق الشرط أو تنتهي المهلة."""
+    import time
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    return condition()
+
+
+def process_events_for(app, seconds):
+    """معالجة أحداث Qt مدة محددة."""
+    process_events_until(app, lambda: False, timeout=seconds)
@@ -0,0 +1,99 @@
+import random
+
+from PyQt5.QtGui import QTextDocument, QTextCursor
+
+from utils import bracket_index
+from utils.change_bus import DocumentChangeBus
+from utils.bracket_index import BracketIndex, BRACKET_PAIRS, OPENERS, CLOSERS, summarize_block, combine
+
+ALPHABET = 'ab\n' + ''.join(BRACKET_PAIRS) + ''.join(BRACKET_PAIRS.values())
+
+
+def _brute_match(text, position):
+    """القوس المقابل بالمرور على النص كله."""
+    char = text[position]
+    if char in OPENERS:
+        kind, step, indexes = OPENERS[char], 1, range(position, len(text))
+    elif char in CLOSERS:
+        kind, step, indexes = CLOSERS[char], -1, range(position, -1, -1)
+    else:
+        return None
+    depth = 0
+    for index in indexes:
+        if OPENERS.get(text[index]) == kind:
+            depth += step
+        elif CLOSERS.get(text[index]) == kind:
+            depth -= step
+        if not depth:
+            return index
+    return None
+
+
+def _random_text(rng, size):
+    return ''.join(rng.choice(ALPHABET) for _ in range(size))
+
+
+def _check(index, document):
+    text = document.toPlainText()
+    for position, char in enumerate(text):
+        if char in OPENERS or char in CLOSERS:
+            assert index.match(position) == _brute_match(text, position), (text, position)
+
+
+def test_match_follows_random_edits(qapp):
+    rng = random.Random(24)
+    document = QTextDocument()
+    document.documentLayout()
+    index = BracketIndex(document, DocumentChangeBus(document))
+    document.setPlainText(_random_text(rng, 200))
+    _check(index, document)
+    cursor = QTextCursor(document)
+    for _ in range(150):
+        length = document.characterCount() - 1
+        start = rng.randint(0, length)
+        end = min(length, start + rng.randint(0, 6))
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(_random_text(rng, rng.randint(0, 8)))
+        _check(index, document)
+
+
+def test_index_built_in_slices_follows_edits(qapp, monkeypatch):
+    # كل دفعة تقرأ أربع كتل فقط، فيمتد البناء على دورات كثيرة تتخللها التعديلات
+    monkeypatch.setattr(bracket_index, 'BUILD_STEP_BLOCKS', 4)
+    monkeypatch.setattr(bracket_index, 'BUILD_STEP_BUDGET', 0)
+    rng = random.Random(26)
+    document = QTextDocument()
+    document.documentLayout()
+    ready = []
+    index = BracketIndex(document, DocumentChangeBus(document), ready=lambda: ready.append(True))
+    document.setPlainText(_random_text(rng, 600))
+    assert not index._ensure_built()
+
+    cursor = QTextCursor(document)
+    while not ready:
+        length = document.characterCount() - 1
+        start = rng.randint(0, length)
+        cursor.setPosition(start)
+        cursor.setPosition(min(length, start + rng.randint(0, 6)), QTextCursor.KeepAnchor)
+        cursor.insertText(_random_text(rng, rng.randint(0, 8)))
+        qapp.processEvents()
+    _check(index, document)
+
+
+def test_combine_matches_summary_of_joined_text():
+    rng = random.Random(25)
+    for _ in range(500):
+        first = _random_text(rng, rng.randint(0, 10)).replace('\n', '')
+        second = _random_text(rng, rng.randint(0, 10)).replace('\n', '')
+        assert combine(summarize_block(first), summarize_block(second)) == summarize_block(first + second)
+
+
+def test_quotes_pair_within_line(qapp):
+    document = QTextDocument()
+    document.setPlainText('قال "نعم" و"لا\\" بعد"\n"')
+    index = BracketIndex(document)
+    text = document.toPlainText()
+    assert index.match(text.index('"')) == text.index('"', text.index('"') + 1)
+    # العلامة الأخيرة في السطر الأول لا تقابل علامة السطر التالي
+    assert index.match(len(text) - 1) is None
@@ -0,0 +1,87 @@
+from PyQt5.QtCore import QObject
+from PyQt5.QtGui import QTextDocument, QTextCursor
+
+from utils.change_bus import DocumentChangeBus, DEBOUNCED, IDLE
+from conftest import process_events_until
+
+
+def _document():
+    document = QTextDocument()
+    # المستند دون تخطيط لا يرسل contentsChange
+    document.documentLayout()
+    return document
+
+
+def _insert(document, position, text):
+    cursor = QTextCursor(document)
+    cursor.setPosition(position)
+    cursor.insertText(text)
+
+
+def test_sync_subscribers_run_by_priority(qapp):
+    document = _document()
+    bus = DocumentChangeBus(document)
+    owner = QObject()
+    calls = []
+    bus.subscribe(owner, 'late', lambda delta: calls.append('late'), priority=30)
+    bus.subscribe(owner, 'first', lambda delta: calls.append('first'), priority=10)
+    bus.subscribe(owner, 'default', lambda delta: calls.append('default'))
+    bus.subscribe(owner, 'middle', lambda delta: calls.append('middle'), priority=20)
+    _insert(document, 0, 'ن')
+    assert calls == ['first', 'middle', 'late', 'default']
+
+
+def test_resubscribe_replaces_previous_callback(qapp):
+    document = _document()
+    bus = DocumentChangeBus(document)
+    owner = QObject()
+    calls = []
+    bus.subscribe(owner, 'mirror', lambda delta: calls.append('old'))
+    bus.subscribe(owner, 'mirror', lambda delta: calls.append('new'))
+    _insert(document, 0, 'x')
+    assert calls == ['new']
+
+
+def test_deltas_carry_positions_and_revisions(qapp):
+    document = _document()
+    bus = DocumentChangeBus(document)
+    owner = QObject()
+    deltas = []
+    bus.subscribe(owner, 'mirror', deltas.append)
+    _insert(document, 0, 'abc')
+    _insert(document, 1, 'ج')
+    assert [(delta.position, delta.added) for delta in deltas] == [(0, 3), (1, 1)]
+    assert [delta.revision for delta in deltas] == [1, 2]
+    assert bus.revision == 2
+
+
+def test_idle_and_debounced_receive_batches_in_order(qapp):
+    document = _document()
+    bus = DocumentChangeBus(document)
+    owner = QObject()
+    idle, debounced = [], []
+    bus.subscribe(owner, 'idle', idle.append, mode=IDLE)
+    bus.subscribe(owner, 'debounced', debounced.append, mode=DEBOUNCED, delay=20)
+    for index in range(5):
+        _insert(document, index, str(index))
+
+    assert process_events_until(qapp, lambda: idle and debounced)
+    assert len(idle) == 1 and len(debounced) == 1
+    assert [delta.revision for delta in idle[0]] == [1, 2, 3, 4, 5]
+    assert [delta.revision for delta in debounced[0]] == [1, 2, 3, 4, 5]
+
+
+def test_failing_subscriber_stays_subscribed(qapp):
+    document = _document()
+    bus = DocumentChangeBus(document)
+    owner = QObject()
+    calls = []
+
+    def callback(delta):
+        calls.append(delta)
+        raise RuntimeError('خطأ في الاختبار')
+
+    bus.subscribe(owner, 'mirror', callback)
+    _insert(document, 0, 'a')
+    _insert(document, 1, 'b')
+    assert len(calls) == 2
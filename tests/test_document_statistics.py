@@ -0,0 +1,73 @@
+import random
+
+from PyQt5.QtGui import QTextDocument, QTextCursor
+from PyQt5.QtWidgets import QMainWindow
+
+from editor import text_widget
+from editor.text_widget import ArabicTextEdit, HIDDEN_CHAR
+from utils.change_bus import DocumentChangeBus
+from utils.document_statistics import DocumentStatistics
+from conftest import process_events_until
+
+PIECES = ['كتاب', 'ab', '"', ' ', '  ', '\n', '\t', 'x"']
+
+
+def test_statistics_follow_random_edits(qapp):
+    rng = random.Random(6)
+    document = QTextDocument()
+    document.documentLayout()
+    statistics = DocumentStatistics(document, DocumentChangeBus(document))
+
+    cursor = QTextCursor(document)
+    for step in range(200):
+        length = document.characterCount() - 1
+        start = rng.randint(0, length)
+        cursor.setPosition(start)
+        cursor.setPosition(min(length, start + rng.randint(0, 10)), QTextCursor.KeepAnchor)
+        size = 300 if step % 40 == 0 else rng.randint(0, 5)
+        cursor.insertText(''.join(rng.choice(PIECES) for _ in range(size)))
+
+        text = document.toPlainText()
+        assert statistics.stats() == {
+            'chars': len(text),
+            'words': len(text.split()),
+            'lines': text.count('\n') + 1,
+        }
+
+
+def test_markers_applied_across_turns(qapp, monkeypatch):
+    # لا وقت لأي دورة، فتعالج كل دورة كتلة واحدة
+    monkeypatch.setattr(text_widget, 'INSERT_TIME_BUDGET', 0)
+    window = QMainWindow()
+    editor = ArabicTextEdit(window)
+    lines = ['قال "نعم"' if number % 3 == 0 else 'سطر' for number in range(60)]
+    editor.setPlainText('\n'.join(lines))
+
+    assert editor._pending_marker_range is not None
+    qapp.processEvents()
+    assert editor._pending_marker_range is not None
+    assert process_events_until(qapp, lambda: editor._pending_marker_range is None)
+    assert editor.toPlainText().split('\n') == [
+        line + HIDDEN_CHAR if line.endswith('"') else line for line in lines
+    ]
+    window.deleteLater()
+
+
+def test_view_mode_marks_quotes_without_changing_text(qapp):
+    window = QMainWindow()
+    editor = ArabicTextEdit(window)
+    editor.set_lrm_mode('view')
+    text = 'قال "نعم"\nسطر'
+    editor.setPlainText(text)
+    process_events_until(qapp, lambda: editor._pending_marker_range is None)
+
+    assert editor.toPlainText() == text
+    block = editor.document().firstBlock()
+    quote = len(block.text()) - 1
+    formats = [
+        range_.format for range_ in block.layout().formats()
+        if range_.start <= quote < range_.start + range_.length
+    ]
+    assert any(format.underlineStyle() == format.DotLine for format in formats)
+    assert not block.layout().preeditAreaText()
+    window.deleteLater()
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from utils import file_loader
+from utils.file_loader import has_long_lines, read_text_file, LINE_BREAKS
+
+
+def _longest_line(data):
+    return max(len(line) for line in LINE_BREAKS.split(data))
+
+
+@pytest.mark.parametrize('block_size', [1, 7, 64])
+def test_has_long_lines_matches_longest_line(tmp_path, monkeypatch, block_size):
+    # أجزاء قراءة صغيرة حتى تقع حدود الأسطر في كل موضع من الجزء
+    monkeypatch.setattr(file_loader, 'READ_BLOCK_SIZE', block_size)
+    rng = random.Random(18)
+    path = tmp_path / 'lines.txt'
+    for _ in range(300):
+        data = b''.join(rng.choice([b'a', b'\xd8\xa8', b'\n', b'\r\n', b'\r']) for _ in range(rng.randint(0, 60)))
+        path.write_bytes(data)
+        limit = rng.randint(1, 20)
+        expected = _longest_line(data) > limit
+        assert has_long_lines(str(path), limit) == expected, (data, limit)
+
+
+def test_file_smaller_than_limit(tmp_path):
+    path = tmp_path / 'short.txt'
+    path.write_bytes(b'x' * 10)
+    assert not has_long_lines(str(path), 10)
+    assert has_long_lines(str(path), 9)
+
+
+def test_carriage_return_ends_line(tmp_path):
+    path = tmp_path / 'mac.txt'
+    path.write_bytes(b'x' * 8 + b'\r' + b'y' * 8)
+    assert not has_long_lines(str(path), 8)
+
+
+def test_read_text_file_reports_long_lines(tmp_path):
+    path = tmp_path / 'lines.txt'
+    path.write_bytes('سطر\r\n'.encode('utf-8') * 3 + b'z' * 30 + b'\n')
+    text, encoding, line_ending, long_lines = read_text_file(str(path), long_line_limit=20)
+    assert (encoding, line_ending, long_lines) == ('UTF-8', '\r\n', True)
+    assert text.startswith('سطر\nسطر\n')
+    assert not read_text_file(str(path), long_line_limit=30)[3]
+    # دون حد لا تفحص الأسطر
+    assert not read_text_file(str(path))[3]
+
+
+def test_background_loader_reports_long_lines_before_inserting_them(qapp, tmp_path):
+    from PyQt5.QtWidgets import QMainWindow
+    from editor.plain_text_widget import ArabicPlainTextEdit
+    from utils.background_loader import BackgroundFileLoader
+    from conftest import process_events_until
+
+    path = tmp_path / 'minified.json'
+    path.write_bytes(b'{}\n' * 10 + b'[' + b'1,' * 40 + b'1]\n')
+    window = QMainWindow()
+    editor = ArabicPlainTextEdit(window)
+    loader = BackgroundFileLoader(editor, str(path), long_line_limit=50)
+    reported, done = [], []
+    loader.long_lines_found.connect(lambda: reported.append(editor.toPlainText()))
+    loader.finished.connect(lambda *_: done.append(True))
+    loader.start()
+    assert process_events_until(qapp, lambda: done)
+    assert len(reported) == 1 and '1,1' not in reported[0]
+    assert editor.toPlainText().endswith('1,1]\n')
+    window.deleteLater()
@@ -0,0 +1,36 @@
+import re
+import random
+
+import pytest
+
+from utils.file_saver import iter_transcoded
+
+
+def _expected(text, line_ending):
+    return re.sub('\r\n|\r', '\n', text).replace('\n', line_ending)
+
+
+def _random_chunks(rng, text):
+    """تقسيم النص في مواضع عشوائية، منها ما يقع بين CR و LF."""
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 8))))
+    bounds = [0] + cuts + [len(text)]
+    return [text[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+@pytest.mark.parametrize('line_ending', ['\n', '\r\n', '\r'])
+def test_random_chunks_match_whole_text(line_ending):
+    rng = random.Random(14)
+    for _ in range(500):
+        text = ''.join(rng.choice(['a', 'ب', '\r', '\n', '\r\n']) for _ in range(rng.randint(0, 20)))
+        chunks = _random_chunks(rng, text)
+        assert ''.join(iter_transcoded(chunks, line_ending)) == _expected(text, line_ending)
+
+
+def test_crlf_split_across_chunks_is_one_line_ending():
+    assert ''.join(iter_transcoded(['سطر\r', '\nتالٍ'], '\r\n')) == 'سطر\r\nتالٍ'
+    assert ''.join(iter_transcoded(['a\r', '', '\nb'])) == 'a\nb'
+
+
+def test_trailing_cr_is_flushed():
+    assert ''.join(iter_transcoded(['a\r'], '\r\n')) == 'a\r\n'
+    assert ''.join(iter_transcoded(['a\r', '\r'])) == 'a\n\n'
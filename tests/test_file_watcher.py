@@ -0,0 +1,60 @@
+import os
+
+import pytest
+from PyQt5.QtWidgets import QMainWindow
+
+from editor.text_widget import ArabicTextEdit
+from utils.file_watcher import FileWatcher
+from utils.save_service import SaveService
+from conftest import process_events_until, process_events_for
+
+
+@pytest.fixture
+def watched_editor(qapp, tmp_path):
+    """محرر لملف مراقب، وفي سجل تراجعه تعديل واحد."""
+    path = tmp_path / 'ملف.txt'
+    path.write_text('سطر أول\n', encoding='utf-8')
+    window = QMainWindow()
+    editor = ArabicTextEdit(window)
+    editor.setPlainText(path.read_text(encoding='utf-8'))
+    editor.document().setModified(False)
+    watcher = FileWatcher()
+    watcher.add_file(str(path), editor)
+    editor.textCursor().insertText('جديد ')
+    yield str(path), editor, watcher
+    watcher.update_timer.stop()
+    window.deleteLater()
+
+
+def test_own_save_keeps_undo_history(qapp, watched_editor):
+    path, editor, watcher = watched_editor
+    service = SaveService()
+    service.saved.connect(lambda editor, file_path: watcher.mark_saved(file_path))
+    service.save(editor, path)
+    assert service.flush(5)
+    # مهلة تكفي لفحص المراقب وتطبيق أي تحديث معلق
+    process_events_for(qapp, 2.5)
+    service.shutdown()
+
+    assert not editor.document().isModified()
+    assert editor.undo_store.can_undo()
+    assert editor.toPlainText() == 'جديد سطر أول\n'
+
+
+def test_write_matching_editor_text_is_not_reloaded(qapp, watched_editor):
+    path, editor, watcher = watched_editor
+    # كتابة نص المحرر دون المرور بخدمة الحفظ، كأن تصل إشارة المراقب قبل إشارة الحفظ
+    with open(path, 'w', encoding='utf-8', newline='') as file:
+        file.write(editor.toPlainText())
+    editor.document().setModified(False)
+    process_events_for(qapp, 2.5)
+    assert editor.undo_store.can_undo()
+
+
+def test_external_change_reloads_unmodified_editor(qapp, watched_editor):
+    path, editor, watcher = watched_editor
+    editor.document().setModified(False)
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write('نص من برنامج آخر\n')
+    os.utime(path)
+    assert process_events_until(qapp, lambda: editor.toPlainText() == 'نص من برنامج آخر\n', timeout=4)
@@ -0,0 +1,80 @@
+import random
+
+from utils.piece_table import PieceTable, MAX_CHUNK
+
+ALPHABET = 'ab ج\nد'
+
+
+def _random_text(rng, size):
+    return ''.join(rng.choice(ALPHABET) for _ in range(size))
+
+
+def _check_lines(table, text):
+    """مقارنة دوال الأسطر بتقسيم النص مباشرة."""
+    lines = text.split('\n')
+    assert table.line_count() == len(lines)
+    assert list(table.iter_lines()) == lines
+    offset = 0
+    for number, line in enumerate(lines):
+        assert table.offset_of_line(number) == offset
+        assert table.line(number) == line
+        offset += len(line) + 1
+    for position in range(len(text) + 1):
+        assert table.line_of_offset(position) == text.count('\n', 0, position)
+
+
+def test_insert_and_delete_match_string():
+    rng = random.Random(4)
+    table = PieceTable(_random_text(rng, 50))
+    text = table.text()
+    for _ in range(400):
+        position = rng.randint(0, len(text))
+        operation = rng.random()
+        if operation < 0.5:
+            inserted = _random_text(rng, rng.randint(1, 12))
+            table.insert(position, inserted)
+            text = text[:position] + inserted + text[position:]
+        elif operation < 0.8:
+            length = rng.randint(0, 15)
+            table.delete(position, length)
+            text = text[:position] + text[position + length:]
+        else:
+            removed = rng.randint(0, 6)
+            inserted = _random_text(rng, rng.randint(0, 6))
+            table.replace(position, removed, inserted)
+            text = text[:position] + inserted + text[position + removed:]
+        assert table.text() == text
+        assert len(table) == len(text)
+    _check_lines(table, text)
+
+
+def test_range_and_chunks():
+    rng = random.Random(7)
+    text = _random_text(rng, MAX_CHUNK * 3 + 17)
+    table = PieceTable(text)
+    for _ in range(50):
+        start = rng.randint(0, len(text))
+        end = rng.randint(start, len(text))
+        assert table.text(start, end) == text[start:end]
+        assert ''.join(table.iter_chunks(start, end)) == text[start:end]
+    _check_lines(table, text)
+
+
+def test_snapshot_is_unchanged_by_later_edits():
+    table = PieceTable('السطر الأول\nالثاني')
+    snapshot = table.snapshot()
+    table.insert(0, 'جديد\n')
+    table.delete(len(table) - 3, 3)
+    assert snapshot.text() == 'السطر الأول\nالثاني'
+    assert snapshot.line(1) == 'الثاني'
+    assert snapshot.revision < table.revision
+
+
+def test_empty_table():
+    table = PieceTable()
+    assert table.text() == ''
+    assert table.line_count() == 1
+    assert list(table.iter_lines()) == ['']
+    table.insert(0, '\n')
+    assert table.line_count() == 2
+    assert table.offset_of_line(1) == 1
@@ -0,0 +1,109 @@
+import pytest
+from PyQt5.QtWidgets import QMainWindow
+from PyQt5.QtGui import QTextCursor
+
+from editor.tab_manager import TabManager
+from conftest import process_events_until
+
+
+@pytest.fixture
+def tab_manager(qapp):
+    """مدير تبويبات في نافذة رئيسية دون إعدادات ولا إضافات."""
+    window = QMainWindow()
+    manager = TabManager(window)
+    window.tab_manager = manager
+    yield manager
+    window.deleteLater()
+    qapp.processEvents()
+
+
+def test_duplicate_tab_and_split_view_share_document(qapp, tab_manager):
+    editor = tab_manager.new_tab()
+    editor.setPlainText('(أ\nب)')
+
+    tab_manager.duplicate_tab(0)
+    tab_manager.toggle_split_view(0)
+    qapp.processEvents()
+    duplicate = tab_manager.editor_at(1)
+    split_view = tab_manager.widget(0).split_view
+
+    for view in (duplicate, split_view):
+        assert view.document() is editor.document()
+        assert view.bracket_index is editor.bracket_index
+        # تحريك المؤشر يميز القوس المقابل عبر فهرس المستند المشترك
+        cursor = view.textCursor()
+        cursor.setPosition(0)
+        view.setTextCursor(cursor)
+        assert view.bracket_index.match(0) == len('(أ\nب')
+
+    cursor = QTextCursor(split_view.document())
+    cursor.movePosition(QTextCursor.End)
+    cursor.insertText('ج')
+    assert duplicate.toPlainText() == editor.toPlainText() == '(أ\nب)ج'
+    assert str(editor.snapshot()) == '(أ\nب)ج'
+
+    tab_manager.toggle_split_view(0)
+    qapp.processEvents()
+    assert split_view not in editor.document_views
+
+
+def test_file_with_long_lines_opens_in_guarded_plain_editor(qapp, tab_manager, tmp_path):
+    from editor.plain_text_widget import ArabicPlainTextEdit
+    path = tmp_path / 'bundle.rb'
+    path.write_bytes(b'x = 1\r' + b'y' * 30000 + b'\r')
+    editor = tab_manager.open_file(str(path))
+    assert isinstance(editor, ArabicPlainTextEdit)
+    assert editor.long_line_mode
+
+    short = tmp_path / 'short.rb'
+    short.write_text('x = 1\n')
+    editor = tab_manager.open_file(str(short))
+    assert not isinstance(editor, ArabicPlainTextEdit)
+    assert not editor.long_line_mode
+
+
+def test_save_as_moves_tab_only_after_successful_save(qapp, tab_manager, tmp_path):
+    from utils.save_service import SaveService
+    old_path = tmp_path / 'قديم.rb'
+    old_path.write_text('x = 1\n')
+    editor = tab_manager.open_file(str(old_path))
+    service = SaveService()
+    service.saved.connect(tab_manager.move_to_saved_path)
+
+    # فشل الحفظ يبقي التبويب على مساره
+    failed = []
+    service.failed.connect(lambda *args: failed.append(args))
+    service.save(editor, str(tmp_path / 'لا يوجد' / 'جديد.rb'))
+    assert not service.flush(5)
+    assert process_events_until(qapp, lambda: failed)
+    assert editor.file_path == str(old_path)
+
+    new_path = str(tmp_path / 'جديد.rb')
+    service.save(editor, new_path)
+    assert service.flush(5)
+    assert process_events_until(qapp, lambda: editor.file_path == new_path)
+    service.shutdown()
+    assert tab_manager.file_paths[editor] == new_path
+    assert tab_manager._find_file_tab(new_path) == tab_manager.tab_index_of(editor)
+    assert tab_manager._find_file_tab(str(old_path)) == -1
+    assert tab_manager.tabText(tab_manager.tab_index_of(editor)) == 'جديد.rb'
+
+
+def test_restored_tab_keeps_modified_state(qapp, tab_manager, tmp_path):
+    saved = tmp_path / 'محفوظ.rb'
+    saved.write_text('x = 1\n')
+    tab_manager.closed_tabs.push({'text': 'x = 1\n', 'file_path': str(saved), 'tab_name': 'محفوظ.rb',
+                                  'plain_text': False, 'cursor_position': 2}, modified=False)
+    tab_manager.closed_tabs.push({'text': 'مسودة', 'file_path': None, 'tab_name': 'مستند 1',
+                                  'plain_text': False, 'cursor_position': 3}, modified=True)
+
+    tab_manager.restore_last_closed_tab()
+    draft = tab_manager.get_current_editor()
+    assert draft.toPlainText() == 'مسودة'
+    assert draft.document().isModified()
+    assert draft.textCursor().position() == 3
+
+    tab_manager.restore_last_closed_tab()
+    editor = tab_manager.get_current_editor()
+    assert editor.toPlainText() == 'x = 1\n'
+    assert not editor.document().isModified()
@@ -0,0 +1,74 @@
+import random
+from collections import Counter
+
+from PyQt5.QtGui import QTextDocument, QTextCursor
+
+from utils.change_bus import DocumentChangeBus
+from utils.word_index import DocumentWordIndex, WordTrie, normalize_word, count_words
+from conftest import process_events_until
+
+WORDS = ['كتاب', 'كاتب', 'مكتبة', 'أحمد', 'احمد', 'editor', 'Editor', 'ab', 'x1y']
+
+
+def _trie_counts(trie):
+    """كل صور الكلمات في الشجرة وعدد مرات كل منها."""
+    counts = Counter()
+    nodes = [trie._root]
+    while nodes:
+        node = nodes.pop()
+        if node.forms:
+            counts.update(node.forms)
+        nodes.extend(node.children.values())
+    return counts
+
+
+def test_normalize_word():
+    assert normalize_word('أَحْمَـد') == 'احمد'
+    assert normalize_word('إسلام') == normalize_word('اسلام')
+    assert normalize_word('Editor') == 'editor'
+
+
+def test_count_words():
+    assert count_words('كتب الكاتبُ كتب 12 ab abc') == Counter({'كتب': 2, 'الكاتبُ': 1, 'abc': 1})
+    assert count_words('في ab 123') is None
+
+
+def test_trie_completes_by_frequency():
+    trie = WordTrie()
+    trie.add('كتاب', 3)
+    trie.add('كتابة', 1)
+    trie.add('كتب', 2)
+    assert trie.complete('كت') == ['كتاب', 'كتب', 'كتابة']
+    # البادئة نفسها لا تقترح
+    assert trie.complete('كتب') == []
+    trie.add('كتاب', -3)
+    assert trie.complete('كت') == ['كتب', 'كتابة']
+    assert trie.word_count == 2
+
+
+def test_document_index_follows_random_edits(qapp):
+    rng = random.Random(25)
+    document = QTextDocument()
+    document.documentLayout()
+    trie = WordTrie()
+    index = DocumentWordIndex(document, DocumentChangeBus(document), trie=trie)
+
+    def random_text(size):
+        return ''.join(rng.choice(WORDS + [' ', '\n']) for _ in range(size))
+
+    cursor = QTextCursor(document)
+    for step in range(200):
+        length = document.characterCount() - 1
+        start = rng.randint(0, length)
+        end = min(length, start + rng.randint(0, 10))
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        # لصق نص طويل أحياناً حتى تفهرس كتله على دفعات
+        cursor.insertText(random_text(400 if step % 25 == 0 else rng.randint(0, 4)))
+
+    assert process_events_until(qapp, lambda: not index.pending_blocks() and not index._retired)
+    assert _trie_counts(trie) == (count_words(document.toPlainText()) or Counter())
+
+    index.release()
+    assert _trie_counts(trie) == Counter()
+    assert trie.word_count == 0
@@ -1,6 +1,10 @@
-from PyQt5.QtCore import QObject, QTimer
+from PyQt5.QtCore import QObject
+from utils.change_bus import DEBOUNCED
 import os
 
+# تأخير الحفظ التلقائي بعد آخر تعديل (بالمللي ثانية)
+AUTO_SAVE_DELAY = 1000
+
 
 class AutoSaver(QObject):
     def __init__(self, editor):
@@ -31,18 +35,17 @@ class AutoSaver(QObject):
         """إضافة ملف للحفظ التلقائي"""
         if self.enabled and file_path:
             self.files_to_save[editor] = file_path
-            # ربط إشارة تغيير المحتوى مع الحفظ التلقائي
-            editor.document().contentsChanged.connect(
-                lambda: self.schedule_auto_save(editor)
-            )
+            # الحفظ بعد توقف التعديلات بدلاً من مؤقت لكل تعديل
+            editor.change_bus.subscribe(self, 'auto_save', lambda deltas: self.save_file(editor),
+                                        DEBOUNCED, AUTO_SAVE_DELAY)
             # حفظ الملف مباشرة عند إضافته
             self.perform_auto_save()
     
-    def schedule_auto_save(self, editor):
-        """جدولة الحفظ التلقائي بعد تغيير المحتوى"""
-        if self.enabled and editor in self.files_to_save:
-            QTimer.singleShot(1000, lambda: self.save_file(editor))
-    
+    def remove_file_from_autosave(self, editor):
+        """إزالة محرر من الحفظ التلقائي"""
+        if self.files_to_save.pop(editor, None) is not None:
+            editor.change_bus.unsubscribe(self, 'auto_save')
+
     def save_file(self, editor):
         """حفظ الملف مع تطبيق الإضافات"""
         if not self.enabled or editor not in self.files_to_save:
@@ -50,17 +53,8 @@ class AutoSaver(QObject):
             
         file_path = self.files_to_save[editor]
         try:
-            content = editor.toPlainText()
-            
-            # حفظ الملف
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
-            editor.document().setModified(False)
-            
-            # تحديث عنوان التبويب باستخدام الدالة الموحدة
-            self.editor.tab_manager.update_tab_title(editor)
-            if hasattr(self.editor, 'tab_manager'):
-                self.editor.tab_manager.update_tab_title(editor)
+            # الحفظ في خيط الحفظ؛ حالة التعديل وعنوان التبويب تحدث عند اكتمال الكتابة
+            self.editor.save_service.save(editor, file_path, automatic=True)
             
         except Exception as e:
             if hasattr(self.editor, 'statusBar'):
@@ -87,10 +81,7 @@ class AutoSaver(QObject):
             if not os.path.exists(save_dir):
                 os.makedirs(save_dir)
                 
-            with open(current_file, 'w') as f:
-                f.write(current_editor.toPlainText())
-                
-            current_editor.document().setModified(False)
+            self.editor.save_service.save(current_editor, current_file, automatic=True)
                             
             return True
             
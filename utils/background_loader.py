@@ -0,0 +1,308 @@
+import os
+import time
+import queue
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QProgressBar, QToolButton
+from PyQt5.QtGui import QTextCursor
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+from utils.file_loader import TextFileReader, read_text_file, DEFAULT_ENCODING, FALLBACK_ENCODING
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# أقصى عدد من الأجزاء المفكوكة المنتظرة قبل أن يتوقف خيط القراءة مؤقتاً
+MAX_QUEUED_BLOCKS = 8
+
+# عدد الأحرف المدرجة في المستند في كل عملية إدراج
+INSERT_CHUNK_SIZE = 64 * 1024
+
+# الوقت المسموح للإدراج في كل دورة من حلقة الأحداث (بالثواني)
+INSERT_TIME_BUDGET = 0.012
+
+
+class FileReadThread(QThread):
+    """خيط يقرأ الملف ويفك ترميزه ويضع الأجزاء في قائمة انتظار محدودة.
+
+    عناصر القائمة بالترتيب: ('text', نص، بايتات مقروءة) أو ('restart', ترميز)
+    أو ('done', ترميز، نهاية أسطر) أو ('error', رسالة). ('long_lines',) يسبق
+    النص الذي فيه أول سطر أطول من long_line_limit بايت.
+    """
+
+    def __init__(self, file_path, encoding=None, long_line_limit=0, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.encoding = encoding
+        self.long_line_limit = long_line_limit
+        self.total_bytes = 0
+        self.queue = queue.Queue(maxsize=MAX_QUEUED_BLOCKS)
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """طلب إيقاف القراءة."""
+        self._cancelled.set()
+
+    def _put(self, item):
+        """إضافة عنصر للقائمة مع الانتظار عند امتلائها ما لم يُلغَ التحميل."""
+        while not self._cancelled.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run(self):
+        encoding = self.encoding
+        long_lines_reported = False
+        try:
+            while True:
+                reader = TextFileReader(self.file_path, encoding, self.long_line_limit)
+                self.total_bytes = reader.size
+                try:
+                    for text, bytes_read in reader.iter_blocks():
+                        if reader.long_lines.found and not long_lines_reported:
+                            long_lines_reported = True
+                            if not self._put(('long_lines',)):
+                                return
+                        if not self._put(('text', text, bytes_read)):
+                            return
+                except UnicodeDecodeError:
+                    if reader.encoding != DEFAULT_ENCODING:
+                        raise
+                    # الملف ليس UTF-8 بعد العينة: البدء من جديد بالترميز الاحتياطي
+                    encoding = FALLBACK_ENCODING
+                    if not self._put(('restart', encoding)):
+                        return
+                    continue
+                self._put(('done', reader.encoding, reader.line_ending))
+                return
+        except Exception as e:
+            self._put(('error', str(e)))
+
+
+class BackgroundFileLoader(QObject):
+    """تحميل ملف في المحرر على دفعات بين دورات حلقة الأحداث.
+
+    القراءة وفك الترميز في خيط منفصل، والإدراج في المستند على أجزاء محدودة
+    في الخيط الرئيسي، فيبقى المحرر قابلاً للتمرير والتحديد أثناء التحميل.
+    """
+
+    progress = pyqtSignal(int)  # النسبة المئوية
+    finished = pyqtSignal(str, str)  # الترميز، نهاية الأسطر
+    failed = pyqtSignal(str)
+    long_lines_found = pyqtSignal()  # قبل إدراج أول سطر أطول من long_line_limit
+
+    def __init__(self, editor, file_path, encoding=None, long_line_limit=0):
+        super().__init__(editor)
+        self.editor = editor
+        self.file_path = file_path
+        self._thread = FileReadThread(file_path, encoding, long_line_limit)
+        self._pending = ''
+        self._pending_offset = 0
+        self._pending_bytes = 0
+        self._percent = -1
+        self._was_read_only = editor.isReadOnly()
+        self._timer = QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._insert_pending)
+
+    def start(self):
+        """بدء التحميل."""
+        # المحرر لا يسجل التعديلات في سجل التراجع ما دام المحمل موجوداً
+        self.editor.loader = self
+        self.editor.clear()
+        # المحتوى يكتمل قبل السماح بالتعديل
+        self.editor.setReadOnly(True)
+        self._thread.start()
+        self._timer.start()
+        log_in_arabic(logger, logging.INFO, f"بدء تحميل الملف في الخلفية: {self.file_path}")
+
+    def is_running(self):
+        return self._timer.isActive()
+
+    def cancel(self):
+        """إلغاء التحميل وانتظار توقف خيط القراءة."""
+        if not self.is_running():
+            return
+        self._thread.cancel()
+        self._thread.wait()
+        self._stop()
+        log_in_arabic(logger, logging.INFO, f"تم إلغاء تحميل الملف: {self.file_path}")
+
+    def _stop(self):
+        """إيقاف المؤقت وإعادة حالة المحرر."""
+        self._timer.stop()
+        self.editor.setReadOnly(self._was_read_only)
+        if getattr(self.editor, 'loader', None) is self:
+            self.editor.loader = None
+        # المحتوى المحمل هو بداية سجل التراجع
+        if hasattr(self.editor, 'undo_store'):
+            self.editor.undo_store.clear()
+
+    def _insert_pending(self):
+        """إدراج ما تيسر من النص المنتظر خلال الوقت المسموح لهذه الدورة."""
+        deadline = time.perf_counter() + INSERT_TIME_BUDGET
+        cursor = QTextCursor(self.editor.document())
+        while time.perf_counter() < deadline:
+            if self._pending_offset >= len(self._pending):
+                if not self._next_item():
+                    return
+                continue
+            piece = self._pending[self._pending_offset:self._pending_offset + INSERT_CHUNK_SIZE]
+            self._pending_offset += len(piece)
+            cursor.movePosition(QTextCursor.End)
+            cursor.insertText(piece)
+            # المحتوى المحمل ليس تعديلاً من المستخدم
+            self.editor.document().setModified(False)
+            if self._pending_offset >= len(self._pending):
+                self._report_progress(self._pending_bytes)
+
+    def _next_item(self):
+        """أخذ العنصر التالي من خيط القراءة، ويعيد False إذا لم يكن هناك ما يدرج الآن."""
+        try:
+            item = self._thread.queue.get_nowait()
+        except queue.Empty:
+            # لا داعي لتدوير المؤقت بلا توقف بينما ينتظر خيط القراءة القرص
+            self._timer.setInterval(10)
+            return False
+
+        kind = item[0]
+        if kind == 'text':
+            self._timer.setInterval(0)
+            _, self._pending, self._pending_bytes = item
+            self._pending_offset = 0
+            return True
+        if kind == 'long_lines':
+            self.long_lines_found.emit()
+            return True
+        if kind == 'restart':
+            log_in_arabic(logger, logging.WARNING, f"إعادة تحميل الملف بترميز {item[1]}: {self.file_path}")
+            self.editor.clear()
+            self._pending, self._pending_offset = '', 0
+            return True
+
+        self._thread.wait()
+        self._stop()
+        if kind == 'done':
+            self._report_progress(self._thread.total_bytes)
+            log_in_arabic(logger, logging.INFO, f"اكتمل تحميل الملف في الخلفية: {self.file_path}")
+            self.finished.emit(item[1], item[2])
+        else:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في تحميل الملف: {item[1]}")
+            self.failed.emit(item[1])
+        return False
+
+    def _report_progress(self, bytes_read):
+        total = self._thread.total_bytes or 1
+        percent = min(100, bytes_read * 100 // total)
+        if percent != self._percent:
+            self._percent = percent
+            self.progress.emit(percent)
+
+
+class BatchFileReader(QObject):
+    """قراءة مجموعة ملفات بالتوازي وتسليم نتائجها في الخيط الرئيسي بترتيبها الأصلي.
+
+    كل ملف يقرأ ويفحص ويفك ترميزه في مجمع خيوط، والنتائج تسلم بالترتيب
+    بمجرد جاهزيتها دون انتظار اكتمال الدفعة كاملة.
+    """
+
+    file_ready = pyqtSignal(str, str, str, str, bool)  # المسار، النص، الترميز، نهاية الأسطر، وجود أسطر طويلة
+    file_failed = pyqtSignal(str, str)  # المسار، رسالة الخطأ
+    progress = pyqtSignal(int, int)  # عدد الملفات المنجزة، العدد الكلي
+    finished = pyqtSignal()
+
+    def __init__(self, file_paths, parent=None, max_workers=None, long_line_limit=0):
+        super().__init__(parent)
+        self.file_paths = list(file_paths)
+        self.long_line_limit = long_line_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 2))
+        self._futures = []
+        self._next = 0
+        self._delivering = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(10)
+        self._timer.timeout.connect(self._deliver_ready)
+
+    def start(self):
+        """إرسال جميع الملفات لمجمع الخيوط وبدء تسليم النتائج."""
+        self._futures = [
+            self._executor.submit(read_text_file, file_path, None, True, self.long_line_limit)
+            for file_path in self.file_paths
+        ]
+        self._timer.start()
+        log_in_arabic(logger, logging.INFO, f"بدء فتح {len(self.file_paths)} ملف بالتوازي")
+
+    def cancel(self):
+        """إلغاء الملفات التي لم تسلم بعد."""
+        if not self._timer.isActive():
+            return
+        for future in self._futures[self._next:]:
+            future.cancel()
+        self._next = len(self._futures)
+        log_in_arabic(logger, logging.INFO, "تم إلغاء فتح بقية الملفات")
+        self._finish()
+
+    def _deliver_ready(self):
+        """تسليم النتائج الجاهزة بالترتيب خلال الوقت المسموح لهذه الدورة."""
+        if self._delivering:
+            return
+        self._delivering = True
+        try:
+            deadline = time.perf_counter() + INSERT_TIME_BUDGET
+            while self._next < len(self._futures) and time.perf_counter() < deadline:
+                future = self._futures[self._next]
+                if not future.done():
+                    break
+                file_path = self.file_paths[self._next]
+                self._next += 1
+                try:
+                    text, encoding, line_ending, long_lines = future.result()
+                except Exception as e:
+                    self.file_failed.emit(file_path, str(e))
+                else:
+                    self.file_ready.emit(file_path, text, encoding, line_ending, long_lines)
+                self.progress.emit(self._next, len(self._futures))
+        finally:
+            self._delivering = False
+
+        if self._next >= len(self._futures) and self._timer.isActive():
+            self._finish()
+
+    def _finish(self):
+        self._timer.stop()
+        self._executor.shutdown(wait=False)
+        self.finished.emit()
+
+
+class TabLoadIndicator(QWidget):
+    """مؤشر تقدم صغير مع زر إلغاء يوضع على التبويب أثناء التحميل."""
+
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(2)
+
+        self.progress_bar = QProgressBar(self)
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setFixedSize(48, 10)
+        self.progress_bar.setTextVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.cancel_button = QToolButton(self)
+        self.cancel_button.setText('■')
+        self.cancel_button.setToolTip('إلغاء التحميل')
+        self.cancel_button.setAutoRaise(True)
+        self.cancel_button.clicked.connect(self.cancel_requested)
+        layout.addWidget(self.cancel_button)
+
+    def set_progress(self, percent):
+        self.progress_bar.setValue(percent)
+        self.setToolTip(f'جاري التحميل... {percent}%')
@@ -0,0 +1,399 @@
+import re
+import time
+import random
+import logging
+from PyQt5.QtCore import QTimer
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# أزواج الأقواس بترتيبها المنطقي في النص، فتعمل كما هي في النص العربي والإنجليزي
+# والمختلط: ﴿ يفتح و ﴾ يغلق في النص القرآني، و « يفتح و » يغلق
+BRACKET_PAIRS = {
+    '(': ')',
+    '[': ']',
+    '{': '}',
+    '﴿': '﴾',
+    '«': '»',
+    '“': '”',
+}
+
+# علامة التنصيص المستقيمة تطابق داخل السطر نفسه فقط
+QUOTE_CHARS = '"'
+
+OPENERS = {opener: kind for kind, opener in enumerate(BRACKET_PAIRS)}
+CLOSERS = {closer: kind for kind, closer in enumerate(BRACKET_PAIRS.values())}
+
+BRACKET_PATTERN = re.compile('[' + re.escape(''.join(OPENERS) + ''.join(CLOSERS)) + ']')
+
+# أقصى زمن لكل دفعة من بناء الفهرس (بالثواني)، وعدد الكتل بين كل نقطتي توقف في البناء
+BUILD_STEP_BUDGET = 0.004
+BUILD_STEP_BLOCKS = 128
+
+
+def summarize_block(text):
+    """ملخص أقواس الكتلة: لكل نوع (الأقواس المغلقة غير المطابقة، الأقواس المفتوحة غير المطابقة)."""
+    summary = None
+    for match in BRACKET_PATTERN.finditer(text):
+        char = match.group()
+        if summary is None:
+            summary = {}
+        if char in OPENERS:
+            kind = OPENERS[char]
+            closes, opens = summary.get(kind, (0, 0))
+            summary[kind] = (closes, opens + 1)
+        else:
+            kind = CLOSERS[char]
+            closes, opens = summary.get(kind, (0, 0))
+            summary[kind] = (closes, opens - 1) if opens else (closes + 1, opens)
+    if summary:
+        summary = {kind: counts for kind, counts in summary.items() if counts != (0, 0)}
+    return summary or None
+
+
+def combine(first, second):
+    """ملخص كتلتين متتاليتين: الأقواس المفتوحة في الأولى تطابق المغلقة في الثانية."""
+    if not first:
+        return second
+    if not second:
+        return first
+    result = dict(first)
+    for kind, (closes, opens) in second.items():
+        first_closes, first_opens = result.get(kind, (0, 0))
+        matched = min(first_opens, closes)
+        counts = (first_closes + closes - matched, first_opens + opens - matched)
+        if counts == (0, 0):
+            result.pop(kind, None)
+        else:
+            result[kind] = counts
+    return result or None
+
+
+class _Node:
+    __slots__ = ('left', 'right', 'priority', 'size', 'summary', 'total')
+
+    def __init__(self, summary, priority):
+        self.left = None
+        self.right = None
+        self.priority = priority
+        self.size = 1
+        self.summary = summary
+        self.total = summary
+
+
+def _size(node):
+    return node.size if node else 0
+
+
+def _total(node):
+    return node.total if node else None
+
+
+def _refresh(node):
+    node.size = 1 + _size(node.left) + _size(node.right)
+    node.total = combine(combine(_total(node.left), node.summary), _total(node.right))
+
+
+def _split(node, count):
+    """فصل أول count كتلة عن باقي الشجرة."""
+    if node is None:
+        return None, None
+    if _size(node.left) >= count:
+        left, node.left = _split(node.left, count)
+        _refresh(node)
+        return left, node
+    node.right, right = _split(node.right, count - _size(node.left) - 1)
+    _refresh(node)
+    return node, right
+
+
+def _merge(first, second):
+    if first is None:
+        return second
+    if second is None:
+        return first
+    if first.priority > second.priority:
+        first.right = _merge(first.right, second)
+        _refresh(first)
+        return first
+    second.left = _merge(first, second.left)
+    _refresh(second)
+    return second
+
+
+def _build(summaries):
+    """بناء شجرة من ملخصات متتالية بأولويات عشوائية كالعقد المضافة بالتعديل، في زمن خطي.
+
+    الأشجار المبنية بهذه الطريقة تدمج واحدة بعد أخرى وتبقى متوازنة في المتوسط.
+    """
+    spine = []  # الحافة اليمنى من الشجرة، من الجذر إلى أعمق عقدة
+    for summary in summaries:
+        node = _Node(summary, random.random())
+        last = None
+        while spine and spine[-1].priority < node.priority:
+            last = spine.pop()
+            _refresh(last)
+        node.left = last
+        if spine:
+            spine[-1].right = node
+        spine.append(node)
+    for node in reversed(spine):
+        _refresh(node)
+    return spine[0] if spine else None
+
+
+def _find_forward(node, kind, depth):
+    """أول كتلة يغلق فيها depth قوساً مفتوحاً، ويعيد (ترتيبها، ترتيب القوس المغلق غير المطابق فيها)."""
+    index = 0
+    while node is not None:
+        closes, opens = (_total(node.left) or {}).get(kind, (0, 0))
+        if closes >= depth:
+            node = node.left
+            continue
+        depth += opens - closes
+        index += _size(node.left)
+        closes, opens = (node.summary or {}).get(kind, (0, 0))
+        if closes >= depth:
+            return index, depth
+        depth += opens - closes
+        index += 1
+        node = node.right
+    return None
+
+
+def _find_backward(node, kind, depth):
+    """آخر كتلة يفتح فيها depth قوساً مغلقاً، ويعيد (ترتيبها، ترتيب القوس المفتوح غير المطابق من نهايتها)."""
+    base = 0
+    while node is not None:
+        closes, opens = (_total(node.right) or {}).get(kind, (0, 0))
+        if opens >= depth:
+            base += _size(node.left) + 1
+            node = node.right
+            continue
+        depth += closes - opens
+        closes, opens = (node.summary or {}).get(kind, (0, 0))
+        if opens >= depth:
+            return base + _size(node.left), depth
+        depth += closes - opens
+        node = node.left
+    return None
+
+
+def _nth_unmatched_close(text, kind, count):
+    opens = 0
+    for index, char in enumerate(text):
+        if OPENERS.get(char) == kind:
+            opens += 1
+        elif CLOSERS.get(char) == kind:
+            if opens:
+                opens -= 1
+            else:
+                count -= 1
+                if not count:
+                    return index
+    return None
+
+
+def _nth_unmatched_open_from_end(text, kind, count):
+    closes = 0
+    for index in range(len(text) - 1, -1, -1):
+        char = text[index]
+        if CLOSERS.get(char) == kind:
+            closes += 1
+        elif OPENERS.get(char) == kind:
+            if closes:
+                closes -= 1
+            else:
+                count -= 1
+                if not count:
+                    return index
+    return None
+
+
+class BracketIndex:
+    """فهرس الأقواس في المستند لإيجاد القوس المقابل دون المرور على النص كله.
+
+    لكل كتلة ملخص بعدد أقواسها غير المطابقة من كل نوع، والملخصات مرتبة في شجرة
+    متوازنة (treap) تحفظ في كل عقدة ملخص ما تحتها. القوس المقابل يبحث عنه في
+    سطره أولاً، ثم بالنزول في الشجرة إلى الكتلة التي يغلق فيها في زمن لوغاريتمي.
+    التعديلات تعيد حساب ملخصات الكتل المعدلة فقط. يبنى الفهرس عند أول حاجة إليه
+    على دفعات قصيرة عند فراغ حلقة الأحداث، وحتى يكتمل لا يطابق إلا داخل السطر.
+    """
+
+    def __init__(self, document, change_bus=None, ready=None):
+        self.document = document
+        # يستدعى عند اكتمال بناء الفهرس على دفعات ليعاد تمييز الأقواس
+        self.ready = ready
+        self._root = None
+        self._built = False
+        # أثناء البناء تحوي الشجرة ملخصات الكتل المقروءة حتى الآن من بداية المستند
+        self._building = False
+        self._step_scheduled = False
+        self._block_count = 0
+        if change_bus is not None:
+            change_bus.subscribe(self, 'brackets', self._on_contents_change, priority=10)
+        document.destroyed.connect(self.invalidate)
+
+    def _summaries(self, first, last):
+        block = self.document.findBlockByNumber(first)
+        summaries = []
+        for _ in range(first, last + 1):
+            summaries.append(summarize_block(block.text()))
+            block = block.next()
+        return summaries
+
+    def _ensure_built(self):
+        """هل الفهرس جاهز، ويبدأ بناءه إن لم يبدأ.
+
+        الدفعة الأولى تبنى فوراً فيجهز فهرس المستند الصغير دون انتظار، والباقي
+        يكمل على دفعات عند فراغ حلقة الأحداث.
+        """
+        if self._built:
+            return True
+        if not self._building:
+            self._building = True
+            self._root = None
+            self._block_count = self.document.blockCount()
+        self._build_step(notify=False)
+        return self._built
+
+    def _build_step(self, notify=True):
+        """دفعة بناء واحدة: قراءة الكتل التالية حتى BUILD_STEP_BUDGET وإلحاقها بالشجرة."""
+        self._step_scheduled = False
+        if not self._building:
+            return
+        deadline = time.perf_counter() + BUILD_STEP_BUDGET
+        block = self.document.findBlockByNumber(_size(self._root))
+        while True:
+            summaries = []
+            while block.isValid() and len(summaries) < BUILD_STEP_BLOCKS:
+                summaries.append(summarize_block(block.text()))
+                block = block.next()
+            self._root = _merge(self._root, _build(summaries))
+            if not block.isValid() or time.perf_counter() >= deadline:
+                break
+
+        if block.isValid():
+            if not self._step_scheduled:
+                self._step_scheduled = True
+                QTimer.singleShot(0, self._build_step)
+            return
+        self._building = False
+        self._built = True
+        self._block_count = _size(self._root)
+        log_in_arabic(logger, logging.DEBUG, f"تم بناء فهرس الأقواس لـ {self._block_count} كتلة")
+        if notify and self.ready is not None:
+            self.ready()
+
+    def invalidate(self):
+        """إسقاط الفهرس ليعاد بناؤه عند الحاجة."""
+        self._root = None
+        self._built = False
+        self._building = False
+
+    def _on_contents_change(self, delta):
+        if not self._built and not self._building:
+            return
+        document = self.document
+        if delta.position == 0 and delta.added >= document.characterCount() - 1:
+            # استبدال النص كاملاً: إعادة البناء عند الحاجة أرخص من التحديث
+            self.invalidate()
+            return
+        first = document.findBlock(delta.position).blockNumber()
+        last = document.findBlock(delta.position + delta.added).blockNumber()
+        count = document.blockCount()
+        old_last = last - (count - self._block_count)
+        self._block_count = count
+        if old_last < first - 1:
+            self.invalidate()
+            return
+        if old_last >= _size(self._root):
+            if not self._building:
+                self.invalidate()
+                return
+            # أثناء البناء: التعديل يتجاوز ما قرئ، فتقرأ كتله مع ما بعدها في الدفعات التالية
+            self._root, _ = _split(self._root, first)
+            return
+
+        # استبدال ملخصات الكتل المعدلة فقط
+        left, rest = _split(self._root, first)
+        _, right = _split(rest, old_last - first + 1)
+        middle = _build(self._summaries(first, last))
+        self._root = _merge(_merge(left, middle), right)
+        if self._built and _size(self._root) != count:
+            log_in_arabic(logger, logging.DEBUG, "فهرس الأقواس لا يطابق المستند، ستتم إعادة بنائه")
+            self.invalidate()
+
+    def match(self, position):
+        """موضع القوس أو علامة التنصيص المقابلة للحرف في position، أو None."""
+        block = self.document.findBlock(position)
+        if not block.isValid():
+            return None
+        text = block.text()
+        offset = position - block.position()
+        if offset < 0 or offset >= len(text):
+            return None
+        char = text[offset]
+
+        if char in QUOTE_CHARS:
+            return self._match_quote(block, text, offset)
+
+        if char in OPENERS:
+            kind = OPENERS[char]
+            depth = 0
+            for index in range(offset, len(text)):
+                if OPENERS.get(text[index]) == kind:
+                    depth += 1
+                elif CLOSERS.get(text[index]) == kind:
+                    depth -= 1
+                    if not depth:
+                        return block.position() + index
+            if not self._ensure_built():
+                return None
+            left, right = _split(self._root, block.blockNumber() + 1)
+            found = _find_forward(right, kind, depth)
+            self._root = _merge(left, right)
+            if found is None:
+                return None
+            number, count = found
+            target = self.document.findBlockByNumber(block.blockNumber() + 1 + number)
+            index = _nth_unmatched_close(target.text(), kind, count)
+            return target.position() + index if index is not None else None
+
+        if char in CLOSERS:
+            kind = CLOSERS[char]
+            depth = 0
+            for index in range(offset, -1, -1):
+                if CLOSERS.get(text[index]) == kind:
+                    depth += 1
+                elif OPENERS.get(text[index]) == kind:
+                    depth -= 1
+                    if not depth:
+                        return block.position() + index
+            if not self._ensure_built():
+                return None
+            left, right = _split(self._root, block.blockNumber())
+            found = _find_backward(left, kind, depth)
+            self._root = _merge(left, right)
+            if found is None:
+                return None
+            number, count = found
+            target = self.document.findBlockByNumber(number)
+            index = _nth_unmatched_open_from_end(target.text(), kind, count)
+            return target.position() + index if index is not None else None
+
+        return None
+
+    def _match_quote(self, block, text, offset):
+        """علامات التنصيص تتزاوج بالترتيب داخل السطر مع تجاهل المسبوقة بشرطة مائلة."""
+        quotes = [index for index, char in enumerate(text)
+                  if char == text[offset] and (index == 0 or text[index - 1] != '\\')]
+        if offset not in quotes:
+            return None
+        order = quotes.index(offset)
+        partner = order + 1 if order % 2 == 0 else order - 1
+        if partner >= len(quotes):
+            return None
+        return block.position() + quotes[partner]
@@ -0,0 +1,172 @@
+import time
+import weakref
+import logging
+from collections import namedtuple
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer
+from utils.timer_wheel import shared_timer_wheel
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# طرق التوصيل: فوراً مع كل تعديل، بعد توقف التعديلات مدة محددة، أو عند فراغ حلقة الأحداث
+SYNC = 'sync'
+DEBOUNCED = 'debounced'
+IDLE = 'idle'
+
+# الأولوية الافتراضية للمشتركين الفوريين، الأقل يستدعى أولاً
+DEFAULT_PRIORITY = 100
+
+# تعديل واحد على المستند: موضعه وعدد الأحرف المحذوفة والمضافة ورقم نسخة المستند بعده
+Delta = namedtuple('Delta', 'position removed added revision')
+
+
+class _Subscriber:
+    """مشترك واحد في ناقل التعديلات مع إحصائيات زمن استدعائه."""
+
+    __slots__ = ('owner', 'name', 'owner_name', 'callback', 'mode', 'delay', 'priority',
+                 'pending', 'calls', 'total_time', 'max_time', 'last_time', 'dead', '__weakref__')
+
+    def __init__(self, owner, name, callback, mode, delay, priority):
+        self.owner = weakref.ref(owner)
+        self.name = name
+        self.owner_name = type(owner).__name__
+        self.callback = callback
+        self.mode = mode
+        self.delay = delay
+        self.priority = priority
+        self.pending = []
+        self.calls = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+        self.dead = False
+
+    def owner_deleted(self):
+        """هل حذف الكائن المشترك، من بايثون أو من Qt."""
+        owner = self.owner()
+        if owner is None:
+            return True
+        return isinstance(owner, sip.simplewrapper) and sip.isdeleted(owner)
+
+    def call(self, argument):
+        started = time.perf_counter()
+        try:
+            self.callback(argument)
+        except Exception as e:
+            if isinstance(e, RuntimeError) and self.owner_deleted():
+                # حذف الكائن المشترك من Qt، فيلغى اشتراكه
+                self.dead = True
+            else:
+                # الخطأ لا يلغي الاشتراك، فنسخة النص مثلاً يجب أن تستمر في التحديث
+                log_in_arabic(logger, logging.ERROR,
+                              f"خطأ في معالجة التعديل لدى {self.owner_name}.{self.name}: {str(e)}")
+        elapsed = time.perf_counter() - started
+        self.calls += 1
+        self.total_time += elapsed
+        self.last_time = elapsed
+        self.max_time = max(self.max_time, elapsed)
+
+    def deliver(self):
+        """تسليم التعديلات المتراكمة دفعة واحدة."""
+        if not self.pending or self.dead:
+            return
+        deltas, self.pending = self.pending, []
+        self.call(deltas)
+
+
+class DocumentChangeBus(QObject):
+    """ناقل تعديلات واحد لكل مستند يوزع كل تعديل على المشتركين فيه.
+
+    يشترك الناقل في contentsChange مرة واحدة ويحول كل تعديل إلى Delta. المشترك
+    الفوري يستلم كل Delta لحظة حدوثه، والمؤجل يستلم قائمة التعديلات المتراكمة
+    بعد توقفها مدة delay، ومشترك الفراغ يستلمها عند فراغ حلقة الأحداث. يحسب
+    زمن كل مشترك حتى يعرف من يبطئ الكتابة.
+    """
+
+    def __init__(self, document):
+        super().__init__(document)
+        self.revision = 0
+        self._subscribers = {}
+        self._sync = []
+        self._idle_timer = QTimer(self)
+        self._idle_timer.setSingleShot(True)
+        self._idle_timer.setInterval(0)
+        self._idle_timer.timeout.connect(self._deliver_idle)
+        document.contentsChange.connect(self._on_contents_change)
+
+    def subscribe(self, owner, name, callback, mode=SYNC, delay=0, priority=DEFAULT_PRIORITY):
+        """الاشتراك في التعديلات، وإعادة الاشتراك بالمالك والاسم نفسيهما تستبدل السابق.
+
+        callback يستلم Delta واحداً في الطريقة الفورية، وقائمة من Delta في غيرها.
+        priority يرتب المشتركين الفوريين، والأقل يستدعى أولاً.
+        """
+        self.unsubscribe(owner, name)
+        subscriber = _Subscriber(owner, name, callback, mode, delay, priority)
+        self._subscribers[(id(owner), name)] = subscriber
+        if mode == SYNC:
+            self._sync.append(subscriber)
+            self._sync.sort(key=lambda item: item.priority)
+
+    def unsubscribe(self, owner, name):
+        """إلغاء اشتراك."""
+        subscriber = self._subscribers.pop((id(owner), name), None)
+        if subscriber is not None:
+            self._drop(subscriber)
+
+    def unsubscribe_all(self, owner):
+        """إلغاء جميع اشتراكات المالك."""
+        for key in [key for key in self._subscribers if key[0] == id(owner)]:
+            self._drop(self._subscribers.pop(key))
+
+    def _drop(self, subscriber):
+        subscriber.dead = True
+        subscriber.pending = []
+        if subscriber.mode == SYNC:
+            self._sync.remove(subscriber)
+        elif subscriber.mode == DEBOUNCED:
+            shared_timer_wheel().cancel(subscriber, 'deliver')
+
+    def _on_contents_change(self, position, removed, added):
+        self.revision += 1
+        delta = Delta(position, removed, added, self.revision)
+        for subscriber in list(self._sync):
+            if not subscriber.dead:
+                subscriber.call(delta)
+
+        for subscriber in self._subscribers.values():
+            if subscriber.mode == SYNC or subscriber.dead:
+                continue
+            subscriber.pending.append(delta)
+            if subscriber.mode == DEBOUNCED:
+                # إعادة الجدولة تؤجل التسليم حتى تتوقف التعديلات
+                shared_timer_wheel().schedule(subscriber, 'deliver', subscriber.delay, subscriber.deliver)
+            elif not self._idle_timer.isActive():
+                self._idle_timer.start()
+        self._prune()
+
+    def _deliver_idle(self):
+        for subscriber in list(self._subscribers.values()):
+            if subscriber.mode == IDLE:
+                subscriber.deliver()
+        self._prune()
+
+    def _prune(self):
+        """إزالة المشتركين الذين حذفت كائناتهم."""
+        dead = [key for key, subscriber in self._subscribers.items() if subscriber.dead]
+        for key in dead:
+            self._drop(self._subscribers.pop(key))
+
+    def metrics(self):
+        """زمن كل مشترك (بالمللي ثانية) وعدد مرات استدعائه."""
+        return [{
+            'name': f"{subscriber.owner_name}.{subscriber.name}",
+            'mode': subscriber.mode,
+            'calls': subscriber.calls,
+            'total_ms': subscriber.total_time * 1000,
+            'average_ms': subscriber.total_time * 1000 / subscriber.calls if subscriber.calls else 0,
+            'max_ms': subscriber.max_time * 1000,
+            'last_ms': subscriber.last_time * 1000,
+        } for subscriber in self._subscribers.values()]
@@ -0,0 +1,207 @@
+import os
+import time
+import uuid
+import zlib
+import shutil
+import logging
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# مجلد النصوص المنقولة إلى القرص
+CLOSED_TABS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'closed_tabs')
+
+# الحد الافتراضي لحجم النصوص المضغوطة في الذاكرة (بالبايت)
+DEFAULT_MEMORY_BUDGET = 16 * 1024 * 1024
+
+# عمر مجلد النسخة الذي يحذف بعده إن تعذرت معرفة حالة عمليتها (بالثواني)
+STALE_DIR_AGE = 7 * 24 * 60 * 60
+
+
+def _process_alive(pid):
+    """هل العملية ما زالت تعمل، أو None إن تعذرت معرفة ذلك."""
+    try:
+        import psutil
+        return psutil.pid_exists(pid)
+    except ImportError:
+        pass
+    if os.name != 'posix':
+        # os.kill على ويندوز ينهي العملية بدلاً من فحصها
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ClosedTabStore:
+    """مخزن التبويبات المغلقة بحجم محدود في الذاكرة.
+
+    النصوص تضغط عند الإغلاق، وما يتجاوز الحد ينقل إلى القرص بدءاً بالأقدم
+    والأكبر، والملفات غير المعدلة يحفظ مسارها ووقت تعديلها فقط. لكل نسخة
+    تعمل من البرنامج مجلد باسم رقم عمليتها داخل cache_dir، فلا تحذف نسخة
+    ملفات نسخة أخرى ما زالت تعمل.
+    """
+
+    def __init__(self, max_entries=10, memory_budget=DEFAULT_MEMORY_BUDGET, cache_dir=CLOSED_TABS_DIR):
+        self.max_entries = max_entries
+        self.memory_budget = memory_budget
+        self.cache_root = cache_dir
+        self.cache_dir = os.path.join(cache_dir, str(os.getpid()))
+        self._entries = []
+        self._memory_used = 0
+        self._clear_stale_dirs()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def memory_used(self):
+        """حجم النصوص المضغوطة الموجودة في الذاكرة."""
+        return self._memory_used
+
+    def spill_all(self):
+        """نقل جميع النصوص إلى القرص، ويعيد حجم الذاكرة المحررة."""
+        before = self._memory_used
+        for entry in self._entries:
+            if entry['data'] is not None:
+                self._spill(entry)
+        return before - self._memory_used
+
+    def _clear_stale_dirs(self):
+        """حذف مجلدات النسخ التي انتهت عملياتها والملفات المتبقية من جلسات سابقة."""
+        try:
+            if not os.path.isdir(self.cache_root):
+                return
+            now = time.time()
+            for name in os.listdir(self.cache_root):
+                path = os.path.join(self.cache_root, name)
+                old = now - os.path.getmtime(path) > STALE_DIR_AGE
+                if not os.path.isdir(path):
+                    # ملفات من تخطيط سابق للمجلد لا تخص نسخة بعينها
+                    if old:
+                        os.remove(path)
+                    continue
+                if not name.isdigit():
+                    continue
+                pid = int(name)
+                alive = _process_alive(pid) if pid != os.getpid() else False
+                if alive is False or (alive is None and old):
+                    shutil.rmtree(path, ignore_errors=True)
+        except OSError as e:
+            log_in_arabic(logger, logging.WARNING, f"تعذر تنظيف مجلد التبويبات المغلقة: {e}")
+
+    def push(self, tab_info, modified=True):
+        """إضافة تبويب مغلق. tab_info يحمل النص كلقطة أو نص أو None."""
+        entry = {key: value for key, value in tab_info.items() if key != 'text'}
+        entry['data'] = None
+        entry['spill_path'] = None
+        entry['mtime'] = None
+        # التبويب يعود معدلاً كما أغلق
+        entry['modified'] = modified
+
+        text = tab_info.get('text')
+        file_path = tab_info.get('file_path')
+        if not modified and file_path and os.path.exists(file_path):
+            # الملف على القرص مطابق للمحرر: يكفي المسار ووقت التعديل
+            entry['mtime'] = os.path.getmtime(file_path)
+        elif text is not None:
+            entry['data'] = self._compress(text)
+            self._memory_used += len(entry['data'])
+
+        self._entries.append(entry)
+        while len(self._entries) > max(0, self.max_entries):
+            self._discard(self._entries.pop(0))
+        self._enforce_budget()
+
+    def pop(self):
+        """استرجاع آخر تبويب مغلق مع نصه، أو None كنص إذا كان يعاد فتحه من القرص."""
+        if not self._entries:
+            return None
+        entry = self._entries.pop()
+        tab_info = {key: value for key, value in entry.items()
+                    if key not in ('data', 'spill_path', 'mtime')}
+        tab_info['text'] = None
+        try:
+            if entry['data'] is not None:
+                self._memory_used -= len(entry['data'])
+                tab_info['text'] = self._decompress(entry['data'])
+            elif entry['spill_path']:
+                with open(entry['spill_path'], 'rb') as file:
+                    tab_info['text'] = self._decompress(file.read())
+            elif entry['mtime'] is not None and entry.get('file_path'):
+                file_path = entry['file_path']
+                if not os.path.exists(file_path) or os.path.getmtime(file_path) != entry['mtime']:
+                    log_in_arabic(logger, logging.WARNING, f"تغير الملف على القرص بعد إغلاق تبويبه: {file_path}")
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في استرجاع نص التبويب المغلق: {e}")
+        finally:
+            self._remove_spill(entry)
+        return tab_info
+
+    def clear(self):
+        """حذف جميع التبويبات المغلقة."""
+        for entry in self._entries:
+            self._discard(entry)
+        self._entries = []
+
+    def _compress(self, text):
+        """ضغط النص أو لقطته على أجزاء دون تجميعه في نص واحد."""
+        chunks = text.iter_chunks() if hasattr(text, 'iter_chunks') else (text,)
+        compressor = zlib.compressobj(6)
+        parts = [compressor.compress(chunk.encode('utf-8', 'surrogatepass')) for chunk in chunks]
+        parts.append(compressor.flush())
+        return b''.join(parts)
+
+    @staticmethod
+    def _decompress(data):
+        return zlib.decompress(data).decode('utf-8', 'surrogatepass')
+
+    def _enforce_budget(self):
+        """نقل النصوص إلى القرص حتى يعود حجم الذاكرة تحت الحد."""
+        # النص الذي يتجاوز ربع الحد وحده ينقل فوراً، ثم الأقدم فالأحدث
+        large = [entry for entry in self._entries
+                 if entry['data'] is not None and len(entry['data']) > self.memory_budget // 4]
+        for entry in large:
+            self._spill(entry)
+        for entry in self._entries:
+            if self._memory_used <= self.memory_budget:
+                break
+            if entry['data'] is not None:
+                self._spill(entry)
+
+    def _spill(self, entry):
+        """نقل نص مضغوط من الذاكرة إلى مجلد التخزين المؤقت."""
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            spill_path = os.path.join(self.cache_dir, f"{uuid.uuid4().hex}.z")
+            with open(spill_path, 'wb') as file:
+                file.write(entry['data'])
+            self._memory_used -= len(entry['data'])
+            entry['data'] = None
+            entry['spill_path'] = spill_path
+            log_in_arabic(logger, logging.DEBUG, f"تم نقل نص تبويب مغلق إلى القرص: {entry.get('tab_name')}")
+        except OSError as e:
+            # يبقى النص في الذاكرة إذا تعذرت الكتابة
+            log_in_arabic(logger, logging.WARNING, f"تعذر نقل نص التبويب المغلق إلى القرص: {e}")
+
+    def _discard(self, entry):
+        """تحرير ذاكرة التبويب أو ملفه على القرص."""
+        if entry['data'] is not None:
+            self._memory_used -= len(entry['data'])
+            entry['data'] = None
+        self._remove_spill(entry)
+
+    @staticmethod
+    def _remove_spill(entry):
+        if entry['spill_path']:
+            try:
+                os.remove(entry['spill_path'])
+            except OSError:
+                pass
+            entry['spill_path'] = None
@@ -0,0 +1,48 @@
+import re
+
+# الكلمة في شريط الحالة أي سلسلة متصلة من غير المسافات
+WORD_PATTERN = re.compile(r'\S+')
+
+
+class DocumentStatistics:
+    """عدد أحرف المستند وكلماته وأسطره، يحدث مع كل تعديل دون نسخ النص كله.
+
+    الكلمة لا تمتد عبر نهاية السطر، فيحفظ عدد كلمات كل كتلة ويعاد عد
+    الكتل المعدلة فقط. عدد الأحرف والأسطر يؤخذ من المستند مباشرة.
+    """
+
+    def __init__(self, document, change_bus):
+        self.document = document
+        self._blocks = self._count_blocks(0, document.blockCount() - 1)
+        self.words = sum(self._blocks)
+        change_bus.subscribe(self, 'statistics', self._on_contents_change, priority=30)
+
+    def _count_blocks(self, first, last):
+        """عدد كلمات كل كتلة من first إلى last."""
+        block = self.document.findBlockByNumber(first)
+        counts = []
+        for _ in range(first, last + 1):
+            counts.append(len(WORD_PATTERN.findall(block.text())))
+            block = block.next()
+        return counts
+
+    def _on_contents_change(self, delta):
+        document = self.document
+        first = document.findBlock(delta.position).blockNumber()
+        last = document.findBlock(delta.position + delta.added).blockNumber()
+        old_last = last - (document.blockCount() - len(self._blocks))
+        if old_last < first - 1 or old_last >= len(self._blocks):
+            # لا يمكن معرفة الكتل المعدلة بدقة
+            first, last, old_last = 0, document.blockCount() - 1, len(self._blocks) - 1
+
+        counts = self._count_blocks(first, last)
+        self.words += sum(counts) - sum(self._blocks[first:old_last + 1])
+        self._blocks[first:old_last + 1] = counts
+
+    def stats(self):
+        """الإحصائيات بالمفاتيح التي يعرضها مدير الإحصائيات."""
+        return {
+            'chars': self.document.characterCount() - 1,
+            'words': self.words,
+            'lines': self.document.blockCount(),
+        }
@@ -0,0 +1,192 @@
+import io
+import os
+import re
+import codecs
+import logging
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# حجم العينة المستخدمة لتحديد الترميز ونهاية الأسطر
+SAMPLE_SIZE = 64 * 1024
+
+# حجم الجزء المقروء في كل مرة أثناء فك الترميز
+READ_BLOCK_SIZE = 1024 * 1024
+
+# علامات ترتيب البايت بالترتيب الذي يجب فحصها به
+BOMS = (
+    (codecs.BOM_UTF8, 'UTF-8-SIG'),
+    (codecs.BOM_UTF16_LE, 'UTF-16'),
+    (codecs.BOM_UTF16_BE, 'UTF-16'),
+)
+
+# '\r' وحده نهاية سطر أيضاً في ملفات ماك القديمة
+LINE_BREAKS = re.compile(rb'[\r\n]')
+
+DEFAULT_ENCODING = 'UTF-8'
+FALLBACK_ENCODING = 'CP1256'
+
+
+class NotTextFileError(Exception):
+    """استثناء عند محاولة فتح ملف ثنائي كنص"""
+    pass
+
+
+def detect_encoding(sample):
+    """تحديد الترميز من علامة ترتيب البايت أو من عينة من بداية الملف."""
+    for bom, encoding in BOMS:
+        if sample.startswith(bom):
+            return encoding
+
+    if not sample:
+        return DEFAULT_ENCODING
+
+    # نص UTF-16 بلا علامة: نسبة كبيرة من البايتات الصفرية في خانات زوجية أو فردية
+    even_zeros = sample[0::2].count(0)
+    odd_zeros = sample[1::2].count(0)
+    half = max(1, len(sample) // 2)
+    if odd_zeros > half * 0.3 and odd_zeros > even_zeros * 4:
+        return 'UTF-16-LE'
+    if even_zeros > half * 0.3 and even_zeros > odd_zeros * 4:
+        return 'UTF-16-BE'
+
+    try:
+        # العينة قد تقطع حرفاً متعدد البايتات في نهايتها
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return DEFAULT_ENCODING
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+
+
+def looks_binary(sample, encoding):
+    """التحقق مما إذا كانت العينة من ملف ثنائي وليست نصاً."""
+    return not encoding.upper().startswith('UTF-16') and b'\x00' in sample
+
+
+def detect_line_ending(text):
+    """تحديد نهاية الأسطر الغالبة في عينة من النص."""
+    crlf = text.count('\r\n')
+    cr = text.count('\r') - crlf
+    lf = text.count('\n') - crlf
+    if crlf and crlf >= cr and crlf >= lf:
+        return '\r\n'
+    if cr > lf:
+        return '\r'
+    return '\n'
+
+
+def _decode_sample(sample, encoding):
+    """فك ترميز العينة دون اعتبار الحرف المقطوع في نهايتها خطأً."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+    return decoder.decode(sample, final=False)
+
+
+class LongLineDetector:
+    """التحقق من وجود سطر أطول من limit بايت في ملف يقرأ على أجزاء، و0 يعطله."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.found = False
+        self._current = 0  # طول السطر غير المكتمل من الأجزاء السابقة
+
+    def feed(self, block):
+        """فحص جزء جديد من الملف، ويعيد True إذا ظهر حتى الآن سطر أطول من الحد."""
+        if self.found or not self.limit:
+            return self.found
+        match = LINE_BREAKS.search(block)
+        if match is None:
+            self._current += len(block)
+        else:
+            first = match.start()
+            last = max(block.rfind(b'\n'), block.rfind(b'\r'))
+            self.found = self._current + first > self.limit or (
+                last - first > self.limit
+                and max(map(len, LINE_BREAKS.split(block[first + 1:last]))) > self.limit
+            )
+            self._current = len(block) - last - 1
+        self.found = self.found or self._current > self.limit
+        return self.found
+
+
+def has_long_lines(file_path, limit):
+    """التحقق مما إذا كان في الملف سطر أطول من limit بايت، بقراءته على أجزاء."""
+    if os.path.getsize(file_path) <= limit:
+        return False
+    detector = LongLineDetector(limit)
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(READ_BLOCK_SIZE), b''):
+            if detector.feed(block):
+                return True
+    return False
+
+
+def detect_file_format(file_path):
+    """تحديد الترميز ونهاية الأسطر من عينة من الملف دون قراءته كاملاً."""
+    with open(file_path, 'rb') as file:
+        sample = file.read(SAMPLE_SIZE)
+    encoding = detect_encoding(sample)
+    return encoding, detect_line_ending(_decode_sample(sample, encoding))
+
+
+class TextFileReader:
+    """قارئ ملف نصي يحدد الترميز ونهاية الأسطر من عينة ثم يفك ترميزه على أجزاء.
+
+    أطوال الأسطر تفحص أثناء القراءة نفسها إن أعطي long_line_limit.
+    """
+
+    def __init__(self, file_path, encoding=None, long_line_limit=0):
+        self.file_path = file_path
+        with open(file_path, 'rb') as file:
+            sample = file.read(SAMPLE_SIZE)
+            self.size = os.fstat(file.fileno()).st_size
+        self.encoding = encoding or detect_encoding(sample)
+        self.is_binary = looks_binary(sample, self.encoding)
+        self.line_ending = detect_line_ending(_decode_sample(sample, self.encoding))
+        self.long_lines = LongLineDetector(long_line_limit)
+
+    def iter_blocks(self, block_size=READ_BLOCK_SIZE):
+        """المرور على النص مفكوك الترميز مع عدد البايتات المقروءة حتى كل جزء."""
+        # فك الترميز وتوحيد نهايات الأسطر في مرور واحد، حتى لو انقسم '\r\n' بين جزأين
+        decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(self.encoding)(errors='strict'), translate=True
+        )
+        bytes_read = 0
+        with open(self.file_path, 'rb') as file:
+            for block in iter(lambda: file.read(block_size), b''):
+                bytes_read += len(block)
+                self.long_lines.feed(block)
+                text = decoder.decode(block)
+                if text:
+                    yield text, bytes_read
+        text = decoder.decode(b'', final=True)
+        if text:
+            yield text, bytes_read
+
+
+def read_text_file(file_path, encoding=None, reject_binary=False, long_line_limit=0):
+    """قراءة ملف نصي وفك ترميزه مرة واحدة.
+
+    يعيد النص بنهايات أسطر موحدة '\\n' مع الترميز ونهاية الأسطر الأصلية،
+    وهل فيه سطر أطول من long_line_limit بايت.
+    """
+    reader = TextFileReader(file_path, encoding, long_line_limit)
+    if reject_binary and reader.is_binary:
+        raise NotTextFileError(f"الملف ليس نصياً: {file_path}")
+    try:
+        text = ''.join(block for block, _ in reader.iter_blocks())
+    except UnicodeDecodeError:
+        if reader.encoding != DEFAULT_ENCODING:
+            raise
+        # بايتات غير صالحة بعد العينة: إعادة القراءة بالترميز العربي الاحتياطي
+        log_in_arabic(logger, logging.WARNING, f"الملف ليس UTF-8 صالحاً، استخدام {FALLBACK_ENCODING}: {file_path}")
+        return read_text_file(file_path, FALLBACK_ENCODING, long_line_limit=long_line_limit)
+
+    log_in_arabic(logger, logging.DEBUG, f"تم تحميل الملف بترميز {reader.encoding}: {file_path}")
+    return text, reader.encoding, reader.line_ending, reader.long_lines.found
+
+
+def line_ending_label(line_ending):
+    """الاسم المختصر لنهاية الأسطر كما يعرض في شريط الحالة."""
+    return "CRLF" if line_ending == "\r\n" else "LF" if line_ending == "\n" else "CR"
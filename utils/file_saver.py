@@ -0,0 +1,148 @@
+import os
+import stat
+import codecs
+import tempfile
+import logging
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# حجم ذاكرة الكتابة المؤقتة للملف (بالبايت)
+WRITE_BUFFER_SIZE = 256 * 1024
+
+
+def iter_transcoded(chunks, line_ending='\n'):
+    """تحويل نهايات الأسطر في قطع النص إلى line_ending في مرور واحد.
+
+    CRLF و CR و LF تعامل كلها كنهاية سطر، و CR في آخر قطعة يؤجل حتى تعرف
+    القطعة التالية حتى لا يكتب CRLF المقسوم على قطعتين كسطرين.
+    """
+    pending_cr = False
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if pending_cr:
+            pending_cr = False
+            if chunk[0] == '\n':
+                chunk = chunk[1:]
+            yield line_ending
+        if chunk.endswith('\r'):
+            chunk = chunk[:-1]
+            pending_cr = True
+        if '\r' in chunk:
+            chunk = chunk.replace('\r\n', '\n').replace('\r', '\n')
+        if line_ending != '\n' and '\n' in chunk:
+            chunk = chunk.replace('\n', line_ending)
+        if chunk:
+            yield chunk
+    if pending_cr:
+        yield line_ending
+
+
+def _default_mode():
+    """صلاحيات الملف الجديد حسب قناع النظام، لأن mkstemp ينشئه للمالك فقط."""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _copy_metadata(source, temp_path):
+    """نقل صلاحيات الملف الأصلي ومالكه إلى الملف المؤقت قبل استبداله."""
+    try:
+        source_stat = os.stat(source)
+    except FileNotFoundError:
+        os.chmod(temp_path, _default_mode())
+        return
+    os.chmod(temp_path, stat.S_IMODE(source_stat.st_mode))
+    if hasattr(os, 'chown'):
+        try:
+            os.chown(temp_path, source_stat.st_uid, source_stat.st_gid)
+        except OSError:
+            # تغيير المالك يحتاج صلاحيات لا يملكها كل مستخدم
+            pass
+
+
+def iter_encoded(chunks, encoding='utf-8', line_ending='\n'):
+    """ترميز قطع النص بعد تحويل نهايات أسطرها بمرمز واحد للملف كله."""
+    encoder = codecs.getincrementalencoder(encoding)()
+    for chunk in iter_transcoded(chunks, line_ending):
+        yield encoder.encode(chunk)
+    yield encoder.encode('', final=True)
+
+
+def write_temp_bytes(file_path, chunks):
+    """كتابة قطع من البايتات كما هي في ملف مؤقت بجوار الملف الهدف.
+
+    يعيد مسار الملف المؤقت بعد مزامنته مع القرص، ولا يمس الملف الأصلي.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.qirtas-', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb', buffering=WRITE_BUFFER_SIZE) as temp_file:
+            for chunk in chunks:
+                temp_file.write(chunk)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        _copy_metadata(file_path, temp_path)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+    return temp_path
+
+
+def write_temp(file_path, chunks, encoding='utf-8', line_ending='\n'):
+    """كتابة القطع بعد تحويل نهايات أسطرها وترميزها في ملف مؤقت بجوار الملف الهدف."""
+    return write_temp_bytes(file_path, iter_encoded(chunks, encoding, line_ending))
+
+
+def commit_temp(temp_path, file_path):
+    """استبدال الملف الهدف بالملف المؤقت دفعة واحدة."""
+    os.replace(temp_path, file_path)
+    if os.name == 'posix':
+        # مزامنة المجلد حتى يبقى الاستبدال نفسه بعد انقطاع الكهرباء
+        try:
+            dir_fd = os.open(os.path.dirname(os.path.abspath(file_path)), os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+
+def discard_temp(temp_path):
+    """حذف ملف مؤقت لم يعد مطلوباً."""
+    try:
+        os.remove(temp_path)
+    except OSError:
+        pass
+
+
+def atomic_write(file_path, chunks, encoding='utf-8', line_ending='\n'):
+    """حفظ قطع النص في الملف بحيث يبقى إما بمحتواه القديم كاملاً أو الجديد كاملاً."""
+    # الكتابة على الملف الذي يشير إليه الرابط الرمزي لا على الرابط نفسه
+    file_path = os.path.realpath(file_path)
+    temp_path = write_temp(file_path, chunks, encoding, line_ending)
+    try:
+        commit_temp(temp_path, file_path)
+    except BaseException:
+        discard_temp(temp_path)
+        raise
+
+
+def save_editor(editor, file_path, encoding=None, line_ending=None):
+    """حفظ محتوى المحرر في الملف بالترميز ونهاية الأسطر الخاصة به."""
+    encoding = encoding or getattr(editor, 'encoding', None) or 'utf-8'
+    line_ending = line_ending or getattr(editor, 'line_ending', None) or '\n'
+
+    # الملفات الكبيرة تكتب من الملف الأصلي وطبقة التعديلات
+    large_file = getattr(editor, 'large_file', None)
+    if large_file:
+        large_file.save(file_path, encoding, line_ending)
+    else:
+        atomic_write(file_path, editor.snapshot().iter_chunks(), encoding, line_ending)
+    log_in_arabic(logger, logging.DEBUG, f"تم حفظ الملف: {file_path}")
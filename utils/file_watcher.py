@@ -1,6 +1,8 @@
 from PyQt5.QtCore import QObject, QFileSystemWatcher, pyqtSignal, QTimer, QTime
 import os
+import sys
 import difflib
+from utils.file_loader import read_text_file
 
 class FileWatcher(QObject):
     content_changed = pyqtSignal(str, str, list)  # file_path, content, changes
@@ -23,8 +25,8 @@ class FileWatcher(QObject):
 
     def _get_file_content(self, file_path):
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                return file.read()
+            # نفس مسار التحميل في المحرر: تحديد الترميز من عينة وفك الترميز مرة واحدة
+            return read_text_file(file_path)[0]
         except Exception:
             return None
 
@@ -58,7 +60,16 @@ class FileWatcher(QObject):
                     if not current_content:
                         continue
                         
-                    old_content = self.watched_files[file_path]['content']
+                    entry = self.watched_files[file_path]
+                    editor_content = str(entry['editor'].snapshot())
+                    if current_content == editor_content:
+                        # الملف يطابق نص المحرر، كأن حفظه المحرر نفسه، فلا يعاد تحميله
+                        entry['last_modified'] = current_mtime
+                        continue
+                    old_content = entry['content']
+                    if old_content is None:
+                        # النسخة حررت لتوفير الذاكرة؛ المحرر غير المعدل يطابق آخر نسخة من الملف
+                        old_content = editor_content
                     if current_content != old_content:
                         changes = self._calculate_changes(old_content, current_content)
                         if changes:
@@ -123,20 +134,63 @@ class FileWatcher(QObject):
                 self.watcher.addPath(file_path)
                 self._check_files()
 
-    def add_file(self, file_path, editor):
+    def add_file(self, file_path, editor, content=None):
         """إضافة ملف للمراقبة"""
         if os.path.exists(file_path):
             self.watched_files[file_path] = {
                 'editor': editor,
                 'last_modified': os.path.getmtime(file_path),
-                'content': self._get_file_content(file_path)
+                # استخدام المحتوى المقروء مسبقاً إن وجد بدلاً من قراءة الملف مرة أخرى
+                'content': content if content is not None else self._get_file_content(file_path)
             }
             self.watcher.addPath(file_path)
             
-            # ربط إشارة تغيير النص
-            editor.textChanged.connect(lambda: self._on_text_changed(editor))
+            # متابعة الكتابة عبر ناقل تعديلات المستند
+            editor.change_bus.subscribe(self, 'typing', lambda delta: self._on_text_changed(editor))
             self.typing_timer.timeout.connect(self._on_typing_timeout)
 
+    def mark_saved(self, file_path):
+        """تسجيل حفظ المحرر للملف حتى لا تعامل كتابته كتغيير خارجي يعاد تحميله.
+
+        نص الملف بعد الحفظ هو نص المحرر، فتحرر النسخة المخزنة ويقارن بلقطة المحرر.
+        """
+        entry = self.watched_files.get(file_path)
+        if entry is None or not os.path.exists(file_path):
+            return
+        entry['last_modified'] = os.path.getmtime(file_path)
+        entry['content'] = None
+        self.pending_updates.pop(file_path, None)
+        # الحفظ يستبدل الملف بملف جديد فيعاد إضافته للمراقبة
+        if file_path not in self.watcher.files():
+            self.watcher.addPath(file_path)
+
+    def remove_file(self, file_path):
+        """إيقاف مراقبة ملف وتحرير نسخته والمحرر المرتبط به"""
+        entry = self.watched_files.pop(file_path, None)
+        self.pending_updates.pop(file_path, None)
+        self.last_update_time.pop(file_path, None)
+        if file_path in self.watcher.files():
+            self.watcher.removePath(file_path)
+        if entry is None:
+            return
+        try:
+            entry['editor'].change_bus.unsubscribe(self, 'typing')
+        except RuntimeError:
+            # المحرر حذف مع ناقل تعديلاته
+            pass
+
+    def content_size(self, file_path):
+        """حجم نسخة الملف المحفوظة للمقارنة (بالبايت)."""
+        content = self.watched_files.get(file_path, {}).get('content')
+        return sys.getsizeof(content) if content is not None else 0
+
+    def release_content(self, file_path):
+        """تحرير نسخة الملف المحفوظة، ويعيد حجمها."""
+        size = self.content_size(file_path)
+        if size:
+            self.watched_files[file_path]['content'] = None
+        return size
+
     def _on_text_changed(self, editor):
         """معالجة تغيير النص في المحرر"""
         self.is_typing = True
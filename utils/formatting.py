@@ -38,7 +38,7 @@ class TextFormatter:
         
         cursor = current_editor.textCursor()
         
-        # منع تحديث الخط التلقائي مؤقتاً
+        # منع تحديث الخط التلقائي مؤقتاً؛ change_format يسجل التغيير في سجل التراجع
         current_editor.document().blockSignals(True)
         
         if format_type == 'bold':
@@ -47,22 +47,22 @@ class TextFormatter:
                 char_format.setFontWeight(QFont.Normal)
             else:
                 char_format.setFontWeight(QFont.Bold)
-            cursor.mergeCharFormat(char_format)
+            current_editor.change_format(cursor, lambda c: c.mergeCharFormat(char_format))
         
         elif format_type == 'italic':
             char_format = cursor.charFormat()
             char_format.setFontItalic(not char_format.fontItalic())
-            cursor.mergeCharFormat(char_format)
+            current_editor.change_format(cursor, lambda c: c.mergeCharFormat(char_format))
         
         elif format_type == 'underline':
             char_format = cursor.charFormat()
             char_format.setFontUnderline(not char_format.fontUnderline())
-            cursor.mergeCharFormat(char_format)
+            current_editor.change_format(cursor, lambda c: c.mergeCharFormat(char_format))
         
         elif format_type == 'size' and size is not None:
             char_format = cursor.charFormat()
             char_format.setFontPointSize(size)
-            cursor.mergeCharFormat(char_format)
+            current_editor.change_format(cursor, lambda c: c.mergeCharFormat(char_format))
         
         elif format_type.startswith('align_'):
             block_format = cursor.blockFormat()
@@ -74,7 +74,7 @@ class TextFormatter:
                 block_format.setAlignment(Qt.AlignCenter)
             elif format_type == 'align_justify':
                 block_format.setAlignment(Qt.AlignJustify)
-            cursor.mergeBlockFormat(block_format)
+            current_editor.change_format(cursor, lambda c: c.mergeBlockFormat(block_format))
         
         current_editor.setTextCursor(cursor)
         current_editor.setFocus()
@@ -0,0 +1,342 @@
+import os
+import mmap
+import codecs
+import logging
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from PyQt5.QtCore import QObject, QPoint, pyqtSignal
+from utils.file_saver import write_temp_bytes, commit_temp, discard_temp
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# الترميزات التي يمكن فهرسة أسطرها بالبحث عن البايت '\n' مباشرة
+INDEXABLE_ENCODINGS = ('utf-8', 'utf8', 'utf-8-sig', 'cp1256', 'windows-1256', 'ascii', 'latin-1', 'iso-8859-6')
+
+
+class LargeFileBuffer:
+    """ملف كبير معروض عبر mmap مع فهرس لبدايات الأسطر وطبقة للتعديلات.
+
+    تُحفظ التعديلات كمقاطع (بداية، نهاية، أسطر جديدة) بإحداثيات أسطر الملف
+    الأصلي، ولا يُكتب شيء على القرص حتى استدعاء save. line_ending هي نهاية
+    الأسطر الغالبة وتستخدم للأسطر الجديدة، وتحدد من السطر الأول إن لم تمرر.
+    """
+
+    INDEX_CHUNK_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, file_path, encoding='utf-8', line_ending=None):
+        self.file_path = file_path
+        self.encoding = encoding
+        self.line_ending = line_ending
+        self._file = None
+        self._map = None
+        self._size = 0
+        self._line_offsets = array('q', [0])
+        self._overlay = []  # مقاطع مرتبة وغير متداخلة: (بداية، نهاية، أسطر)
+        self._open()
+
+    @staticmethod
+    def supports(encoding):
+        """التحقق من إمكانية فهرسة الملف بهذا الترميز."""
+        return (encoding or 'utf-8').lower() in INDEXABLE_ENCODINGS
+
+    def _open(self):
+        """فتح الملف وربطه بالذاكرة وبناء فهرس الأسطر."""
+        self._file = open(self.file_path, 'rb')
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._size else None
+        self._build_index()
+        log_in_arabic(logger, logging.INFO, f"تم فهرسة {self.line_count()} سطر من الملف: {self.file_path}")
+
+    def _build_index(self):
+        """بناء فهرس بدايات الأسطر على أجزاء دون تحميل الملف كاملاً."""
+        offsets = array('q', [0])
+        for start in range(0, self._size, self.INDEX_CHUNK_SIZE):
+            parts = self._map[start:start + self.INDEX_CHUNK_SIZE].split(b'\n')
+            # كل جزء ما عدا الأخير ينتهي بسطر جديد داخل هذه القطعة
+            starts = accumulate(map((1).__add__, map(len, parts[:-1])), initial=start)
+            next(starts)
+            offsets.extend(starts)
+        self._line_offsets = offsets
+
+        if self.line_ending is None:
+            self.line_ending = self._original_ending(0) or '\n'
+
+    def close(self):
+        """إغلاق الربط بالذاكرة والملف."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def line_count(self):
+        """عدد أسطر الملف الأصلي."""
+        return len(self._line_offsets)
+
+    def is_modified(self):
+        """هل توجد تعديلات لم تُحفظ بعد."""
+        return bool(self._overlay)
+
+    def _original_ending(self, line):
+        """نهاية السطر line في الملف الأصلي، أو نص فارغ لآخر سطر فيه."""
+        if line >= self.line_count() - 1:
+            return ''
+        end = self._line_offsets[line + 1] - 1
+        if end > self._line_offsets[line] and self._map[end - 1:end] == b'\r':
+            return '\r\n'
+        return '\n'
+
+    def _read_original(self, start, end, errors='replace'):
+        """قراءة أسطر الملف الأصلي في النطاق [start, end) دون نهاياتها."""
+        if start >= end or self._map is None:
+            return [] if start >= end else ['']
+        begin = self._line_offsets[start]
+        stop = self._line_offsets[end] - 1 if end < self.line_count() else self._size
+        text = self._map[begin:stop].decode(self.encoding, errors=errors)
+        # نهايات الأسطر قد تختلط في الملف الواحد فيحذف CR من كل سطر ينتهي به
+        return [line[:-1] if line.endswith('\r') else line for line in text.split('\n')]
+
+    def expand_range(self, start, end):
+        """توسيع النطاق ليشمل أي مقطع معدل يتقاطع معه."""
+        for seg_start, seg_end, _ in self._overlay:
+            if seg_start < end and seg_end > start:
+                start, end = min(start, seg_start), max(end, seg_end)
+        return start, end
+
+    def get_lines(self, start, end):
+        """الحصول على أسطر النطاق بعد تطبيق التعديلات عليه."""
+        lines = []
+        position = start
+        for seg_start, seg_end, seg_lines in self._overlay:
+            if seg_end <= start or seg_start >= end:
+                continue
+            lines.extend(self._read_original(position, seg_start))
+            lines.extend(seg_lines)
+            position = seg_end
+        lines.extend(self._read_original(position, end))
+        return lines
+
+    def replace(self, start, end, lines):
+        """استبدال أسطر النطاق الأصلي [start, end) بأسطر جديدة."""
+        self._overlay = [seg for seg in self._overlay if seg[1] <= start or seg[0] >= end]
+        index = bisect_right([seg[0] for seg in self._overlay], start)
+        self._overlay.insert(index, (start, end, list(lines)))
+
+    def iter_lines(self, batch=10000):
+        """المرور على جميع الأسطر بعد التعديل على دفعات."""
+        position = 0
+        while position < self.line_count():
+            # نهاية الدفعة تتوسع لتشمل المقطع المعدل كاملاً فلا يتكرر في الدفعة التالية
+            start, end = self.expand_range(position, min(position + batch, self.line_count()))
+            yield from self.get_lines(start, end)
+            position = end
+
+    def _segment_text(self, start, end, lines):
+        """نص مقطع معدل بنهاية كل سطر كما كانت في السطر الأصلي المقابل له."""
+        total = self.line_count()
+        parts = []
+        for offset, line in enumerate(lines):
+            parts.append(line)
+            if end == total and offset == len(lines) - 1:
+                # آخر سطر في الملف بلا نهاية سطر
+                break
+            ending = self._original_ending(min(start + offset, end - 1)) if end > start else ''
+            parts.append(ending or self.line_ending)
+        return ''.join(parts)
+
+    def _iter_bytes(self, encoding, line_ending, batch=10000):
+        """محتوى الملف بعد التعديل كقطع من البايتات.
+
+        ما دام الترميز ونهاية الأسطر لم يتغيرا تنسخ الأسطر غير المعدلة من الملف
+        الأصلي كما هي، فلا تمس البايتات التي تعذر فك ترميزها ولا نهايات الأسطر
+        المختلطة، وترمز المقاطع المعدلة وحدها. عند التحويل يفك ترميز الملف كله
+        بصرامة حتى لا تستبدل البايتات غير الصالحة بصمت.
+        """
+        convert = (codecs.lookup(encoding).name != codecs.lookup(self.encoding).name
+                   or line_ending != self.line_ending)
+        encoder = codecs.getincrementalencoder(encoding)()
+        total = self.line_count()
+        position = 0
+        for seg_start, seg_end, seg_lines in self._overlay + [(total, total, [])]:
+            if position < seg_start and convert:
+                for begin in range(position, seg_start, batch):
+                    stop = min(begin + batch, seg_start)
+                    text = line_ending.join(self._read_original(begin, stop, errors='strict'))
+                    yield encoder.encode(text + line_ending if stop < total else text)
+            elif position < seg_start and self._map is not None:
+                if position == 0:
+                    # الأسطر الأولى تنسخ ومعها علامة الترتيب (BOM) إن وجدت فلا يكتبها المرمز ثانية
+                    encoder.encode('')
+                begin = self._line_offsets[position]
+                stop = self._line_offsets[seg_start] if seg_start < total else self._size
+                for chunk_start in range(begin, stop, self.INDEX_CHUNK_SIZE):
+                    yield self._map[chunk_start:min(stop, chunk_start + self.INDEX_CHUNK_SIZE)]
+            if seg_lines:
+                text = self._segment_text(seg_start, seg_end, seg_lines)
+                if convert:
+                    text = text.replace('\r\n', '\n').replace('\n', line_ending)
+                yield encoder.encode(text)
+            position = max(position, seg_end)
+        yield encoder.encode('', final=True)
+
+    def save(self, file_path=None, encoding=None, line_ending=None):
+        """كتابة الملف مع التعديلات في ملف مؤقت ثم استبداله بالأصلي.
+
+        تحتفظ الأسطر بنهاياتها الأصلية ما لم تمرر line_ending مختلفة عن نهاية
+        الأسطر الغالبة، فتوحد عندها نهايات الملف كله.
+        """
+        file_path = file_path or self.file_path
+        encoding = encoding or self.encoding
+        line_ending = line_ending or self.line_ending
+
+        target_path = os.path.realpath(file_path)
+        temp_path = write_temp_bytes(target_path, self._iter_bytes(encoding, line_ending))
+
+        # يجب إغلاق الربط قبل استبدال الملف على ويندوز
+        self.close()
+        try:
+            commit_temp(temp_path, target_path)
+        except Exception:
+            discard_temp(temp_path)
+            self._open()
+            raise
+
+        self.file_path = file_path
+        self.encoding = encoding
+        self.line_ending = line_ending
+        self._overlay = []
+        self._open()
+        log_in_arabic(logger, logging.INFO, f"تم حفظ الملف الكبير: {file_path}")
+
+
+class LargeFileView(QObject):
+    """عرض نافذة من أسطر الملف الكبير في المحرر وتبديلها أثناء التمرير."""
+
+    window_changed = pyqtSignal(int, int)
+
+    def __init__(self, editor, buffer, window_size=4000):
+        super().__init__(editor)
+        self.editor = editor
+        self.buffer = buffer
+        self.window_size = window_size
+        self.scroll_margin = 3
+        self.window = (0, 0)
+        self._dirty = False
+        self._loading = False
+
+        editor.large_file = self
+        # الحرف الخفي يعرض كزخرفة فقط حتى لا تتحول كل نافذة إلى نافذة معدلة
+        if hasattr(editor, 'set_lrm_mode'):
+            editor.set_lrm_mode('view')
+        editor.change_bus.subscribe(self, 'large_file', lambda delta: self._on_contents_changed())
+        editor.verticalScrollBar().valueChanged.connect(self._on_scroll)
+        self.load_window(0)
+
+    def total_lines(self):
+        """عدد أسطر الملف الأصلي."""
+        return self.buffer.line_count()
+
+    def _on_contents_changed(self):
+        """تسجيل أن النافذة الحالية تحتوي على تعديلات."""
+        if not self._loading:
+            self._dirty = True
+
+    def flush(self):
+        """نقل تعديلات النافذة الحالية إلى طبقة التعديلات."""
+        if not self._dirty:
+            return
+        start, end = self.window
+        self.buffer.replace(start, end, self.editor.toPlainText().split('\n'))
+        self._dirty = False
+
+    def first_visible_line(self):
+        """رقم أول سطر ظاهر في المحرر بإحداثيات الملف."""
+        block_number = self.editor.cursorForPosition(QPoint(0, 0)).blockNumber()
+        return self.window[0] + block_number
+
+    def load_window(self, start, focus_line=None):
+        """تحميل نافذة من الأسطر تبدأ من السطر start."""
+        self.flush()
+        total = self.total_lines()
+        start = max(0, min(start, total - 1))
+        start, end = self.buffer.expand_range(start, min(total, start + self.window_size))
+        lines = self.buffer.get_lines(start, end)
+
+        self._loading = True
+        try:
+            self.editor.setPlainText('\n'.join(lines))
+            self.window = (start, end)
+            # أرقام الأسطر في الهامش بأرقام الملف لا بأرقام النافذة
+            self.editor.gutter.set_line_offset(start, total)
+            self.editor.document().setModified(self.buffer.is_modified())
+        finally:
+            self._loading = False
+
+        if focus_line is not None:
+            self._move_to_block(focus_line - start, top=True)
+        self.window_changed.emit(start, end)
+        log_in_arabic(logger, logging.DEBUG, f"تم تحميل نافذة الأسطر {start + 1}-{end}")
+
+    def _move_to_block(self, block_number, top=False):
+        """نقل المؤشر إلى كتلة داخل النافذة الحالية."""
+        document = self.editor.document()
+        block = document.findBlockByNumber(max(0, min(block_number, document.blockCount() - 1)))
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position())
+        self.editor.setTextCursor(cursor)
+        if top:
+            # التمرير إلى النهاية ثم إظهار المؤشر يضع الكتلة أعلى المحرر
+            self._loading = True
+            try:
+                scrollbar = self.editor.verticalScrollBar()
+                scrollbar.setValue(scrollbar.maximum())
+                self.editor.ensureCursorVisible()
+            finally:
+                self._loading = False
+        else:
+            self.editor.ensureCursorVisible()
+
+    def _on_scroll(self, value):
+        """تبديل النافذة عند الاقتراب من حافتيها."""
+        if self._loading:
+            return
+        scrollbar = self.editor.verticalScrollBar()
+        start, end = self.window
+        step = self.window_size // 2
+        if value <= scrollbar.minimum() + self.scroll_margin and start > 0:
+            line = self.first_visible_line()
+            self.load_window(start - step, focus_line=line)
+        elif value >= scrollbar.maximum() - self.scroll_margin and end < self.total_lines():
+            line = self.first_visible_line()
+            self.load_window(start + step, focus_line=line)
+
+    def goto_line(self, line_number):
+        """الانتقال إلى سطر (يبدأ من 1) بإحداثيات الملف الأصلي."""
+        line = max(0, min(line_number - 1, self.total_lines() - 1))
+        start, end = self.window
+        if not start <= line < end:
+            self.load_window(line - self.window_size // 2)
+            start, end = self.window
+        self._move_to_block(line - start)
+        self.editor.centerCursor()
+
+    def reload(self):
+        """إعادة فهرسة الملف من القرص وتجاهل التعديلات غير المحفوظة."""
+        line = self.first_visible_line()
+        self.buffer.close()
+        self.buffer = LargeFileBuffer(self.buffer.file_path, self.buffer.encoding, self.buffer.line_ending)
+        self._dirty = False
+        self.load_window(self.window[0], focus_line=line)
+
+    def save(self, file_path=None, encoding=None, line_ending=None):
+        """حفظ الملف الكبير مع التعديلات ثم إعادة تحميل النافذة الحالية."""
+        self.flush()
+        line = self.first_visible_line()
+        self.buffer.save(file_path, encoding, line_ending)
+        self.load_window(self.window[0], focus_line=line)
+        self.editor.document().setModified(False)
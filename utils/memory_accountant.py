@@ -0,0 +1,139 @@
+import logging
+from PyQt5.QtCore import QObject
+from utils.timer_wheel import shared_timer_wheel
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# تقديرات تقريبية لكلفة الذاكرة (بالبايت)
+DOCUMENT_BYTES_PER_CHAR = 2     # QTextDocument يخزن النص بترميز UTF-16
+BUFFER_BYTES_PER_CHAR = 2       # قطع النص في شجرة القطع
+LAYOUT_BYTES_PER_BLOCK = 256    # تخطيط الكتلة وبياناتها
+HIGHLIGHT_BYTES_PER_BLOCK = 160  # تنسيقات الكتلة المخزنة في الملون
+
+# الفترة بين مرات فحص الحد العام (بالمللي ثانية)
+CHECK_INTERVAL = 30000
+
+# أسماء أجزاء الاستهلاك كما تعرض للمستخدم
+USAGE_LABELS = {
+    'document': 'المستند',
+    'buffer': 'نسخة النص',
+    'layout': 'التخطيط',
+    'highlighter': 'التلوين',
+    'undo': 'التراجع',
+    'watcher': 'المراقبة',
+}
+
+
+def estimate_editor_memory(editor, file_watcher=None):
+    """تقدير استهلاك محرر واحد للذاكرة موزعاً على أجزائه."""
+    document = editor.document()
+    usage = {
+        'document': document.characterCount() * DOCUMENT_BYTES_PER_CHAR,
+        'buffer': len(editor.buffer) * BUFFER_BYTES_PER_CHAR,
+        'layout': document.blockCount() * LAYOUT_BYTES_PER_BLOCK,
+        'highlighter': editor.highlighter.cache_entries() * HIGHLIGHT_BYTES_PER_BLOCK,
+        'undo': editor.undo_store.memory_used,
+        'watcher': 0,
+    }
+    if file_watcher is not None and editor.file_path:
+        usage['watcher'] = file_watcher.content_size(editor.file_path)
+    return usage
+
+
+class MemoryAccountant(QObject):
+    """حساب استهلاك الذاكرة لكل تبويب وفرض حد عام عليها.
+
+    عند تجاوز الحد تفرغ الذاكرات المؤقتة أولاً، ثم تعاد التبويبات غير النشطة
+    وغير المعدلة إلى عناصر مؤقتة بدءاً بالأقدم استخداماً.
+    """
+
+    def __init__(self, main_window):
+        super().__init__(main_window)
+        self.main_window = main_window
+        shared_timer_wheel().schedule(self, 'enforce_budget', CHECK_INTERVAL, self.enforce_budget, repeat=True)
+
+    @property
+    def tab_manager(self):
+        return self.main_window.tab_manager
+
+    def budget(self):
+        """الحد العام بالبايت، أو 0 إن كان معطلاً."""
+        budget_mb = 0
+        if hasattr(self.main_window, 'settings_manager'):
+            budget_mb = self.main_window.settings_manager.get_setting('editor.memory_budget_mb', 1024)
+        return max(0, budget_mb or 0) * 1024 * 1024
+
+    def tab_usage(self):
+        """استهلاك كل تبويب، التبويبات المؤقتة لا تستهلك شيئاً يذكر."""
+        file_watcher = getattr(self.main_window, 'file_watcher', None)
+        rows = []
+        for index in range(self.tab_manager.count()):
+            editor = self.tab_manager.editor_at(index)
+            # المستند المشترك بين أكثر من عرض يحسب مرة واحدة في مالكه
+            shared_view = editor is not None and editor.document_owner is not editor
+            usage = estimate_editor_memory(editor, file_watcher) if editor and not shared_view else {}
+            rows.append({
+                'index': index,
+                'title': self.tab_manager.tabText(index),
+                'editor': editor,
+                'usage': usage,
+                'total': sum(usage.values()),
+            })
+        return rows
+
+    def closed_tabs_usage(self):
+        return self.tab_manager.closed_tabs.memory_used
+
+    def total_usage(self):
+        return sum(row['total'] for row in self.tab_usage()) + self.closed_tabs_usage()
+
+    def release_caches(self):
+        """تفريغ الذاكرات المؤقتة التي يمكن إعادة بنائها، ويعيد الحجم المحرر تقريباً."""
+        freed = self.tab_manager.closed_tabs.spill_all()
+        file_watcher = getattr(self.main_window, 'file_watcher', None)
+        current = self.tab_manager.currentIndex()
+        for index in range(self.tab_manager.count()):
+            editor = self.tab_manager.editor_at(index)
+            if not editor:
+                continue
+            if index != current:
+                freed += editor.highlighter.clear_cache() * HIGHLIGHT_BYTES_PER_BLOCK
+            freed += editor.undo_store.compact()
+            # نسخة المراقب تطابق نص المحرر غير المعدل فيمكن الاستغناء عنها
+            if file_watcher is not None and editor.file_path and not editor.document().isModified():
+                freed += file_watcher.release_content(editor.file_path)
+        return freed
+
+    def enforce_budget(self):
+        """إعادة الاستهلاك تحت الحد العام إن تجاوزه."""
+        budget = self.budget()
+        if not budget:
+            return
+        total = self.total_usage()
+        if total <= budget:
+            return
+
+        log_in_arabic(logger, logging.INFO,
+                      f"تجاوز استهلاك الذاكرة الحد: {total // (1024 * 1024)} من {budget // (1024 * 1024)} م.ب")
+        self.release_caches()
+        total = self.total_usage()
+
+        # إعادة التبويبات غير النشطة إلى عناصر مؤقتة بدءاً بالأقدم استخداماً
+        current = self.tab_manager.currentIndex()
+        candidates = [
+            row for row in self.tab_usage()
+            if row['editor'] and row['index'] != current
+        ]
+        candidates.sort(key=lambda row: getattr(self.tab_manager.widget(row['index']), 'last_used', 0) or 0)
+        dehydrated = 0
+        for row in candidates:
+            if total <= budget:
+                break
+            if self.tab_manager.dehydrate_tab(row['index']):
+                total -= row['total']
+                dehydrated += 1
+        log_in_arabic(logger, logging.INFO,
+                      f"الاستهلاك بعد التحرير: {total // (1024 * 1024)} م.ب، تبويبات محررة: {dehydrated}")
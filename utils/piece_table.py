@@ -0,0 +1,263 @@
+import random
+import logging
+from utils.arabic_logger import setup_arabic_logging
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# أقصى طول لقطعة النص في عقدة واحدة
+MAX_CHUNK = 4096
+
+
+class _Node:
+    """عقدة ثابتة في شجرة القطع، تحمل قطعة نص ومجاميع شجرتها الفرعية."""
+
+    __slots__ = ('left', 'right', 'chunk', 'length', 'newlines', 'count')
+
+    def __init__(self, chunk, left=None, right=None):
+        self.left = left
+        self.right = right
+        self.chunk = chunk
+        self.length = len(chunk)
+        self.newlines = chunk.count('\n')
+        self.count = 1
+        if left is not None:
+            self.length += left.length
+            self.newlines += left.newlines
+            self.count += left.count
+        if right is not None:
+            self.length += right.length
+            self.newlines += right.newlines
+            self.count += right.count
+
+
+def _length(node):
+    return node.length if node is not None else 0
+
+
+def _newlines(node):
+    return node.newlines if node is not None else 0
+
+
+def _build(chunks, start=0, end=None):
+    """بناء شجرة متوازنة من قائمة قطع."""
+    if end is None:
+        end = len(chunks)
+    if start >= end:
+        return None
+    middle = (start + end) // 2
+    return _Node(chunks[middle], _build(chunks, start, middle), _build(chunks, middle + 1, end))
+
+
+def _from_text(text):
+    """تقسيم النص إلى قطع وبناء شجرة منها."""
+    return _build([text[i:i + MAX_CHUNK] for i in range(0, len(text), MAX_CHUNK)])
+
+
+def _split(node, position):
+    """تقسيم الشجرة عند موضع حرفي دون تعديل العقد الأصلية."""
+    if node is None:
+        return None, None
+    if position <= 0:
+        return None, node
+    if position >= node.length:
+        return node, None
+
+    left_length = _length(node.left)
+    if position <= left_length:
+        left, right = _split(node.left, position)
+        return left, _Node(node.chunk, right, node.right)
+
+    position -= left_length
+    chunk_length = len(node.chunk)
+    if position >= chunk_length:
+        left, right = _split(node.right, position - chunk_length)
+        return _Node(node.chunk, node.left, left), right
+
+    return (_Node(node.chunk[:position], node.left, None),
+            _Node(node.chunk[position:], None, node.right))
+
+
+def _merge(left, right):
+    """دمج شجرتين مع اختيار الجذر عشوائياً بنسبة حجم كل منهما للحفاظ على التوازن."""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if random.randrange(left.count + right.count) < left.count:
+        return _Node(left.chunk, left.left, _merge(left.right, right))
+    return _Node(right.chunk, _merge(left, right.left), right.right)
+
+
+def _last_chunk_length(node):
+    while node.right is not None:
+        node = node.right
+    return len(node.chunk)
+
+
+def _append(node, text):
+    """إلحاق نص بآخر قطعة في الشجرة."""
+    if node.right is not None:
+        return _Node(node.chunk, node.left, _append(node.right, text))
+    return _Node(node.chunk + text, node.left, None)
+
+
+def _iter_chunks(node, start, end, base=0):
+    """المرور على القطع المتقاطعة مع النطاق [start, end) بالترتيب."""
+    if node is None or start >= base + node.length or end <= base:
+        return
+    yield from _iter_chunks(node.left, start, end, base)
+    chunk_start = base + _length(node.left)
+    chunk_end = chunk_start + len(node.chunk)
+    if chunk_start < end and chunk_end > start:
+        yield node.chunk[max(0, start - chunk_start):min(len(node.chunk), end - chunk_start)]
+    yield from _iter_chunks(node.right, start, end, chunk_end)
+
+
+class TextSnapshot:
+    """لقطة ثابتة من نص المستند يمكن تمريرها لأي خيط دون نسخ."""
+
+    __slots__ = ('_root', 'revision')
+
+    def __init__(self, root=None, revision=0):
+        self._root = root
+        self.revision = revision
+
+    def __len__(self):
+        return _length(self._root)
+
+    def __str__(self):
+        return self.text()
+
+    def text(self, start=0, end=None):
+        """الحصول على نص النطاق [start, end)."""
+        return ''.join(self.iter_chunks(start, end))
+
+    def iter_chunks(self, start=0, end=None):
+        """المرور على قطع النص دون تجميعها في نص واحد."""
+        if end is None:
+            end = len(self)
+        return _iter_chunks(self._root, start, end)
+
+    def line_count(self):
+        """عدد الأسطر."""
+        return _newlines(self._root) + 1
+
+    def offset_of_line(self, line):
+        """موضع بداية السطر (يبدأ من 0)."""
+        if line <= 0:
+            return 0
+        if line >= self.line_count():
+            return len(self)
+
+        # البحث عن السطر الجديد رقم line
+        remaining = line
+        base = 0
+        node = self._root
+        while node is not None:
+            left_newlines = _newlines(node.left)
+            if remaining <= left_newlines:
+                node = node.left
+                continue
+            remaining -= left_newlines
+            base += _length(node.left)
+            chunk_newlines = node.newlines - left_newlines - _newlines(node.right)
+            if remaining <= chunk_newlines:
+                index = -1
+                for _ in range(remaining):
+                    index = node.chunk.index('\n', index + 1)
+                return base + index + 1
+            remaining -= chunk_newlines
+            base += len(node.chunk)
+            node = node.right
+        return len(self)
+
+    def line_of_offset(self, offset):
+        """رقم السطر (يبدأ من 0) الذي يقع فيه الموضع."""
+        line = 0
+        node = self._root
+        while node is not None:
+            left_length = _length(node.left)
+            if offset < left_length:
+                node = node.left
+                continue
+            line += _newlines(node.left)
+            offset -= left_length
+            if offset < len(node.chunk):
+                return line + node.chunk.count('\n', 0, offset)
+            line += node.newlines - _newlines(node.left) - _newlines(node.right)
+            offset -= len(node.chunk)
+            node = node.right
+        return line
+
+    def line(self, line):
+        """نص السطر دون محرف نهاية السطر."""
+        start = self.offset_of_line(line)
+        if line + 1 < self.line_count():
+            return self.text(start, self.offset_of_line(line + 1) - 1)
+        return self.text(start)
+
+    def iter_lines(self, start_line=0):
+        """المرور على الأسطر بدءاً من سطر معين دون تقسيم النص كاملاً."""
+        pending = []
+        for chunk in self.iter_chunks(self.offset_of_line(start_line)):
+            if '\n' not in chunk:
+                # تجميع أجزاء السطر الطويل في قائمة بدلاً من وصلها مراراً
+                pending.append(chunk)
+                continue
+            parts = chunk.split('\n')
+            pending.append(parts[0])
+            yield ''.join(pending)
+            yield from parts[1:-1]
+            pending = [parts[-1]]
+        yield ''.join(pending)
+
+
+class PieceTable(TextSnapshot):
+    """مخزن نص على شكل شجرة متوازنة من القطع الثابتة.
+
+    كل تعديل ينشئ مساراً جديداً من العقد بكلفة O(log n) ويترك العقد القديمة
+    كما هي، لذلك تكون اللقطة مجرد مرجع للجذر الحالي بكلفة O(1).
+    """
+
+    __slots__ = ()
+
+    def __init__(self, text=''):
+        super().__init__(_from_text(text), 0)
+
+    def set_text(self, text):
+        """استبدال النص كاملاً."""
+        self._root = _from_text(text)
+        self.revision += 1
+
+    def insert(self, position, text):
+        """إدراج نص في موضع معين."""
+        if not text:
+            return
+        left, right = _split(self._root, position)
+        if left is not None and _last_chunk_length(left) + len(text) <= MAX_CHUNK:
+            # الكتابة المتتالية تضاف إلى القطعة نفسها بدلاً من إنشاء قطع صغيرة
+            left = _append(left, text)
+        else:
+            left = _merge(left, _from_text(text))
+        self._root = _merge(left, right)
+        self.revision += 1
+
+    def delete(self, position, length):
+        """حذف عدد من الأحرف بدءاً من موضع معين."""
+        if length <= 0:
+            return
+        left, rest = _split(self._root, position)
+        _, right = _split(rest, length)
+        self._root = _merge(left, right)
+        self.revision += 1
+
+    def replace(self, position, removed, text):
+        """حذف نطاق ثم إدراج نص مكانه."""
+        self.delete(position, removed)
+        self.insert(position, text)
+
+    def snapshot(self):
+        """لقطة ثابتة من النص الحالي."""
+        return TextSnapshot(self._root, self.revision)
@@ -0,0 +1,80 @@
+import logging
+from PyQt5.QtCore import QObject, QTimer
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# الفترة الافتراضية بين مرات الرسم (بالمللي ثانية)، إطار واحد على شاشة 60 هرتز
+FRAME_INTERVAL = 16
+
+# قيمة المدخلات لحقل لم يرسم بعد
+_NOT_RENDERED = object()
+
+
+class RefreshScheduler(QObject):
+    """رسم حقول الواجهة (شريط الحالة، عناوين التبويبات...) مرة واحدة على الأكثر في كل إطار.
+
+    يعلم الحقل كمتسخ عند كل تغيير محتمل، وترسم الحقول المتسخة معاً بعد انقضاء
+    الفترة. الحقل المسجل بدالة مدخلات لا يعاد رسمه إلا إذا تغيرت مدخلاته منذ
+    آخر رسم، فتحريك المؤشر مثلاً لا يعيد حساب إحصائيات النص.
+    """
+
+    def __init__(self, interval=FRAME_INTERVAL, parent=None):
+        super().__init__(parent)
+        self._fields = {}
+        self._inputs = {}
+        self._dirty = {}
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(max(0, interval))
+        self._timer.timeout.connect(self.flush)
+
+    def set_interval(self, interval):
+        """تغيير الفترة الدنيا بين مرات الرسم."""
+        self._timer.setInterval(max(0, interval))
+
+    def register(self, name, render, inputs=None):
+        """تسجيل حقل بدالة رسمه، و inputs دالة تعيد ما يعتمد عليه الحقل.
+
+        إن أعادت render القيمة False عد الحقل غير مرسوم فيعاد رسمه في المرة التالية.
+        """
+        self._fields[name] = (render, inputs)
+        self._inputs.pop(name, None)
+
+    def mark_dirty(self, *names):
+        """طلب رسم الحقول في الإطار التالي."""
+        for name in names:
+            self._dirty[name] = None
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def invalidate(self, *names):
+        """إعادة رسم الحقول حتى لو لم تتغير مدخلاتها."""
+        for name in names:
+            self._inputs.pop(name, None)
+        self.mark_dirty(*names)
+
+    def flush(self):
+        """رسم الحقول المتسخة الآن."""
+        self._timer.stop()
+        dirty, self._dirty = self._dirty, {}
+        for name in dirty:
+            field = self._fields.get(name)
+            if field is None:
+                continue
+            render, inputs = field
+            try:
+                key = inputs() if inputs is not None else _NOT_RENDERED
+                if key is not _NOT_RENDERED and self._inputs.get(name, _NOT_RENDERED) == key:
+                    continue
+                if render() is False:
+                    self._inputs.pop(name, None)
+                elif key is not _NOT_RENDERED:
+                    self._inputs[name] = key
+            except RuntimeError:
+                # المحرر أغلق قبل الرسم
+                self._inputs.pop(name, None)
+            except Exception as e:
+                log_in_arabic(logger, logging.ERROR, f"خطأ في تحديث {name}: {str(e)}")
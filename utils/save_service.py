@@ -0,0 +1,203 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict, deque
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+from utils.file_saver import atomic_write, save_editor
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# عدد عمليات الكتابة الأخيرة المستخدمة في حساب متوسط زمن الكتابة
+LATENCY_SAMPLES = 50
+
+
+class _SaveJob:
+    __slots__ = ('id', 'path', 'snapshot', 'encoding', 'line_ending', 'queued_at')
+
+    def __init__(self, job_id, path, snapshot, encoding, line_ending):
+        self.id = job_id
+        self.path = path
+        self.snapshot = snapshot
+        self.encoding = encoding
+        self.line_ending = line_ending
+        self.queued_at = time.perf_counter()
+
+
+class SaveWorker(QThread):
+    """خيط يكتب لقطات المستندات على القرص واحدة تلو الأخرى.
+
+    لكل مسار عملية منتظرة واحدة على الأكثر: اللقطة الأحدث تحل محل المنتظرة
+    قبل بدء كتابتها، فلا يكتب الملف مرتين دون داع.
+    """
+
+    job_done = pyqtSignal(int, float, float)  # المعرف، زمن الانتظار، زمن الكتابة
+    job_failed = pyqtSignal(int, str)  # المعرف، رسالة الخطأ
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._condition = threading.Condition()
+        self._pending = OrderedDict()
+        self._busy = False
+        self._stopping = False
+        self.failures = 0
+
+    def submit(self, job):
+        """إضافة عملية للقائمة، ويعيد معرف العملية التي حلت محلها إن وجدت."""
+        key = os.path.normcase(job.path)
+        with self._condition:
+            replaced = self._pending.get(key)
+            self._pending[key] = job
+            self._condition.notify_all()
+        return replaced.id if replaced else None
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._pending) + (1 if self._busy else 0)
+
+    def wait_for_idle(self, timeout=None):
+        """انتظار اكتمال جميع العمليات، ويعيد False عند انتهاء المهلة."""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self):
+        """إيقاف الخيط بعد كتابة ما في القائمة."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+
+    def run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return
+                _, job = self._pending.popitem(last=False)
+                self._busy = True
+
+            started = time.perf_counter()
+            try:
+                atomic_write(job.path, job.snapshot.iter_chunks(), job.encoding, job.line_ending)
+            except Exception as e:
+                self.failures += 1
+                self.job_failed.emit(job.id, str(e))
+            else:
+                finished = time.perf_counter()
+                self.job_done.emit(job.id, started - job.queued_at, finished - started)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+
+class SaveService(QObject):
+    """حفظ المستندات في الخلفية دون إيقاف الواجهة.
+
+    يؤخذ من المحرر لقطة ثابتة من نصه وتكتب في خيط الحفظ، ثم تحدث حالة التعديل
+    في المحرر عند اكتمال الكتابة أو فشلها.
+    """
+
+    saved = pyqtSignal(object, str)  # المحرر، المسار
+    failed = pyqtSignal(object, str, str, bool)  # المحرر، المسار، رسالة الخطأ، حفظ تلقائي
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = {}
+        self._next_id = 1
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._waits = deque(maxlen=LATENCY_SAMPLES)
+        self.writes = 0
+        self.coalesced = 0
+        self.failures = 0
+
+        self._worker = SaveWorker(self)
+        self._worker.job_done.connect(self._on_job_done)
+        self._worker.job_failed.connect(self._on_job_failed)
+        self._worker.start()
+
+    def save(self, editor, file_path, automatic=False):
+        """جدولة حفظ المحرر في المسار المحدد، automatic للحفظ التلقائي."""
+        # الملفات الكبيرة تقرأ من ربط الملف الأصلي الذي يغلق عند الاستبدال، فتحفظ مباشرة
+        if getattr(editor, 'large_file', None):
+            save_editor(editor, file_path)
+            editor.document().setModified(False)
+            self.saved.emit(editor, file_path)
+            return
+
+        snapshot = editor.snapshot()
+        job = _SaveJob(self._next_id, file_path, snapshot,
+                       getattr(editor, 'encoding', None) or 'utf-8',
+                       getattr(editor, 'line_ending', None) or '\n')
+        self._next_id += 1
+        self._jobs[job.id] = (editor, file_path, snapshot.revision, editor.undo_store.state_token(), automatic)
+
+        replaced = self._worker.submit(job)
+        if replaced is not None and self._jobs.pop(replaced, None) is not None:
+            self.coalesced += 1
+
+    def _on_job_done(self, job_id, wait, latency):
+        self.writes += 1
+        self._waits.append(wait)
+        self._latencies.append(latency)
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        editor, file_path, revision, token, _ = job
+        try:
+            if editor.buffer.revision == revision:
+                editor.document().setModified(False)
+            else:
+                # تعديلات بعد أخذ اللقطة: الحالة المحفوظة هي حالة اللقطة لا الحالة الحالية
+                editor.undo_store.mark_clean(token)
+        except RuntimeError:
+            # أغلق التبويب قبل اكتمال الحفظ
+            return
+        log_in_arabic(logger, logging.DEBUG, f"تم حفظ الملف في {latency * 1000:.0f} م.ث: {file_path}")
+        self.saved.emit(editor, file_path)
+
+    def _on_job_failed(self, job_id, message):
+        self.failures += 1
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return
+        editor, file_path, _, _, automatic = job
+        log_in_arabic(logger, logging.ERROR, f"فشل حفظ الملف {file_path}: {message}")
+        self.failed.emit(editor, file_path, message, automatic)
+
+    def is_pending(self, editor):
+        """هل للمحرر عملية حفظ لم تكتمل بعد."""
+        return any(job[0] is editor for job in self._jobs.values())
+
+    def queue_depth(self):
+        """عدد عمليات الحفظ المنتظرة والجارية."""
+        return self._worker.queue_depth()
+
+    def metrics(self):
+        """إحصائيات الحفظ: عمق القائمة وأزمنة الانتظار والكتابة (بالمللي ثانية)."""
+        latencies = list(self._latencies)
+        waits = list(self._waits)
+        return {
+            'queue_depth': self.queue_depth(),
+            'writes': self.writes,
+            'coalesced': self.coalesced,
+            'failures': self.failures,
+            'last_write_ms': latencies[-1] * 1000 if latencies else 0,
+            'average_write_ms': sum(latencies) * 1000 / len(latencies) if latencies else 0,
+            'max_write_ms': max(latencies) * 1000 if latencies else 0,
+            'average_wait_ms': sum(waits) * 1000 / len(waits) if waits else 0,
+        }
+
+    def flush(self, timeout=None):
+        """انتظار اكتمال الحفظ، ويعيد False إن فشلت كتابة أو انتهت المهلة."""
+        failures = self._worker.failures
+        if not self._worker.wait_for_idle(timeout):
+            return False
+        return self._worker.failures == failures
+
+    def shutdown(self):
+        """كتابة ما تبقى في القائمة ثم إيقاف الخيط."""
+        self._worker.stop()
+        self._worker.wait()
@@ -0,0 +1,95 @@
+import os
+import json
+import hashlib
+import logging
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# ملف الجلسة الأخيرة
+SESSION_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'cache', 'session.json')
+
+# إصدار صيغة ملف الجلسة
+SESSION_VERSION = 1
+
+# حجم الجزء المقروء من بداية الملف ونهايته لحساب البصمة
+FINGERPRINT_SAMPLE = 64 * 1024
+
+
+def file_fingerprint(file_path):
+    """بصمة سريعة للملف: الحجم ووقت التعديل وتجزئة بدايته ونهايته."""
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        digest.update(file.read(FINGERPRINT_SAMPLE))
+        if stat.st_size > FINGERPRINT_SAMPLE:
+            file.seek(max(FINGERPRINT_SAMPLE, stat.st_size - FINGERPRINT_SAMPLE))
+            digest.update(file.read(FINGERPRINT_SAMPLE))
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'hash': digest.hexdigest()}
+
+
+def fingerprint_matches(file_path, fingerprint):
+    """التحقق من أن الملف لم يتغير منذ أخذ البصمة."""
+    if not fingerprint:
+        return False
+    try:
+        # مقارنة الحجم ووقت التعديل أولاً قبل قراءة أي بايت
+        stat = os.stat(file_path)
+        if stat.st_size != fingerprint.get('size') or stat.st_mtime_ns != fingerprint.get('mtime_ns'):
+            return False
+        return file_fingerprint(file_path) == fingerprint
+    except OSError:
+        return False
+
+
+class SessionManager:
+    """حفظ التبويبات المفتوحة عند الخروج واستعادتها عند التشغيل التالي."""
+
+    def __init__(self, session_file=SESSION_FILE):
+        self.session_file = session_file
+
+    def save(self, tab_manager):
+        """حفظ حالة التبويبات في ملف الجلسة."""
+        try:
+            session = tab_manager.session_state()
+            session['version'] = SESSION_VERSION
+            os.makedirs(os.path.dirname(self.session_file), exist_ok=True)
+            # الكتابة في ملف مؤقت ثم استبداله حتى لا يتلف ملف الجلسة عند انقطاع الكتابة
+            temp_file = self.session_file + '.tmp'
+            with open(temp_file, 'w', encoding='utf-8') as file:
+                json.dump(session, file, ensure_ascii=False)
+            os.replace(temp_file, self.session_file)
+            log_in_arabic(logger, logging.INFO, f"تم حفظ الجلسة: {len(session['tabs'])} تبويب")
+            return True
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في حفظ الجلسة: {e}")
+            return False
+
+    def load(self):
+        """قراءة ملف الجلسة، أو None إن لم يوجد أو كان بصيغة غير معروفة."""
+        try:
+            if not os.path.exists(self.session_file):
+                return None
+            with open(self.session_file, 'r', encoding='utf-8') as file:
+                session = json.load(file)
+            if session.get('version') != SESSION_VERSION:
+                return None
+            return session
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في قراءة الجلسة: {e}")
+            return None
+
+    def restore(self, tab_manager):
+        """استعادة تبويبات الجلسة السابقة، ويعيد عدد التبويبات المستعادة."""
+        session = self.load()
+        if not session or not session.get('tabs'):
+            return 0
+        try:
+            restored = tab_manager.restore_tabs(session['tabs'], session.get('current', 0))
+            log_in_arabic(logger, logging.INFO, f"تمت استعادة الجلسة: {restored} تبويب")
+            return restored
+        except Exception as e:
+            log_in_arabic(logger, logging.ERROR, f"خطأ في استعادة الجلسة: {e}")
+            return 0
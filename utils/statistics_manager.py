@@ -7,6 +7,7 @@ import re
 from functools import lru_cache
 import pathlib
 from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+from utils.file_loader import DEFAULT_ENCODING, line_ending_label
 import logging
 
 # إعداد التسجيل العربي
@@ -224,6 +225,8 @@ class StatisticsManager(QObject):
             
         self._current_editor = editor
         if editor:
+            self.show_file_format(editor)
+
             # تحديث نوع الملف للمحرر الحالي
             file_type = self._editor_file_types.get(editor)
             if file_type and 'file_type' in self.stats_labels:
@@ -326,6 +329,16 @@ class StatisticsManager(QObject):
         except Exception as e:
             log_in_arabic(logger, logging.ERROR, f"خطأ في تحديث الإحصائيات: {str(e)}")
             
+    def update_document_statistics(self, editor):
+        """عرض إحصائيات المحرر من عداداته المحدثة مع كل تعديل.
+
+        نص المستند لا ينسخ إلا إذا كانت هناك إضافات تحتاج إليه.
+        """
+        if any(plugin.enabled for plugin in self.plugins):
+            self.update_statistics(editor.toPlainText())
+            return
+        self._update_basic_labels(editor.text_statistics.stats())
+
     def _update_basic_labels(self, stats):
         """تحديث المؤشرات الأساسية"""
         if 'chars' in stats and 'chars' in self.stats_labels:
@@ -372,6 +385,35 @@ class StatisticsManager(QObject):
         self.status_bar.addPermanentWidget(self.line_ending_label)
         self.status_bar.addPermanentWidget(self.encoding_label)
 
+    @property
+    def current_encoding(self):
+        """ترميز ملف المحرر الحالي"""
+        return getattr(self._current_editor, 'encoding', DEFAULT_ENCODING)
+
+    @current_encoding.setter
+    def current_encoding(self, encoding):
+        if self._current_editor is not None:
+            self._current_editor.encoding = encoding
+
+    @property
+    def current_line_ending(self):
+        """نهاية الأسطر لملف المحرر الحالي"""
+        return getattr(self._current_editor, 'line_ending', '\n')
+
+    @current_line_ending.setter
+    def current_line_ending(self, line_ending):
+        if self._current_editor is not None:
+            self._current_editor.line_ending = line_ending
+
+    def show_file_format(self, editor=None):
+        """عرض ترميز المحرر ونهاية أسطره في شريط الحالة"""
+        editor = editor or self._current_editor
+        # المحررات في الخلفية تعرض بياناتها عند تفعيلها
+        if editor is None or editor is not self._current_editor:
+            return
+        self.encoding_label.setText(getattr(editor, 'encoding', DEFAULT_ENCODING))
+        self.line_ending_label.setText(line_ending_label(getattr(editor, 'line_ending', '\n')))
+
     def show_encodings_menu(self, event):
         """عرض قائمة الترميزات"""
         menu = QMenu()
@@ -381,13 +423,14 @@ class StatisticsManager(QObject):
             ("صيغة التحويل الموحد-16 الصغيرة", "UTF-16"),
             ("صيغة التحويل الموحد-16 الكبيرة", "utf-16-be"),
             ("صيغة التحويل الموحد-32 الصغيرة", "utf-32-le"),
-            ("صيغة التحويل الموحد-32 الكبيرة", "utf-32-be")
+            ("صيغة التحويل الموحد-32 الكبيرة", "utf-32-be"),
+            ("العربية - ويندوز 1256", "CP1256")
         ]
         
         for name, encoding in encodings:
             action = QAction(name, menu)
             action.setCheckable(True)
-            action.setChecked(self.current_encoding == encoding if hasattr(self, 'current_encoding') else encoding == "UTF-8")
+            action.setChecked(self.current_encoding.lower() == encoding.lower())
             action.triggered.connect(lambda checked, e=encoding: self.change_file_encoding(e))
             menu.addAction(action)
         
@@ -405,7 +448,7 @@ class StatisticsManager(QObject):
         for name, ending in line_endings:
             action = QAction(name, menu)
             action.setCheckable(True)
-            action.setChecked(self.current_line_ending == ending if hasattr(self, 'current_line_ending') else ending == "\n")
+            action.setChecked(self.current_line_ending == ending)
             action.triggered.connect(lambda checked, e=ending: self.change_line_ending(e))
             menu.addAction(action)
         
@@ -417,16 +460,15 @@ class StatisticsManager(QObject):
         self.encoding_label.setText(encoding)
         self.file_settings_changed.emit({
             'encoding': encoding,
-            'line_ending': getattr(self, 'current_line_ending', '\n')
+            'line_ending': self.current_line_ending
         })
 
     def change_line_ending(self, ending):
         """تغيير نوع نهاية الأسطر"""
         self.current_line_ending = ending
-        ending_text = "CRLF" if ending == "\r\n" else "LF" if ending == "\n" else "CR"
-        self.line_ending_label.setText(ending_text)
+        self.line_ending_label.setText(line_ending_label(ending))
         self.file_settings_changed.emit({
-            'encoding': getattr(self, 'current_encoding', 'UTF-8'),
+            'encoding': self.current_encoding,
             'line_ending': ending
         })
 
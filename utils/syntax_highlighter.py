@@ -6,9 +6,17 @@ class CodeHighlighter(QSyntaxHighlighter):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.enabled = True
+        # الكتل الأطول من هذا الحد لا تلون لأن كلفة التعابير النمطية تتضاعف معها
+        self.max_block_length = None
         self._block_cache = OrderedDict()
         self._cache_size = 1000
 
+        # تمييز علامة التنصيص في نهاية السطر بدلاً من إضافة الحرف الخفي بعدها
+        self.quote_marker = False
+        self._marker_format = QTextCharFormat()
+        self._marker_format.setUnderlineStyle(QTextCharFormat.DotLine)
+        self._marker_format.setUnderlineColor(QColor("#9CDCFE"))
+
         # إعداد قواعد التلوين
         self.highlighting_rules = [
             (r'""".*?"""', self.format('comment')),
@@ -60,15 +68,32 @@ class CodeHighlighter(QSyntaxHighlighter):
 
     def highlightBlock(self, text):
         """تلوين كتلة نصية"""
-        if not self.enabled or not text:
-            return        
+        if not text:
+            return
+        if self.enabled and not (self.max_block_length and len(text) > self.max_block_length):
+            self._apply_rules(text)
+        if self.quote_marker:
+            self._mark_trailing_quote(text)
+
+    def _mark_trailing_quote(self, text):
+        """زخرفة علامة التنصيص التي ينتهي بها السطر فوق تلوينها"""
+        stripped = text.rstrip()
+        if not stripped.endswith('"'):
+            return
+        position = len(stripped) - 1
+        marker_format = QSyntaxHighlighter.format(self, position)
+        marker_format.merge(self._marker_format)
+        self.setFormat(position, 1, marker_format)
+
+    def _apply_rules(self, text):
+        """تطبيق قواعد التلوين على الكتلة، من التخزين المؤقت إن وجد"""
         block_number = self.currentBlock().blockNumber()
         cached_formats = self._get_cached_formats(block_number)
         if cached_formats:
             for start, length, format in cached_formats:
                 self.setFormat(start, length, format)
             return
-        
+
         formats = []
         for pattern, format in self._compiled_rules:
             match_iter = pattern.globalMatch(text)
@@ -93,6 +118,16 @@ class CodeHighlighter(QSyntaxHighlighter):
                 self._block_cache.popitem(last=False)
         self._block_cache[block_number] = formats
 
+    def cache_entries(self):
+        """عدد الكتل المخزنة تنسيقاتها مؤقتًا"""
+        return len(self._block_cache)
+
+    def clear_cache(self):
+        """تفريغ التخزين المؤقت دون إعادة التلوين"""
+        freed = len(self._block_cache)
+        self._block_cache.clear()
+        return freed
+
     def rehighlight(self):
         """إعادة تلوين المستند"""
         self._block_cache.clear()
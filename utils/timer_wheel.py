@@ -0,0 +1,145 @@
+import inspect
+import weakref
+import logging
+from PyQt5 import sip
+from PyQt5.QtCore import QObject, QTimer, QElapsedTimer
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# دقة العجلة (بالمللي ثانية) وعدد خاناتها
+TICK_MS = 100
+WHEEL_SLOTS = 512
+
+
+class _WheelEntry:
+    __slots__ = ('key', 'slot', 'due', 'callback', 'weak', 'interval')
+
+
+class TimerWheel(QObject):
+    """مؤقت واحد مشترك يشغل المهام المؤجلة والدورية لجميع المحررات.
+
+    المهام موزعة على خانات عجلة بدقة TICK_MS، فكلفة الجدولة والإلغاء ثابتة مهما
+    كثرت التبويبات. المؤقت لا يدور كل خانة، بل يضبط على موعد أقرب مهمة مستحقة
+    ويتوقف عند خلو العجلة، فلا يوقظ التطبيق إلا حين يكون هناك ما يشغله.
+    """
+
+    def __init__(self, tick=TICK_MS, slots=WHEEL_SLOTS, parent=None):
+        super().__init__(parent)
+        self._tick = tick
+        self._slots = [{} for _ in range(slots)]
+        self._cursor = 0  # آخر خانة مرت عليها العجلة، بعدد الخانات منذ إنشائها
+        self._entries = {}
+        self._armed_due = None
+        self._clock = QElapsedTimer()
+        self._clock.start()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._advance)
+
+    def schedule(self, owner, name, delay, callback, repeat=False):
+        """جدولة مهمة بعد delay مللي ثانية.
+
+        إعادة جدولة المهمة نفسها (المالك والاسم) تلغي السابقة كإعادة تشغيل مؤقت،
+        و repeat يعيد تشغيلها كل delay. المالك ودوال الكائنات تحفظ بمرجع ضعيف حتى
+        لا تبقي المحرر المغلق في الذاكرة، ومهام المالك تلغى عند حذفه.
+        """
+        key = (weakref.ref(owner, self._owner_collected), name)
+        self._remove(key)
+        entry = _WheelEntry()
+        entry.key = key
+        entry.weak = inspect.ismethod(callback)
+        entry.callback = weakref.WeakMethod(callback) if entry.weak else callback
+        entry.interval = delay if repeat else None
+        self._place(entry, delay)
+        if self._armed_due is None or entry.due < self._armed_due:
+            self._arm(entry.due)
+
+    def cancel(self, owner, name):
+        """إلغاء مهمة مجدولة."""
+        self._remove((weakref.ref(owner), name))
+
+    def cancel_all(self, owner):
+        """إلغاء جميع مهام المالك."""
+        for key in [key for key in self._entries if key[0]() is owner]:
+            self._remove(key)
+
+    def is_scheduled(self, owner, name):
+        return (weakref.ref(owner), name) in self._entries
+
+    def _owner_collected(self, owner_ref):
+        for key in [key for key in self._entries if key[0] is owner_ref]:
+            self._remove(key)
+
+    def _now(self):
+        """رقم الخانة الحالية حسب الوقت المنقضي."""
+        return self._clock.elapsed() // self._tick
+
+    def _place(self, entry, delay):
+        ticks = max(1, -(-int(delay) // self._tick))
+        entry.due = max(self._now(), self._cursor) + ticks
+        entry.slot = entry.due % len(self._slots)
+        self._slots[entry.slot][entry.key] = entry
+        self._entries[entry.key] = entry
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._slots[entry.slot].pop(key, None)
+
+    def _arm(self, due):
+        """ضبط المؤقت على موعد الخانة due."""
+        self._armed_due = due
+        self._timer.start(max(0, due * self._tick - self._clock.elapsed()))
+
+    def _advance(self):
+        """تشغيل المهام المستحقة في الخانات التي مر وقتها ثم ضبط المؤقت على التالية."""
+        self._armed_due = None
+        now = max(self._now(), self._cursor)
+        # الخانات بين آخر خانة مرت والخانة الحالية، والعجلة كلها إن طال التوقف
+        steps = min(now - self._cursor, len(self._slots))
+        due = []
+        for step in range(1, steps + 1):
+            slot = self._slots[(self._cursor + step) % len(self._slots)]
+            for key, entry in list(slot.items()):
+                if entry.due <= now:
+                    self._remove(key)
+                    due.append(entry)
+        self._cursor = now
+
+        for entry in sorted(due, key=lambda item: item.due):
+            callback = entry.callback() if entry.weak else entry.callback
+            if callback is None or entry.key[0]() is None:
+                continue
+            # إعادة الجدولة قبل التشغيل حتى تستطيع المهمة إلغاء نفسها
+            if entry.interval:
+                self._place(entry, entry.interval)
+            try:
+                callback()
+            except Exception as e:
+                owner = entry.key[0]()
+                if isinstance(e, RuntimeError) and (owner is None or
+                                                    (isinstance(owner, sip.simplewrapper) and sip.isdeleted(owner))):
+                    # الكائن حذف من Qt قبل إلغاء مهامه
+                    self._remove(entry.key)
+                else:
+                    log_in_arabic(logger, logging.ERROR, f"خطأ في تنفيذ مهمة مجدولة: {e}")
+
+        if self._entries:
+            self._arm(min(entry.due for entry in self._entries.values()))
+        else:
+            self._armed_due = None
+            self._timer.stop()
+
+
+_shared_wheel = None
+
+
+def shared_timer_wheel():
+    """العجلة المشتركة للتطبيق، تنشأ عند أول استخدام."""
+    global _shared_wheel
+    if _shared_wheel is None:
+        _shared_wheel = TimerWheel()
+    return _shared_wheel
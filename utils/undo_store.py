@@ -0,0 +1,269 @@
+import sys
+import time
+import zlib
+import marshal
+import logging
+from collections import deque
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# الحد الافتراضي لذاكرة سجل التراجع لكل مستند (بالبايت)
+DEFAULT_UNDO_BUDGET = 16 * 1024 * 1024
+
+# عدد الخطوات الأحدث التي تبقى دون ضغط
+UNCOMPRESSED_STEPS = 32
+
+# أصغر حجم لخطوة يستحق ضغطها (بالبايت)
+MIN_COMPRESS_SIZE = 512
+
+# أقصى مدة بين ضغطتي مفاتيح لدمجهما في خطوة واحدة (بالثواني)
+COALESCE_INTERVAL = 1.5
+
+# الكلفة التقديرية لكل خطوة وتعديل خارج النصوص نفسها
+STEP_OVERHEAD = 96
+EDIT_OVERHEAD = 72
+
+
+def _payload_size(value):
+    """حجم نص التعديل، أو حجم لقطة التنسيق في تعديلات التنسيق."""
+    if isinstance(value, tuple):
+        return len(marshal.dumps(value))
+    return sys.getsizeof(value)
+
+
+class _UndoStep:
+    """خطوة تراجع: تعديل أو أكثر يطبق ويتراجع عنه معاً."""
+
+    __slots__ = ('id', 'edits', 'packed', 'size', 'time')
+
+    def __init__(self, step_id, edits):
+        self.id = step_id
+        self.edits = edits
+        self.packed = None
+        self.time = time.monotonic()
+        self.size = 0
+        self.measure()
+
+    def measure(self):
+        """حساب الذاكرة التقريبية للخطوة."""
+        if self.packed is not None:
+            self.size = STEP_OVERHEAD + len(self.packed)
+        else:
+            self.size = STEP_OVERHEAD + sum(
+                EDIT_OVERHEAD + _payload_size(removed) + _payload_size(inserted)
+                for _, removed, inserted in self.edits
+            )
+        return self.size
+
+    def compress(self):
+        """ضغط تعديلات الخطوة إن كان ذلك يوفر ذاكرة."""
+        if self.packed is not None or self.size < MIN_COMPRESS_SIZE:
+            return 0
+        packed = zlib.compress(marshal.dumps(self.edits), 6)
+        if len(packed) + STEP_OVERHEAD >= self.size:
+            return 0
+        before = self.size
+        self.packed, self.edits = packed, None
+        return before - self.measure()
+
+    def unpacked_edits(self):
+        """تعديلات الخطوة بعد فك ضغطها إن لزم."""
+        if self.packed is not None:
+            return marshal.loads(zlib.decompress(self.packed))
+        return self.edits
+
+
+class UndoStore:
+    """سجل تراجع لمستند واحد محدود بحجم من الذاكرة.
+
+    كل تعديل يسجل كـ (الموضع، النص المحذوف، النص المدرج). تعديل التنسيق يسجل بالشكل
+    نفسه مع لقطتي التنسيق قبله وبعده (tuple) بدلاً من النصين. ضغطات المفاتيح المتتالية
+    تدمج في خطوة واحدة، والخطوات القديمة تضغط، وعند تجاوز الحد تحذف الأقدم فقط.
+    """
+
+    def __init__(self, budget=DEFAULT_UNDO_BUDGET):
+        self.budget = budget
+        self._undo = deque()
+        self._redo = []
+        self._memory_used = 0
+        self._next_id = 1
+        # معرف آخر خطوة قبل أقدم خطوة محفوظة، وحالة الحفظ على القرص
+        self._base_id = 0
+        self._clean_id = 0
+        # الخطوة المفتوحة تجمع تعديلات العملية الواحدة حتى يغلقها المحرر
+        self._open_step = None
+        self.dropped_steps = 0
+
+    @property
+    def memory_used(self):
+        return self._memory_used
+
+    @property
+    def depth(self):
+        """عدد خطوات التراجع المتاحة."""
+        return len(self._undo)
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def has_history(self):
+        return bool(self._undo or self._redo)
+
+    def clear(self):
+        """حذف السجل كاملاً."""
+        self._undo.clear()
+        self._redo = []
+        self._memory_used = 0
+        self._open_step = None
+        self._base_id = self._clean_id = self._next_id
+        self._next_id += 1
+
+    def _top_id(self):
+        return self._undo[-1].id if self._undo else self._base_id
+
+    def state_token(self):
+        """معرف الحالة الحالية، يمرر لاحقاً إلى mark_clean عند اكتمال حفظها."""
+        self._open_step = None
+        return self._top_id()
+
+    def mark_clean(self, token=None):
+        """تسجيل الحالة الحالية (أو حالة token) كحالة الملف المحفوظ."""
+        self._clean_id = self._top_id() if token is None else token
+        self._open_step = None
+
+    def is_clean(self):
+        """هل يطابق المستند الحالة المحفوظة."""
+        return self._clean_id == self._top_id()
+
+    def record(self, position, removed, inserted, join=False):
+        """تسجيل تعديل. join يضيفه لآخر خطوة بدلاً من إنشاء خطوة جديدة."""
+        if not removed and not inserted:
+            return
+        edit = (position, removed, inserted)
+        if join:
+            # لا سجل يتأثر بالتعديل، كإضافات التحميل الأولى
+            if not self.has_history():
+                return
+            if self._undo and not self._redo and self._undo[-1].packed is None:
+                self._extend(self._undo[-1], edit)
+                return
+
+        self._clear_redo()
+        if self._open_step is not None:
+            self._extend(self._open_step, edit)
+        elif not self._coalesce(edit):
+            step = _UndoStep(self._next_id, [edit])
+            self._next_id += 1
+            self._undo.append(step)
+            self._memory_used += step.size
+            self._open_step = step
+        self._enforce_budget()
+
+    def close_step(self):
+        """إنهاء الخطوة المفتوحة؛ التعديلات التالية تبدأ خطوة جديدة."""
+        self._open_step = None
+
+    def _extend(self, step, edit):
+        step.edits.append(edit)
+        self._memory_used -= step.size
+        self._memory_used += step.measure()
+
+    def _coalesce(self, edit):
+        """دمج ضغطة مفتاح مع الخطوة السابقة إن كانت كتابة أو حذفاً متصلاً."""
+        if not self._undo:
+            return False
+        step = self._undo[-1]
+        if (step.packed is not None or len(step.edits) != 1 or step.id == self._clean_id
+                or time.monotonic() - step.time > COALESCE_INTERVAL):
+            return False
+
+        position, removed, inserted = edit
+        last_position, last_removed, last_inserted = step.edits[0]
+        if not removed and not last_removed and len(inserted) == 1 and inserted != '\n':
+            # كتابة متتالية: الحرف الجديد بعد آخر حرف مكتوب مباشرة
+            if position != last_position + len(last_inserted):
+                return False
+            # كل كلمة خطوة مستقلة: الحرف بعد مسافة يبدأ خطوة جديدة
+            if last_inserted.endswith(' ') and inserted != ' ':
+                return False
+            merged = (last_position, '', last_inserted + inserted)
+        elif not inserted and not last_inserted and len(removed) == 1:
+            if position + 1 == last_position:
+                merged = (position, removed + last_removed, '')  # مفتاح الحذف للخلف
+            elif position == last_position:
+                merged = (position, last_removed + removed, '')  # مفتاح الحذف للأمام
+            else:
+                return False
+        else:
+            return False
+
+        step.edits[0] = merged
+        step.time = time.monotonic()
+        self._memory_used -= step.size
+        self._memory_used += step.measure()
+        return True
+
+    def undo(self):
+        """سحب آخر خطوة، ويعيد تعديلاتها لعكسها بالترتيب المعاكس."""
+        if not self._undo:
+            return None
+        self._open_step = None
+        step = self._undo.pop()
+        self._redo.append(step)
+        return step.unpacked_edits()
+
+    def redo(self):
+        """إعادة آخر خطوة تم التراجع عنها، ويعيد تعديلاتها لتطبيقها بالترتيب."""
+        if not self._redo:
+            return None
+        self._open_step = None
+        step = self._redo.pop()
+        self._undo.append(step)
+        return step.unpacked_edits()
+
+    def _clear_redo(self):
+        for step in self._redo:
+            self._memory_used -= step.size
+        self._redo = []
+
+    def compact(self):
+        """ضغط الخطوات الأقدم من الخطوات الأحدث غير المضغوطة."""
+        saved = 0
+        for index in range(max(0, len(self._undo) - UNCOMPRESSED_STEPS)):
+            step = self._undo[index]
+            if step.packed is None and step is not self._open_step:
+                saved += step.compress()
+        self._memory_used -= saved
+        return saved
+
+    def _enforce_budget(self):
+        """ضغط القديم ثم حذف الأقدم فقط حتى يعود الحجم تحت الحد."""
+        if self._memory_used <= self.budget:
+            return
+        self.compact()
+        dropped = 0
+        # تبقى الخطوة الأخيرة دائماً حتى لو تجاوزت الحد وحدها
+        while self._memory_used > self.budget and len(self._undo) > 1:
+            step = self._undo.popleft()
+            self._memory_used -= step.size
+            self._base_id = step.id
+            dropped += 1
+        if dropped:
+            self.dropped_steps += dropped
+            log_in_arabic(logger, logging.DEBUG, f"تم حذف أقدم {dropped} خطوة من سجل التراجع لتجاوز الحد")
+
+    def stats(self):
+        """ملخص حالة السجل: عدد الخطوات وحجمها."""
+        return {
+            'undo_depth': len(self._undo),
+            'redo_depth': len(self._redo),
+            'memory_used': self._memory_used,
+            'budget': self.budget,
+            'dropped_steps': self.dropped_steps,
+        }
@@ -0,0 +1,271 @@
+import re
+import time
+import heapq
+import logging
+from collections import Counter
+from PyQt5.QtCore import QTimer
+from utils.arabic_logger import setup_arabic_logging, log_in_arabic
+
+# إعداد التسجيل العربي
+formatter = setup_arabic_logging()
+logger = logging.getLogger(__name__)
+
+# التشكيل وعلامات المصحف، تتجاهل مع التطويل عند المقارنة
+DIACRITICS = '\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED'
+DIACRITICS_PATTERN = re.compile(f'[{DIACRITICS}\u0640]')
+
+# صور الألف تعامل كألف واحدة
+ALEF_FORMS = str.maketrans('أإآٱ', 'اااا')
+
+# الكلمة تبدأ بحرف وتتبعه أحرف أو أرقام أو تشكيل
+WORD = f'(?<![\\w{DIACRITICS}])[^\\W\\d][\\w{DIACRITICS}]*'
+WORD_PATTERN = re.compile(WORD)
+
+# أقصر كلمة تفهرس، وعدد أفضل الكلمات المخزن في كل عقدة من الشجرة
+MIN_WORD_LENGTH = 3
+TOP_CACHE_SIZE = 20
+
+# التعديل الذي يتجاوز هذا العدد من الكتل أو الأحرف يفهرس على دفعات لا فوراً
+SYNC_BLOCK_LIMIT = 16
+SYNC_CHAR_LIMIT = 4096
+
+# أقصى زمن لكل دفعة فهرسة (بالثواني)، والمهلة قبل المحاولة مجدداً أثناء تحميل الملف (بالمللي ثانية)
+INDEX_STEP_BUDGET = 0.004
+BUSY_RETRY_DELAY = 100
+
+# علامة الكتلة التي لم تعد كلماتها بعد
+_STALE = object()
+
+
+def normalize_word(word):
+    """صورة الكلمة للمقارنة: دون تشكيل أو تطويل، بألف موحدة وأحرف لاتينية صغيرة."""
+    return DIACRITICS_PATTERN.sub('', word).translate(ALEF_FORMS).casefold()
+
+
+def count_words(text):
+    """عدد مرات كل كلمة في النص، أو None إن لم يكن فيه كلمات."""
+    words = Counter(word for word in WORD_PATTERN.findall(text) if len(word) >= MIN_WORD_LENGTH)
+    return words or None
+
+
+def _rank(entry):
+    count, form = entry
+    return (-count, len(form), form)
+
+
+class _TrieNode:
+    __slots__ = ('children', 'count', 'forms', 'top')
+
+    def __init__(self):
+        self.children = {}
+        self.count = 0
+        self.forms = None
+        self.top = None
+
+
+class WordTrie:
+    """شجرة بادئات للكلمات بصورتها المطبعة مع عدد مرات ورودها.
+
+    كل كلمة تحفظ صورها الأصلية (بالتشكيل أو دونه) ويقترح أكثرها وروداً. كل عقدة
+    تخزن أفضل الكلمات تحتها، ويمسح هذا المخزن في مسار الكلمة فقط عند تغير عددها،
+    فالبحث بالبادئة لا يمر على الشجرة كلها.
+    """
+
+    def __init__(self, cache_size=TOP_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._root = _TrieNode()
+        self.word_count = 0
+
+    def add(self, word, count=1):
+        """إضافة count مرة من الكلمة، والعدد السالب يزيلها."""
+        key = normalize_word(word)
+        if not key:
+            return
+        node = self._root
+        path = [node]
+        for char in key:
+            child = node.children.get(char)
+            if child is None:
+                if count <= 0:
+                    return
+                child = node.children[char] = _TrieNode()
+            node = child
+            path.append(node)
+
+        had_word = node.count > 0
+        node.count += count
+        if node.count > 0:
+            forms = node.forms or {}
+            forms[word] = forms.get(word, 0) + count
+            if forms[word] <= 0:
+                del forms[word]
+            node.forms = forms
+        else:
+            node.count = 0
+            node.forms = None
+        self.word_count += (node.count > 0) - had_word
+
+        for visited in path:
+            visited.top = None
+        # حذف العقد التي لم يعد تحتها أي كلمة
+        for index in range(len(key), 0, -1):
+            current = path[index]
+            if current.count or current.children:
+                break
+            del path[index - 1].children[key[index - 1]]
+
+    def complete(self, prefix, limit=10):
+        """أكثر الكلمات وروداً التي تبدأ بالبادئة دون اعتبار للتشكيل، عدا البادئة نفسها."""
+        key = normalize_word(prefix)
+        if not key:
+            return []
+        node = self._root
+        for char in key:
+            node = node.children.get(char)
+            if node is None:
+                return []
+        return [form for _, form in self._top(node) if normalize_word(form) != key][:limit]
+
+    def _top(self, node):
+        if node.top is None:
+            entries = []
+            if node.count and node.forms:
+                entries.append((node.count, max(node.forms.items(), key=lambda item: item[1])[0]))
+            for child in node.children.values():
+                entries.extend(self._top(child))
+            node.top = heapq.nsmallest(self.cache_size, entries, key=_rank)
+        return node.top
+
+
+_shared_trie = None
+
+
+def shared_word_trie():
+    """شجرة الكلمات المشتركة بين جميع التبويبات المفتوحة."""
+    global _shared_trie
+    if _shared_trie is None:
+        _shared_trie = WordTrie()
+    return _shared_trie
+
+
+class DocumentWordIndex:
+    """كلمات مستند واحد لكل كتلة، تضاف إلى الشجرة المشتركة وتزال منها.
+
+    التعديلات الصغيرة تعيد عد كلمات الكتل المعدلة فوراً وتضيف الفرق إلى الشجرة.
+    التعديلات الكبيرة (فتح ملف أو لصق نص طويل أو تبديل نافذة ملف كبير) تعلم
+    كتلها فقط، وتعد كلماتها على دفعات قصيرة عند فراغ حلقة الأحداث، وتتوقف
+    الدفعات ما دام busy يعيد True. عند حذف المستند تزال كلماته كلها من الشجرة.
+    """
+
+    def __init__(self, document, change_bus, trie=None, busy=None):
+        self.document = document
+        self.trie = trie or shared_word_trie()
+        self.busy = busy
+        self.enabled = True
+        self._blocks = [None] * document.blockCount()
+        self._retired = []  # كلمات كتل حذفت ولم تطرح من الشجرة بعد
+        self._stale_from = len(self._blocks)
+        self._step_scheduled = False
+        change_bus.subscribe(self, 'words', self._on_contents_change, priority=20)
+        document.destroyed.connect(self.release)
+
+    def _on_contents_change(self, delta):
+        if not self.enabled:
+            return
+        document = self.document
+        first = document.findBlock(delta.position).blockNumber()
+        last = document.findBlock(delta.position + delta.added).blockNumber()
+        old_last = last - (document.blockCount() - len(self._blocks))
+        if old_last < first - 1 or old_last >= len(self._blocks):
+            # لا يمكن معرفة الكتل المعدلة بدقة
+            old_last = len(self._blocks) - 1
+            first, last = 0, document.blockCount() - 1
+
+        old_blocks = self._blocks[first:old_last + 1]
+        if (last - first + 1 > SYNC_BLOCK_LIMIT or len(old_blocks) > SYNC_BLOCK_LIMIT
+                or delta.added + delta.removed > SYNC_CHAR_LIMIT):
+            self._retired.extend(words for words in old_blocks if words and words is not _STALE)
+            self._blocks[first:old_last + 1] = [_STALE] * (last - first + 1)
+            self._stale_from = min(self._stale_from, first)
+            self._schedule_step()
+            return
+
+        block = document.findBlockByNumber(first)
+        counts = []
+        for _ in range(first, last + 1):
+            counts.append(count_words(block.text()))
+            block = block.next()
+        for words in old_blocks:
+            self._apply(words, -1)
+        for words in counts:
+            self._apply(words, 1)
+        self._blocks[first:old_last + 1] = counts
+        self._stale_from = min(self._stale_from, first)
+
+    def _apply(self, words, sign):
+        if words and words is not _STALE:
+            for word, count in words.items():
+                self.trie.add(word, sign * count)
+
+    def _schedule_step(self, delay=0):
+        if not self._step_scheduled:
+            self._step_scheduled = True
+            QTimer.singleShot(delay, self._index_step)
+
+    def _index_step(self):
+        """دفعة فهرسة واحدة لا تتجاوز INDEX_STEP_BUDGET."""
+        self._step_scheduled = False
+        if not self.enabled or (not self._retired and self._stale_from >= len(self._blocks)):
+            return
+        if self.busy is not None and self.busy():
+            self._schedule_step(BUSY_RETRY_DELAY)
+            return
+
+        deadline = time.perf_counter() + INDEX_STEP_BUDGET
+        while self._retired and time.perf_counter() < deadline:
+            self._apply(self._retired.pop(), -1)
+
+        blocks = self._blocks
+        while time.perf_counter() < deadline:
+            try:
+                index = blocks.index(_STALE, self._stale_from)
+            except ValueError:
+                self._stale_from = len(blocks)
+                break
+            block = self.document.findBlockByNumber(index)
+            while index < len(blocks) and blocks[index] is _STALE and time.perf_counter() < deadline:
+                words = count_words(block.text())
+                blocks[index] = words
+                self._apply(words, 1)
+                index += 1
+                block = block.next()
+            self._stale_from = index
+
+        if self._retired or self._stale_from < len(blocks):
+            self._schedule_step()
+
+    def pending_blocks(self):
+        """عدد الكتل التي لم تعد كلماتها بعد."""
+        return self._blocks.count(_STALE)
+
+    def set_enabled(self, enabled):
+        """إيقاف الفهرسة يزيل كلمات المستند من الشجرة، وإعادتها تفهرس المستند كله."""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if not enabled:
+            self.release()
+        else:
+            self._blocks = [_STALE] * self.document.blockCount()
+            self._stale_from = 0
+            self._schedule_step()
+
+    def release(self):
+        """إزالة كلمات المستند من الشجرة المشتركة."""
+        for words in self._blocks:
+            self._apply(words, -1)
+        for words in self._retired:
+            self._apply(words, -1)
+        self._blocks = []
+        self._retired = []
+        self._stale_from = 0